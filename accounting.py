@@ -0,0 +1,65 @@
+import time
+import config
+
+
+class GuildUsage:
+    """Resource use attributed to one guild since startup"""
+
+    __slots__ = ("messages", "handler_time", "degraded", "calls", "dropped", "window_start", "window_time")
+
+    def __init__(self):
+        self.messages = 0
+        self.handler_time = 0.0  # CPU seconds the auto-mod filters spent on this guild's messages
+        self.degraded = 0  # Messages that skipped optional filters because the guild was over budget
+        self.calls = 0  # Outbound API calls dispatched
+        self.dropped = 0  # Outbound calls shed or refused
+        self.window_start = 0.0
+        self.window_time = 0.0
+
+
+class UsageTracker:
+    """Per-guild accounting of message handling CPU time and outbound API calls
+
+    A guild that spends more than config.GUILD_HANDLER_BUDGET of one CPU
+    on message handling within config.GUILD_HANDLER_WINDOW is reported as
+    over budget until the window ends, so the caller can skip optional
+    work for it while other guilds are unaffected. Callers charge CPU
+    time only (time.thread_time() around synchronous work), so waiting
+    on rate-limited API calls never counts against a guild.
+    """
+
+    def __init__(self, budget=None, window=None):
+        self.budget = budget if budget is not None else config.GUILD_HANDLER_BUDGET
+        self.window = window if window is not None else config.GUILD_HANDLER_WINDOW
+        self.guilds = {}  # guild_id -> GuildUsage
+
+    def get(self, guild_id):
+        usage = self.guilds.get(guild_id)
+        if usage is None:
+            usage = self.guilds[guild_id] = GuildUsage()
+        return usage
+
+    def charge(self, guild_id, elapsed):
+        """Add `elapsed` CPU seconds of message handling to the guild"""
+        usage = self.get(guild_id)
+        usage.messages += 1
+        usage.handler_time += elapsed
+        now = time.perf_counter()
+        if now - usage.window_start >= self.window:
+            usage.window_start = now
+            usage.window_time = 0.0
+        usage.window_time += elapsed
+
+    def over_budget(self, guild_id):
+        usage = self.guilds.get(guild_id)
+        if usage is None or time.perf_counter() - usage.window_start >= self.window:
+            return False
+        return usage.window_time >= self.budget * self.window
+
+    def totals(self):
+        """(handler time, calls) summed over all guilds"""
+        return (sum(u.handler_time for u in self.guilds.values()),
+                sum(u.calls for u in self.guilds.values()))
+
+    def forget(self, guild_id):
+        self.guilds.pop(guild_id, None)
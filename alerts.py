@@ -0,0 +1,75 @@
+import logging
+from discord.ext import commands
+import config
+
+logger = logging.getLogger("bot.alerts")
+
+
+def find_alert_channel(guild):
+    """config.ALERT_CHANNEL if it is in `guild` and usable, else the first text channel the bot can send in"""
+    if config.ALERT_CHANNEL is not None:
+        channel = guild.get_channel(config.ALERT_CHANNEL)
+        if channel is not None and channel.permissions_for(guild.me).send_messages:
+            return channel
+    for channel in guild.text_channels:
+        if channel.permissions_for(guild.me).send_messages:
+            return channel
+    return None
+
+
+class AlertChannels(commands.Cog):
+    """Per-guild cache of the channel used for raid alerts and the welcome message
+
+    The choice (including "none found") is computed once with
+    find_alert_channel and kept until a channel, role or the bot's own
+    member changes in a way that could affect it, so sending an alert is
+    a dict lookup rather than a permission check on every channel.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.channels = {}  # guild_id -> channel ID, None when no channel is usable
+
+    def get(self, guild):
+        if guild.id in self.channels:
+            channel_id = self.channels[guild.id]
+            channel = guild.get_channel(channel_id) if channel_id is not None else None
+            if channel is not None or channel_id is None:
+                return channel
+        channel = find_alert_channel(guild)
+        self.channels[guild.id] = channel.id if channel else None
+        return channel
+
+    def invalidate(self, guild_id):
+        self.channels.pop(guild_id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.overwrites != after.overwrites or before.position != after.position:
+            self.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions:
+            self.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            self.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.invalidate(guild.id)
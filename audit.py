@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("bot.audit")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mod_actions (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    action TEXT NOT NULL COLLATE NOCASE,
+    target_id INTEGER,
+    target TEXT,
+    moderator_id INTEGER,
+    reason TEXT,
+    duration INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mod_actions_guild ON mod_actions (guild_id, id);
+CREATE INDEX IF NOT EXISTS idx_mod_actions_time ON mod_actions (guild_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_mod_actions_target ON mod_actions (guild_id, target_id, id);
+CREATE INDEX IF NOT EXISTS idx_mod_actions_moderator ON mod_actions (guild_id, moderator_id, id);
+CREATE INDEX IF NOT EXISTS idx_mod_actions_action ON mod_actions (guild_id, action, id);
+"""
+
+INSERT = (
+    "INSERT INTO mod_actions (guild_id, action, target_id, target, moderator_id, reason, duration, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+COLUMNS = ("id", "guild_id", "action", "target_id", "target", "moderator_id", "reason", "duration", "created_at")
+
+
+class AuditLog:
+    """Append-only moderation action store backed by SQLite
+
+    Writes are buffered in memory and committed in batches by a background
+    task. Searches page backwards by entry id (keyset pagination) so every
+    page is an index range scan, however large the table grows.
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._conn = None
+        self._wakeup = None
+        self._task = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def start(self):
+        """Start the background batch writer"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the writer and commit anything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def record(self, guild_id, action, target_id=None, target=None, moderator_id=None,
+               reason=None, duration=None, created_at=None):
+        """Queue an entry; it is written with the next batch"""
+        self._pending.append((
+            guild_id, action, target_id, target, moderator_id, reason, duration,
+            created_at if created_at is not None else time.time(),
+        ))
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write all pending entries in one transaction"""
+        # Serialized so a search never overtakes a batch that is mid-write
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                # Keep the entries so the next flush retries them
+                self._pending[:0] = batch
+                logger.error("Failed to write %d audit entries: %s", len(batch), e)
+                return 0
+            return len(batch)
+
+    def _write(self, batch):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(INSERT, batch)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def search(self, guild_id, target_id=None, moderator_id=None, action=None,
+                     since=None, before_id=None, limit=10):
+        """Return up to `limit` entries, newest first, older than `before_id`"""
+        # Make sure recent actions are visible to the query
+        await self.flush()
+        return await asyncio.to_thread(
+            self._search, guild_id, target_id, moderator_id, action, since, before_id, limit
+        )
+
+    def _search(self, guild_id, target_id, moderator_id, action, since, before_id, limit):
+        clauses = ["guild_id = ?"]
+        params = [guild_id]
+
+        if target_id is not None:
+            clauses.append("target_id = ?")
+            params.append(target_id)
+        if moderator_id is not None:
+            clauses.append("moderator_id = ?")
+            params.append(moderator_id)
+        if action is not None:
+            clauses.append("action = ?")
+            params.append(action)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+
+        with self._lock:
+            conn = self._connect()
+            if since is not None:
+                # Ids grow with time, so turn the time bound into an id bound
+                # and let the filter indexes stay a single range scan. The
+                # first entry in (guild_id, created_at) order is one index
+                # lookup; MIN(id) would read every entry since the bound
+                row = conn.execute(
+                    "SELECT id FROM mod_actions WHERE guild_id = ? AND created_at >= ? "
+                    "ORDER BY created_at, id LIMIT 1",
+                    (guild_id, since),
+                ).fetchone()
+                if row is None:
+                    return []
+                clauses.append("id >= ?")
+                params.append(row[0])
+
+            query = "SELECT {} FROM mod_actions WHERE {} ORDER BY id DESC LIMIT ?".format(
+                ", ".join(COLUMNS), " AND ".join(clauses)
+            )
+            params.append(limit)
+            rows = conn.execute(query, params).fetchall()
+
+        return [dict(zip(COLUMNS, row)) for row in rows]
@@ -0,0 +1,205 @@
+import math
+import time
+import config
+import linkscan
+
+
+class ParsedMessage:
+    """Everything the auto-mod filters read from a message, computed once
+
+    Filters share one instance per message instead of each re-reading
+    and re-normalizing the content.
+    """
+
+    __slots__ = (
+        "message", "author", "guild_id", "channel_id", "author_id",
+        "content", "content_lower", "mention_count", "mentions_everyone",
+        "pings_everyone", "may_have_links", "created", "policy",
+    )
+
+    def __init__(self, message, now=None, policy=None):
+        self.message = message
+        self.author = message.author
+        self.guild_id = message.guild.id
+        self.channel_id = message.channel.id
+        self.author_id = message.author.id
+        self.content = message.content
+        self.content_lower = message.content.lower()
+        # Both lists are filled in by discord.py when the message is parsed
+        self.mention_count = len(message.mentions) + len(message.role_mentions)
+        # Attempted mass pings are noted too, not only ones the member may send
+        self.pings_everyone = message.mention_everyone
+        self.mentions_everyone = self.pings_everyone or "@everyone" in self.content or "@here" in self.content
+        self.may_have_links = "." in self.content
+        self.created = now if now is not None else time.monotonic()  # For window math only
+        self.policy = policy  # policy.Policy in effect for the channel
+
+
+def mention_weight(parsed, everyone_weight):
+    """How many mentions a parsed message counts as, a mass ping as `everyone_weight`
+
+    An @everyone/@here that pinged nobody counts in full only alongside
+    other mentions or a link, as in raid spam; on its own ("please don't
+    @everyone") it counts as one mention.
+    """
+    weight = parsed.mention_count
+    if parsed.pings_everyone:
+        return weight + everyone_weight
+    if parsed.mentions_everyone:
+        if weight or (parsed.may_have_links and linkscan.LinkScanner.extract_hosts(parsed.content)):
+            return weight + everyone_weight
+        return weight + 1
+    return weight
+
+
+class RollingCounter:
+    """Approximate rolling totals per key in O(1) time and three numbers per key
+
+    Keeps the total for the current fixed window and the one before it,
+    and weights the previous total by how much of it still overlaps the
+    rolling window (the usual sliding-window-counter estimate).
+    """
+
+    SWEEP_EVERY = 10000
+
+    def __init__(self, window):
+        self.window = window
+        self._counts = {}  # key -> [window index, current total, previous total]
+        self._adds = 0
+
+    def add(self, key, amount, now):
+        """Add `amount` for `key` and return the estimated rolling total"""
+        slot = int(now // self.window)
+        entry = self._counts.get(key)
+        if entry is None or entry[0] < slot - 1:
+            entry = self._counts[key] = [slot, 0, 0]
+        elif entry[0] == slot - 1:
+            entry[0], entry[1], entry[2] = slot, 0, entry[1]
+        entry[1] += amount
+
+        self._adds += 1
+        if self._adds >= self.SWEEP_EVERY:
+            self._sweep(slot)
+
+        overlap = 1 - (now - slot * self.window) / self.window
+        return entry[1] + entry[2] * overlap
+
+    def reset(self, key):
+        self._counts.pop(key, None)
+
+    def _sweep(self, slot):
+        self._adds = 0
+        stale = [key for key, entry in self._counts.items() if entry[0] < slot - 1]
+        for key in stale:
+            del self._counts[key]
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class _Baseline:
+    __slots__ = ("mean", "var", "samples", "updated", "limit")
+
+    def __init__(self, value, now):
+        self.mean = float(value)
+        self.var = 0.0
+        self.samples = 1
+        self.updated = now
+        self.limit = value  # ceil(mean + deviations * sd), kept current on update
+
+
+class ChannelBaselines:
+    """Per-channel baseline of how many messages an author sends per spam interval
+
+    Each channel keeps an exponentially weighted mean and variance of the
+    per-author counts seen on its messages (five numbers, updated in O(1)).
+    Once a channel has config.SPAM_BASELINE_WARMUP samples, its spam
+    threshold is the mean plus config.SPAM_BASELINE_DEVIATIONS standard
+    deviations, kept within config.SPAM_THRESHOLD_RANGE times the
+    configured threshold. With the default range of 1.0 to 2.0, busy
+    event channels get more headroom and quiet channels keep the
+    configured limit, so adapting never mutes anyone sooner. Counts that
+    trip the threshold are not fed back, so a spammer cannot raise the bar
+    for themselves.
+    """
+
+    SWEEP_EVERY = 10000
+
+    def __init__(self, alpha=None, warmup=None, deviations=None, bounds=None, idle=None):
+        self.alpha = alpha if alpha is not None else config.SPAM_BASELINE_ALPHA
+        self.warmup = warmup if warmup is not None else config.SPAM_BASELINE_WARMUP
+        self.deviations = deviations if deviations is not None else config.SPAM_BASELINE_DEVIATIONS
+        self.low, self.high = bounds or config.SPAM_THRESHOLD_RANGE
+        self.idle = idle if idle is not None else config.SPAM_BASELINE_IDLE
+        self._channels = {}  # channel_id -> _Baseline
+        self._bounds = {}  # configured threshold -> (lowest, highest) adaptive threshold
+        self._updates = 0
+
+    def check(self, channel_id, count, now, base):
+        """Return the spam threshold for a message; counts under it update the baseline
+
+        `count` is the author's messages in the channel within the spam
+        interval, `base` the configured threshold for the channel.
+        """
+        baseline = self._channels.get(channel_id)
+        if baseline is None or now - baseline.updated > self.idle:
+            # New, or quiet for so long that the old baseline says nothing
+            if count < base:
+                self._channels[channel_id] = _Baseline(count, now)
+            return base
+
+        samples = baseline.samples
+        if samples < self.warmup:
+            threshold = base
+        else:
+            bounds = self._bounds.get(base)
+            if bounds is None:
+                bounds = self._bounds[base] = (max(math.ceil(base * self.low), 2), max(int(base * self.high), 2))
+            threshold = baseline.limit
+            if threshold < bounds[0]:
+                threshold = bounds[0]
+            elif threshold > bounds[1]:
+                threshold = bounds[1]
+
+        if count < threshold:
+            # Plain running mean until alpha takes over, so early samples count fully
+            alpha = self.alpha
+            if samples * alpha < 1:
+                alpha = 1.0 / (samples + 1)
+            mean = baseline.mean
+            diff = count - mean
+            step = alpha * diff
+            mean += step
+            var = (1 - alpha) * (baseline.var + diff * step)
+            baseline.mean = mean
+            baseline.var = var
+            baseline.limit = math.ceil(mean + self.deviations * math.sqrt(var))
+            baseline.samples = samples + 1
+            baseline.updated = now
+            self._updates += 1
+            if self._updates >= self.SWEEP_EVERY:
+                self._sweep(now)
+        return threshold
+
+    def threshold(self, channel_id, base):
+        """The channel's current spam threshold, without updating anything"""
+        baseline = self._channels.get(channel_id)
+        if baseline is None or baseline.samples < self.warmup:
+            return base
+        return min(max(baseline.limit, math.ceil(base * self.low), 2), max(int(base * self.high), 2))
+
+    def get(self, channel_id):
+        """(mean, standard deviation, samples) for the channel, or None"""
+        baseline = self._channels.get(channel_id)
+        if baseline is None:
+            return None
+        return baseline.mean, math.sqrt(baseline.var), baseline.samples
+
+    def _sweep(self, now):
+        self._updates = 0
+        stale = [cid for cid, baseline in self._channels.items() if now - baseline.updated > self.idle]
+        for cid in stale:
+            del self._channels[cid]
+
+    def __len__(self):
+        return len(self._channels)
@@ -0,0 +1,85 @@
+"""Per-message cost of blocklist matching by list size
+
+Searches the same simulated chat messages with blocklist.Matcher, with
+the substring loop it replaced (one `in` test per term) and with a
+single regex alternation of all terms, for lists of increasing size.
+Also reports how long each list takes to compile, since that is what
+an edit or reload of a large list costs. Run from the repository root:
+
+    python benchmarks/blocklist_matching.py [messages]
+"""
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blocklist import Matcher  # noqa: E402
+
+SIZES = (3, 100, 1000, 20000)
+
+
+def word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+
+
+def messages(count):
+    rng = random.Random(0)
+    return [" ".join(word(rng) for _ in range(rng.randint(3, 30))) for _ in range(count)]
+
+
+def substring_loop(terms):
+    ordered = sorted(terms, key=len, reverse=True)
+
+    def search(content):
+        for term in ordered:
+            if term in content:
+                return term
+        return None
+    return search
+
+
+def alternation(terms):
+    pattern = re.compile("|".join(map(re.escape, sorted(terms, key=lambda t: (-len(t), t)))))
+
+    def search(content):
+        match = pattern.search(content)
+        return match.group() if match else None
+    return search
+
+
+def per_message(search, sample):
+    """Best-of-3 microseconds per message"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for content in sample:
+            search(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(sample)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sample = messages(count)
+    rng = random.Random(1)
+    print(f"{count} messages, {sum(map(len, sample)) / count:.0f} characters on average")
+    print(f"{'terms':>6} {'Matcher':>10} {'loop':>10} {'regex':>10}   Matcher build")
+    for size in SIZES:
+        terms = frozenset(word(rng) for _ in range(size))
+        start = time.perf_counter()
+        matcher = Matcher(terms)
+        build = time.perf_counter() - start
+        # Same verdicts as the plain loop
+        loop = substring_loop(terms)
+        assert all((matcher.search(c) is None) == (loop(c) is None) for c in sample)
+        print(f"{len(terms):>6} {per_message(matcher.search, sample):>8.1f}us {per_message(loop, sample):>8.1f}us "
+              f"{per_message(alternation(terms), sample):>8.1f}us   {build * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Per-join cost of join scoring at 100 joins per second
+
+Simulates a minute of ordinary joins spread over many servers, then a
+raid of fresh, default-avatar accounts with templated names into one
+server, all arriving at 100 joins/second. Reports how many ordinary
+joins were flagged, how far into the raid it was detected, and the time
+per join for joinscore.JoinScorer.score alone and for the whole
+on_member_join handler (scoring plus raid detection in verification
+mode, with side effects going to the replay sink). Run from the repository root:
+
+    python benchmarks/join_scoring.py [seconds] [guilds]
+"""
+import asyncio
+import collections
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clocks  # noqa: E402
+import config  # noqa: E402
+import joinscore  # noqa: E402
+import replay  # noqa: E402
+
+RATE = 100  # Joins per second
+RAID_SECONDS = 10
+START = 1_750_000_000.0  # Simulated wall clock at the first join
+SYLLABLES = ["ka", "ri", "mo", "lu", "zen", "tha", "vic", "nor", "el", "bri", "sam", "dax", "oli", "qu", "fey"]
+
+
+def snowflake(created, seq):
+    return (int(created * 1000) - joinscore.DISCORD_EPOCH) << 22 | (seq & 0x3FFFFF)
+
+
+def ordinary_name(rng):
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    if rng.random() < 0.3:
+        name += str(rng.randint(1, 9999))
+    return name
+
+
+def joins(seconds, guilds):
+    """Yield (time, guild index, member id, name, has avatar, raider) at RATE joins/second
+
+    The raid goes to its own server, index `guilds`.
+    """
+    rng = random.Random(0)
+    seq = 0
+    now = START
+    for _ in range(seconds * RATE):
+        now += 1 / RATE
+        seq += 1
+        age = rng.uniform(30 * 86400, 8 * 365 * 86400)
+        yield now, rng.randrange(guilds), snowflake(now - age, seq), ordinary_name(rng), rng.random() < 0.85, False
+    for _ in range(RAID_SECONDS * RATE):
+        now += 1 / RATE
+        seq += 1
+        age = rng.uniform(60, 3 * 3600)
+        yield now, guilds, snowflake(now - age, seq), f"freegift_{rng.randint(100, 9999)}", rng.random() < 0.2, True
+
+
+def build_members(events, sink):
+    guilds = {}
+    members = []
+    for now, guild_index, member_id, name, has_avatar, raider in events:
+        guild = guilds.get(guild_index)
+        if guild is None:
+            guild = guilds[guild_index] = replay.ReplayGuild(guild_index + 1, sink)
+            guild.channel(1)
+        member = replay.ReplayMember(member_id, guild, sink)
+        member.name = name
+        member.avatar = "a_hash" if has_avatar else None
+        members.append((now, member, raider))
+    return members
+
+
+def time_scoring(members, repeat=3):
+    """Best-of-`repeat` seconds for JoinScorer.score over every join"""
+    best = None
+    for _ in range(repeat):
+        clock = clocks.SimulatedClock(START)
+        score = joinscore.JoinScorer(clock).score
+        start = time.perf_counter()
+        for now, member, _ in members:
+            clock.now = now
+            score(member)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+async def run_handler(members):
+    """Feed every join to on_member_join; returns (seconds, sink, raid joins seen when a raid was first detected)"""
+    clock = clocks.SimulatedClock(START)
+    sink = replay.ReplaySink(clock)
+    cog = replay.build_cog(clock, sink)
+    raid_joins = 0
+    detected_after = None
+    start = time.perf_counter()
+    for now, member, raider in members:
+        clock.now = now
+        await cog.on_member_join(member)
+        if raider:
+            raid_joins += 1
+            if detected_after is None and cog.quarantine.active(member.guild.id, now):
+                detected_after = raid_joins
+    elapsed = time.perf_counter() - start
+    await cog.quarantine.close()
+    return elapsed, sink, detected_after
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    guilds = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    config.STATE_SNAPSHOT_FILE = None
+    config.LOCKDOWN_STATE_FILE = None
+    config.MOD_LOG_CHANNEL = None
+    config.RAID_ACTION = "verification"
+
+    events = list(joins(seconds, guilds))
+    sink = replay.ReplaySink(clocks.SimulatedClock(START))
+    members = build_members(events, sink)
+    raid_start = seconds * RATE
+    print(f"{raid_start} ordinary joins over {seconds}s into {guilds} servers, "
+          f"then {len(members) - raid_start} raid joins over {RAID_SECONDS}s into one")
+
+    scorer = joinscore.JoinScorer(clocks.SimulatedClock(START))
+    flagged_ordinary = flagged_raid = 0
+    for now, member, raider in members:
+        scorer.clock.now = now
+        if scorer.score(member).total >= config.JOIN_SUSPICIOUS_SCORE:
+            if raider:
+                flagged_raid += 1
+            else:
+                flagged_ordinary += 1
+    print(f"flagged: {flagged_ordinary} ordinary joins, {flagged_raid} of {len(members) - raid_start} raid joins")
+
+    scoring = time_scoring(members)
+    elapsed, sink, detected_after = asyncio.run(run_handler(members))
+    actions = collections.Counter(a.split("\t")[2] for a in sink.actions)
+    print(f"raid detected after {detected_after} raid joins; actions: {dict(actions)}")
+    print(f"quarantine role adds: {sink.calls['role']}")
+
+    per_join = elapsed / len(members)
+    print(f"scoring alone: {scoring * 1e6 / len(members):.1f} us/join")
+    print(f"on_member_join: {per_join * 1e6:.1f} us/join, {per_join * RATE:.2%} of one CPU at {RATE} joins/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Per-message cost of adaptive spam thresholds
+
+Feeds simulated traffic (a few busy event channels among many quiet
+ones) through MemoryStateBackend.hit, once with the fixed SPAM_THRESHOLD
+and once with automod.ChannelBaselines, and reports how many ordinary
+(non-spam) authors each would have muted. The added per-message cost is
+timed separately by replaying the same counts through
+ChannelBaselines.check alone, since it is small next to the window
+update. Run from the repository root:
+
+    python benchmarks/spam_baselines.py [messages] [channels]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clocks  # noqa: E402
+import config  # noqa: E402
+from automod import ChannelBaselines  # noqa: E402
+from state import MemoryStateBackend  # noqa: E402
+
+BUSY_SHARE = 0.02  # Fraction of channels that are busy event channels
+BUSY_RATE = 0.8  # Messages per second per author in a busy channel
+QUIET_RATE = 0.02
+
+
+def traffic(count, channels):
+    """Yield (time, channel, author) for `count` messages of ordinary chat"""
+    rng = random.Random(0)
+    busy = max(int(channels * BUSY_SHARE), 1)
+    authors = [20 if c < busy else 5 for c in range(channels)]
+    rates = [n * (BUSY_RATE if c < busy else QUIET_RATE) for c, n in enumerate(authors)]
+    total = sum(rates)
+    now = 0.0
+    picks = rng.choices(range(channels), weights=rates, k=count)
+    for channel in picks:
+        now += rng.expovariate(total)
+        yield now, channel, channel * 100 + rng.randrange(authors[channel])
+
+
+def run(messages, baselines):
+    """Return (spam window counts per message, mutes)"""
+    backend = MemoryStateBackend(clock=clocks.SimulatedClock())
+    counts = []
+    muted = 0
+    base = config.SPAM_THRESHOLD
+    for now, channel, author in messages:
+        key = (author, channel)
+        count = backend.hit("spam", key, now, config.SPAM_INTERVAL)
+        counts.append(count)
+        threshold = base
+        if baselines is not None:
+            threshold = baselines.check(channel, count, now, threshold)
+        if count >= threshold:
+            backend.reset("spam", key)
+            muted += 1
+    return counts, muted
+
+
+def time_checks(messages, counts, repeat=3):
+    """Best-of-`repeat` seconds for ChannelBaselines.check over the run, minus loop overhead"""
+    base = config.SPAM_THRESHOLD
+    rows = [(channel, count, now) for (now, channel, _), count in zip(messages, counts)]
+    best = None
+    for _ in range(repeat):
+        baselines = ChannelBaselines()
+        check = baselines.check
+        start = time.perf_counter()
+        for channel, count, now in rows:
+            check(channel, count, now, base)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for channel, count, now in rows:
+            pass
+        elapsed -= time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    channels = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    messages = list(traffic(count, channels))
+    print(f"{count} messages across {channels} channels ({max(int(channels * BUSY_SHARE), 1)} busy)")
+
+    _, fixed_muted = run(messages, None)
+    baselines = ChannelBaselines()
+    counts, adaptive_muted = run(messages, baselines)
+    added = time_checks(messages, counts)
+
+    print(f"ordinary authors muted: fixed {fixed_muted}, adaptive {adaptive_muted}")
+    print(f"added cost {added * 1e9 / count:.0f} ns/message, {len(baselines)} baselines")
+    for channel in (0, channels - 1):
+        mean, std, samples = baselines.get(channel)
+        print(f"  channel {channel}: mean {mean:.2f} sd {std:.2f} over {samples} messages "
+              f"-> threshold {baselines.threshold(channel, config.SPAM_THRESHOLD)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Memory and view cost of 1M stored warnings
+
+Compares the old layout (a dict per warning with an ISO time string)
+with state.WarningRecord. Run from the repository root:
+
+    python benchmarks/warnings_memory.py [warnings] [users]
+"""
+import datetime
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state import WarningRecord  # noqa: E402
+
+REASONS = ["No reason provided", "Spamming", "Maximum mentions exceeded", "Inappropriate language"]
+
+
+def build(count, users, make):
+    rng = random.Random(0)
+    start = 1700000000
+    warnings = {}
+    for i in range(count):
+        guild_id = 100000000000000000 + rng.randrange(50)
+        user_id = 200000000000000000 + rng.randrange(users)
+        # Mostly stock reasons, like real data; a few free-text ones
+        reason = REASONS[i % len(REASONS)] if i % 10 else f"Custom reason {i}"
+        mod = 300000000000000000 + rng.randrange(20)
+        warnings.setdefault(guild_id, {}).setdefault(user_id, []).append(make(reason, mod, start + i))
+    return warnings
+
+
+def as_dict(reason, mod, created):
+    return {
+        'reason': reason,
+        'mod': mod,
+        'time': datetime.datetime.fromtimestamp(created).isoformat()
+    }
+
+
+def as_record(reason, mod, created):
+    return WarningRecord(reason, mod, created)
+
+
+def measure(label, make, view, count, users):
+    gc.collect()
+    tracemalloc.start()
+    warnings = build(count, users, make)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    entries = [w for users_ in warnings.values() for ws in users_.values() for w in ws]
+    t = time.perf_counter()
+    for w in entries:
+        view(w)
+    elapsed = time.perf_counter() - t
+
+    print(f"{label:<14} {size / 2**20:8.1f} MiB  {size / count:6.1f} B/warning  view {elapsed * 1e9 / count:6.0f} ns/warning")
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else count // 3
+    print(f"{count} warnings across {users} users")
+    old = measure("dict + ISO", as_dict, lambda w: datetime.datetime.fromisoformat(w['time']).strftime("%Y-%m-%d %H:%M:%S"), count, users)
+    new = measure("WarningRecord", as_record, lambda w: datetime.datetime.fromtimestamp(w.time).strftime("%Y-%m-%d %H:%M:%S"), count, users)
+    print(f"saved {(old - new) / 2**20:.1f} MiB ({1 - new / old:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+import sys
+import weakref
+from discord.ext import commands
+import config
+
+logger = logging.getLogger("bot.blocklist")
+
+MAX_TERM_LENGTH = 100
+LOOP_MAX_TERMS = 100  # Up to this many terms, one `in` test per term beats walking an automaton
+THREAD_BUILD_TERMS = 2000  # Larger lists are compiled in a worker thread, off the event loop
+
+
+def normalize(term):
+    """Lowercase and trim a term; returns "" for terms that can't be used"""
+    term = term.strip().lower()
+    return term if len(term) <= MAX_TERM_LENGTH else ""
+
+
+class Matcher:
+    """Substring matcher for one set of terms
+
+    Small sets are tested term by term, longest first. Larger sets are
+    compiled into an Aho-Corasick automaton, so a message is scanned once
+    whatever the list's size and a search costs only the message's
+    length. Guilds with the same effective terms share one Matcher.
+    """
+
+    __slots__ = ("terms", "ordered", "goto", "fail", "out", "__weakref__")
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.ordered = None
+        self.goto = None
+        if len(terms) <= LOOP_MAX_TERMS:
+            self.ordered = sorted(terms, key=lambda t: (-len(t), t))
+        else:
+            self._compile(terms)
+
+    def _compile(self, terms):
+        goto = [{}]  # state -> {character: next state}
+        out = [None]  # state -> longest term ending at this state, if any
+        for term in terms:
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(None)
+                state = nxt
+            out[state] = term
+
+        # Failure links, breadth first: the longest proper suffix that is also a prefix
+        fail = [0] * len(goto)
+        queue = collections.deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                if out[nxt] is None:
+                    out[nxt] = out[fail[nxt]]
+        self.goto, self.fail, self.out = goto, fail, out
+
+    def search(self, content):
+        """Return a blocked term found in `content` (already lowercased), or None
+
+        Small sets report the longest term present; the automaton reports
+        the first term to end in `content`, the longest if several end there.
+        """
+        if self.ordered is not None:
+            for term in self.ordered:
+                if term in content:
+                    return term
+            return None
+
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in content:
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            term = out[state]
+            if term is not None:
+                return term
+        return None
+
+
+class Blocklists(commands.Cog):
+    """Per-guild bad-word lists on top of config.BAD_WORDS
+
+    Each guild stores terms it adds to and removes from the defaults in
+    config.BLOCKLIST_FILE. A guild's matcher is compiled when its list is
+    loaded or edited, never while a message waits, and replaced as a
+    whole once the new one is ready, so an edit never touches other
+    guilds and a message always sees a complete matcher. Large lists are
+    compiled in a worker thread. Matchers are shared by every guild with
+    the same effective terms (all guilds on the defaults use one), and
+    terms are interned so a word on many lists is stored once. The file
+    is re-read when it changes on disk, recompiling only the guilds whose
+    entries differ.
+    """
+
+    def __init__(self, bot, path=None):
+        self.bot = bot
+        self.path = path or config.BLOCKLIST_FILE
+        self.defaults = frozenset(filter(None, (sys.intern(normalize(w)) for w in config.BAD_WORDS)))
+        self._mtime = None
+        self.settings = self._load() or {}  # guild_id -> {"add": set, "remove": set}
+        self._matchers = {}  # guild_id -> Matcher, for guilds not on the defaults
+        self._shared = weakref.WeakValueDictionary()  # frozenset of terms -> Matcher
+        self.default = Matcher(self.defaults)
+        self._task = None
+
+    async def cog_load(self):
+        await self._rebuild(list(self.settings))
+        if config.BLOCKLIST_RELOAD_INTERVAL:
+            self._task = asyncio.create_task(self._watch())
+
+    async def cog_unload(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # Storage
+
+    def _load(self):
+        """Read the file; returns None if it is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            self._mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to read blocklists from %s: %s", self.path, e)
+            return None
+        return {
+            int(guild_id): {
+                "add": {sys.intern(t) for t in map(normalize, guild.get("add", [])) if t},
+                "remove": {sys.intern(t) for t in map(normalize, guild.get("remove", [])) if t},
+            }
+            for guild_id, guild in data.items()
+        }
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        data = {
+            guild_id: {"add": sorted(s["add"]), "remove": sorted(s["remove"])}
+            for guild_id, s in self.settings.items() if s["add"] or s["remove"]
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(config.BLOCKLIST_RELOAD_INTERVAL)
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                await self.reload()
+
+    async def reload(self):
+        """Re-read the file and recompile only the guilds whose lists changed"""
+        loaded = self._load()
+        if loaded is None:
+            return 0
+        changed = [g for g in set(self.settings) | set(loaded) if self.settings.get(g) != loaded.get(g)]
+        self.settings = loaded
+        await self._rebuild(changed)
+        if changed:
+            logger.info("Reloaded blocklists from %s, %d guilds changed", self.path, len(changed))
+        return len(changed)
+
+    # Editing
+
+    def guild_settings(self, guild_id):
+        return self.settings.setdefault(guild_id, {"add": set(), "remove": set()})
+
+    def terms(self, guild_id):
+        """The guild's effective terms"""
+        settings = self.settings.get(guild_id)
+        if settings is None:
+            return self.defaults
+        return (self.defaults - settings["remove"]) | settings["add"]
+
+    async def add(self, guild_id, terms):
+        """Block `terms` in the guild; returns the ones that were not already blocked"""
+        settings = self.guild_settings(guild_id)
+        current = self.terms(guild_id)
+        added = []
+        for term in filter(None, map(normalize, terms)):
+            if term in current or term in added:
+                continue
+            term = sys.intern(term)
+            settings["remove"].discard(term)
+            if term not in self.defaults:
+                settings["add"].add(term)
+            added.append(term)
+        if added:
+            self._save()
+            await self._rebuild([guild_id])
+        return added
+
+    async def remove(self, guild_id, terms):
+        """Unblock `terms` in the guild, defaults included; returns the ones that were blocked"""
+        settings = self.guild_settings(guild_id)
+        current = self.terms(guild_id)
+        removed = []
+        for term in filter(None, map(normalize, terms)):
+            if term not in current or term in removed:
+                continue
+            term = sys.intern(term)
+            settings["add"].discard(term)
+            if term in self.defaults:
+                settings["remove"].add(term)
+            removed.append(term)
+        if removed:
+            self._save()
+            await self._rebuild([guild_id])
+        return removed
+
+    # Matching
+
+    async def _rebuild(self, guild_ids):
+        """Compile the current lists of `guild_ids` and swap them in"""
+        for guild_id in guild_ids:
+            terms = frozenset(self.terms(guild_id))
+            if terms == self.defaults:
+                self._matchers.pop(guild_id, None)
+                continue
+            matcher = self._shared.get(terms)
+            if matcher is None:
+                if len(terms) > THREAD_BUILD_TERMS:
+                    matcher = await asyncio.to_thread(Matcher, terms)
+                    if frozenset(self.terms(guild_id)) != terms:
+                        continue  # Edited meanwhile; that edit's rebuild swaps in its own
+                else:
+                    matcher = Matcher(terms)
+                matcher = self._shared.setdefault(terms, matcher)
+            # One assignment, so messages see either the old or the new matcher
+            self._matchers[guild_id] = matcher
+
+    def matcher(self, guild_id):
+        return self._matchers.get(guild_id, self.default)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self._matchers.pop(guild.id, None)
+
+
+_default_matcher = None
+
+
+def default_matcher():
+    """Matcher for config.BAD_WORDS, for when the Blocklists cog isn't loaded"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = Matcher(frozenset(filter(None, map(normalize, config.BAD_WORDS))))
+    return _default_matcher
@@ -0,0 +1,36 @@
+import time
+
+
+class SystemClock:
+    """Time source for detection windows and persisted timestamps
+
+    `monotonic` is for window math: it never jumps when NTP adjusts the
+    system clock. `wall` (epoch seconds) is only for values that leave
+    the process: stored warnings, snapshots and counters shared through
+    Redis. Display code uses discord.utils.utcnow().
+    """
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wall(self):
+        return time.time()
+
+
+class SimulatedClock(SystemClock):
+    """A clock that only moves when told to, for replays and benchmarks"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def wall(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+SYSTEM = SystemClock()
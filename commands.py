@@ -2,25 +2,98 @@
 import discord
 from discord.ext import commands
 import asyncio
+import collections
 import datetime
 import logging
+import re
+import shlex
+import time
+import accounting
+import alerts
+import audit
+import automod
+import blocklist
+import clocks
 import config
-from typing import Union, Optional
+import joinscore
+import linkscan
+import lockdown
+import notifier
+import outbound
+import policy
+import quarantine
+import shadow
+import state
+from paginator import Paginator
+from resolver import CachedMember, CachedMemberOrUser
+from typing import Optional
 
 logger = logging.getLogger("bot.commands")
 
 class Moderation(commands.Cog):
     """Moderation commands for server management"""
     
-    def __init__(self, bot):
+    def __init__(self, bot, clock=None):
         self.bot = bot
-        self.spam_check = {}
-        self.raid_check = []
+        self.clock = clock or clocks.SYSTEM  # Replays and benchmarks pass a clocks.SimulatedClock
+        self.state = state.create_backend(self.clock)
+        self.pending_alerts = {}
+        self.mention_counter = automod.RollingCounter(config.MENTION_INTERVAL)
+        self.spam_baselines = automod.ChannelBaselines() if config.ADAPTIVE_SPAM else None
+        self.link_scanner = linkscan.LinkScanner.from_config()
+        self.shadow_rules = shadow.ShadowEvaluator.from_config()
+        self.usage = accounting.UsageTracker()
+        self.outbound = outbound.OutboundQueue(usage=self.usage)
+        self.quarantine = quarantine.QuarantineManager(bot, self.outbound, on_release=self.log_verification_end, clock=self.clock)
+        self.lockdowns = lockdown.LockdownManager(self.outbound)
+        self.notifier = notifier.DMNotifier(self.outbound)
+        self.join_scorer = joinscore.JoinScorer(self.clock)
+        self.recent_joins = {}  # guild_id -> deque of (join time, member)
+        self.follow_ups = set()  # Background tasks waiting on enforcement calls, see after_enforced
+        self.accepting = True
+        self.action_counts = collections.Counter()  # action name -> times logged since startup
+        self.audit_log = audit.AuditLog(
+            config.AUDIT_DB_PATH,
+            batch_size=config.AUDIT_BATCH_SIZE,
+            flush_interval=config.AUDIT_FLUSH_INTERVAL
+        )
+    
+    async def cog_load(self):
+        # Warm-start spam and raid windows from the previous process
+        if state.load_snapshot(self.state, config.STATE_SNAPSHOT_FILE):
+            logger.info("Restored detection state from %s", config.STATE_SNAPSHOT_FILE)
+        await self.state.start()
+        self.outbound.start()
+        self.audit_log.start()
+    
+    async def prepare_shutdown(self, timeout):
+        """Stop acting on new events and let queued enforcement actions finish"""
+        self.accepting = False
+        left = await self.outbound.drain(timeout)
+        if left:
+            logger.warning("Shutting down with %d enforcement actions still queued", left)
+        # Let the actions that finished be announced and logged
+        if self.follow_ups:
+            await asyncio.wait(list(self.follow_ups))
+    
+    async def cog_unload(self):
+        for task in list(self.follow_ups):
+            task.cancel()
+        await self.quarantine.close()
+        await self.outbound.close()
+        await self.audit_log.close()
+        await self.state.stop_snapshots()
+        try:
+            if state.save_snapshot(self.state, config.STATE_SNAPSHOT_FILE):
+                logger.info("Saved detection state to %s", config.STATE_SNAPSHOT_FILE)
+        except OSError as e:
+            logger.error("Failed to save detection state: %s", e)
+        await self.state.close()
     
     @commands.command()
     @commands.has_permissions(kick_members=True)
     @commands.cooldown(1, config.KICK_COMMAND_COOLDOWN, commands.BucketType.user)
-    async def kick(self, ctx, member: discord.Member, *, reason=None):
+    async def kick(self, ctx, member: CachedMember, *, reason=None):
         """Kick a member from the server"""
         if member.top_role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
             embed = discord.Embed(
@@ -40,13 +113,13 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.set_footer(text=f"Kicked by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the kick
             await self.log_mod_action(ctx.guild, "Kick", member, ctx.author, reason)
-            logger.info(f"{member} was kicked by {ctx.author} for: {reason}")
+            logger.info("%s was kicked by %s for: %s", member, ctx.author, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -66,7 +139,7 @@ class Moderation(commands.Cog):
     @commands.command()
     @commands.has_permissions(ban_members=True)
     @commands.cooldown(1, config.BAN_COMMAND_COOLDOWN, commands.BucketType.user)
-    async def ban(self, ctx, member: Union[discord.Member, discord.User], *, reason=None):
+    async def ban(self, ctx, member: CachedMemberOrUser, *, reason=None):
         """Ban a member from the server"""
         # Check if target is a member and has higher role
         if isinstance(member, discord.Member):
@@ -88,13 +161,13 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.set_footer(text=f"Banned by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the ban
             await self.log_mod_action(ctx.guild, "Ban", member, ctx.author, reason)
-            logger.info(f"{member} was banned by {ctx.author} for: {reason}")
+            logger.info("%s was banned by %s for: %s", member, ctx.author, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -114,7 +187,7 @@ class Moderation(commands.Cog):
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def mute(self, ctx, member: discord.Member, duration: Optional[int] = None, *, reason=None):
+    async def mute(self, ctx, member: CachedMember, duration: Optional[int] = None, *, reason=None):
         """Mute a member in the server"""
         if member.top_role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
             embed = discord.Embed(
@@ -132,7 +205,7 @@ class Moderation(commands.Cog):
             await member.timeout(datetime.timedelta(seconds=duration), reason=f"{reason} - By {ctx.author}")
             
             # Calculate when the mute will end
-            end_time = datetime.datetime.now() + datetime.timedelta(seconds=duration)
+            end_time = int(self.clock.wall()) + duration
             
             embed = discord.Embed(
                 title="Member Muted",
@@ -141,15 +214,15 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.add_field(name="Duration", value=f"{duration} seconds")
-            embed.add_field(name="Expires", value=f"<t:{int(end_time.timestamp())}:R>")
+            embed.add_field(name="Expires", value=f"<t:{end_time}:R>")
             embed.set_footer(text=f"Muted by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the mute
             await self.log_mod_action(ctx.guild, "Mute", member, ctx.author, reason, duration=duration)
-            logger.info(f"{member} was muted by {ctx.author} for {duration} seconds. Reason: {reason}")
+            logger.info("%s was muted by %s for %s seconds. Reason: %s", member, ctx.author, duration, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -169,7 +242,7 @@ class Moderation(commands.Cog):
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def unmute(self, ctx, member: discord.Member, *, reason=None):
+    async def unmute(self, ctx, member: CachedMember, *, reason=None):
         """Unmute a member in the server"""
         reason = reason or "No reason provided"
         
@@ -184,13 +257,13 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.set_footer(text=f"Unmuted by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the unmute
             await self.log_mod_action(ctx.guild, "Unmute", member, ctx.author, reason)
-            logger.info(f"{member} was unmuted by {ctx.author}. Reason: {reason}")
+            logger.info("%s was unmuted by %s. Reason: %s", member, ctx.author, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -210,7 +283,7 @@ class Moderation(commands.Cog):
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def warn(self, ctx, member: discord.Member, *, reason=None):
+    async def warn(self, ctx, member: CachedMember, *, reason=None):
         """Warn a member in the server"""
         if member.top_role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
             embed = discord.Embed(
@@ -222,25 +295,9 @@ class Moderation(commands.Cog):
         
         reason = reason or "No reason provided"
         
-        # Get the user's warning count from the bot's warning system
-        # For simplicity, we'll create a basic warning system here
-        if not hasattr(self.bot, 'warnings'):
-            self.bot.warnings = {}
-            
-        if ctx.guild.id not in self.bot.warnings:
-            self.bot.warnings[ctx.guild.id] = {}
-            
-        if member.id not in self.bot.warnings[ctx.guild.id]:
-            self.bot.warnings[ctx.guild.id][member.id] = []
-            
-        # Add the warning
-        warning_count = len(self.bot.warnings[ctx.guild.id][member.id]) + 1
-        warning_data = {
-            'reason': reason,
-            'mod': ctx.author.id,
-            'time': datetime.datetime.now().isoformat()
-        }
-        self.bot.warnings[ctx.guild.id][member.id].append(warning_data)
+        # Add the warning to the state backend (shared between bot processes)
+        warning = state.WarningRecord(reason, ctx.author.id, self.clock.wall())
+        warning_count = await self.state.add_warning(ctx.guild.id, member.id, warning)
         
         embed = discord.Embed(
             title="Member Warned",
@@ -250,30 +307,25 @@ class Moderation(commands.Cog):
         embed.add_field(name="Reason", value=reason)
         embed.add_field(name="Warning Count", value=warning_count)
         embed.set_footer(text=f"Warned by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
         
-        # Send a DM to the warned user
-        try:
-            user_embed = discord.Embed(
-                title=f"Warning in {ctx.guild.name}",
-                description=f"You have been warned.",
-                color=config.COLORS["warning"]
-            )
-            user_embed.add_field(name="Reason", value=reason)
-            user_embed.add_field(name="Warning Count", value=warning_count)
-            user_embed.set_footer(text=f"Warned by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            user_embed.timestamp = datetime.datetime.now()
-            
-            await member.send(embed=user_embed)
-        except:
-            # User has DMs disabled
-            pass
+        # DM the warned user (in the background; skipped if their DMs are closed)
+        user_embed = discord.Embed(
+            title=f"Warning in {ctx.guild.name}",
+            description=f"You have been warned.",
+            color=config.COLORS["warning"]
+        )
+        user_embed.add_field(name="Reason", value=reason)
+        user_embed.add_field(name="Warning Count", value=warning_count)
+        user_embed.set_footer(text=f"Warned by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        user_embed.timestamp = discord.utils.utcnow()
+        self.notifier.notify(member, user_embed, ctx.guild.id)
         
         # Log the warning
         await self.log_mod_action(ctx.guild, "Warning", member, ctx.author, reason)
-        logger.info(f"{member} was warned by {ctx.author}. Reason: {reason}")
+        logger.info("%s was warned by %s. Reason: %s", member, ctx.author, reason)
         
         # Check if action needs to be taken based on warning count
         if warning_count >= config.MAX_WARN_COUNT:
@@ -287,18 +339,9 @@ class Moderation(commands.Cog):
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def warnings(self, ctx, member: discord.Member):
+    async def warnings(self, ctx, member: CachedMember):
         """View warnings for a member"""
-        if not hasattr(self.bot, 'warnings'):
-            self.bot.warnings = {}
-            
-        if ctx.guild.id not in self.bot.warnings:
-            self.bot.warnings[ctx.guild.id] = {}
-            
-        if member.id not in self.bot.warnings[ctx.guild.id]:
-            self.bot.warnings[ctx.guild.id][member.id] = []
-            
-        warnings = self.bot.warnings[ctx.guild.id][member.id]
+        warnings = await self.state.get_warnings(ctx.guild.id, member.id)
         
         if not warnings:
             embed = discord.Embed(
@@ -308,41 +351,42 @@ class Moderation(commands.Cog):
             )
             return await ctx.send(embed=embed)
         
-        embed = discord.Embed(
-            title=f"Warnings for {member}",
-            description=f"This member has {len(warnings)} warning(s).",
-            color=config.COLORS["info"]
-        )
+        # Moderators are resolved from cache once, and only for pages that are viewed
+        cache = self.bot.get_cog("MemberCache")
+        mods = {}
         
-        for i, warning in enumerate(warnings, 1):
-            mod = ctx.guild.get_member(warning['mod']) or "Unknown Moderator"
-            time = datetime.datetime.fromisoformat(warning['time']).strftime("%Y-%m-%d %H:%M:%S")
-            embed.add_field(
-                name=f"Warning {i}",
-                value=f"**Reason:** {warning['reason']}\n**Moderator:** {mod}\n**Time:** {time}",
-                inline=False
+        def build_page(page_warnings, page, page_count):
+            embed = discord.Embed(
+                title=f"Warnings for {member}",
+                description=f"This member has {len(warnings)} warning(s).",
+                color=config.COLORS["info"]
             )
+            
+            first = page * config.WARNINGS_PER_PAGE + 1
+            for i, warning in enumerate(page_warnings, first):
+                if warning.mod not in mods:
+                    mods[warning.mod] = (cache.lookup_cached(ctx.guild, warning.mod) if cache else ctx.guild.get_member(warning.mod)) or "Unknown Moderator"
+                mod = mods[warning.mod]
+                time = datetime.datetime.fromtimestamp(warning.time).strftime("%Y-%m-%d %H:%M:%S")
+                embed.add_field(
+                    name=f"Warning {i}",
+                    value=f"**Reason:** {warning.reason[:900]}\n**Moderator:** {mod}\n**Time:** {time}",
+                    inline=False
+                )
+            
+            embed.set_footer(text=f"Page {page + 1}/{page_count} • Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+            embed.timestamp = discord.utils.utcnow()
+            return embed
         
-        embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
-        
-        await ctx.send(embed=embed)
+        view = Paginator.from_sequence(ctx.author, warnings, config.WARNINGS_PER_PAGE, build_page)
+        await view.start(ctx)
     
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def clearwarn(self, ctx, member: discord.Member, index: int = None):
+    async def clearwarn(self, ctx, member: CachedMember, index: int = None):
         """Clear warnings for a member (specific warning or all)"""
-        if not hasattr(self.bot, 'warnings'):
-            self.bot.warnings = {}
-            
-        if ctx.guild.id not in self.bot.warnings:
-            self.bot.warnings[ctx.guild.id] = {}
-            
-        if member.id not in self.bot.warnings[ctx.guild.id]:
-            self.bot.warnings[ctx.guild.id][member.id] = []
-            
-        warnings = self.bot.warnings[ctx.guild.id][member.id]
+        warnings = await self.state.get_warnings(ctx.guild.id, member.id)
         
         if not warnings:
             embed = discord.Embed(
@@ -354,7 +398,7 @@ class Moderation(commands.Cog):
         
         if index is None:
             # Clear all warnings
-            self.bot.warnings[ctx.guild.id][member.id] = []
+            await self.state.clear_warnings(ctx.guild.id, member.id)
             embed = discord.Embed(
                 title="Warnings Cleared",
                 description=f"All warnings for {member.mention} have been cleared.",
@@ -372,13 +416,20 @@ class Moderation(commands.Cog):
                     return await ctx.send(embed=embed)
                 
                 # Remove the specific warning
-                removed = self.bot.warnings[ctx.guild.id][member.id].pop(index)
+                removed = await self.state.remove_warning(ctx.guild.id, member.id, index)
+                if removed is None:
+                    embed = discord.Embed(
+                        title="Error",
+                        description="That warning no longer exists.",
+                        color=config.COLORS["error"]
+                    )
+                    return await ctx.send(embed=embed)
                 embed = discord.Embed(
                     title="Warning Removed",
                     description=f"Warning {index + 1} for {member.mention} has been removed.",
                     color=config.COLORS["success"]
                 )
-                embed.add_field(name="Removed Warning", value=removed['reason'])
+                embed.add_field(name="Removed Warning", value=removed.reason)
             except ValueError:
                 embed = discord.Embed(
                     title="Error",
@@ -388,19 +439,19 @@ class Moderation(commands.Cog):
                 return await ctx.send(embed=embed)
         
         embed.set_footer(text=f"Cleared by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
         
         # Log the action
         action = "Clear All Warnings" if index is None else f"Clear Warning #{index + 1}"
         await self.log_mod_action(ctx.guild, action, member, ctx.author)
-        logger.info(f"{action} for {member} by {ctx.author}")
+        logger.info("%s for %s by %s", action, member, ctx.author)
     
     @commands.command()
     @commands.has_permissions(manage_messages=True)
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def purge(self, ctx, amount: int, member: discord.Member = None):
+    async def purge(self, ctx, amount: int, member: CachedMember = None):
         """Purge messages from a channel"""
         if amount <= 0 or amount > 1000:
             embed = discord.Embed(
@@ -416,8 +467,9 @@ class Moderation(commands.Cog):
             return True
         
         try:
-            # Delete the command message first
-            await ctx.message.delete()
+            # Delete the command message first (slash commands have none)
+            if ctx.interaction is None:
+                await ctx.message.delete()
             
             # Then purge the specified amount of messages
             deleted = await ctx.channel.purge(limit=amount, check=check)
@@ -439,7 +491,7 @@ class Moderation(commands.Cog):
             # Log the purge
             target = member.mention if member else "everyone"
             await self.log_mod_action(ctx.guild, "Purge", target, ctx.author, f"{len(deleted)} messages")
-            logger.info(f"{ctx.author} purged {len(deleted)} messages in {ctx.channel.name} from {target}")
+            logger.info("%s purged %d messages in %s from %s", ctx.author, len(deleted), ctx.channel.name, target)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -464,11 +516,25 @@ class Moderation(commands.Cog):
         channel = channel or ctx.channel
         reason = reason or "No reason provided"
         
+        if channel.overwrites_for(ctx.guild.default_role).send_messages is False:
+            embed = discord.Embed(
+                title="Already Locked",
+                description=f"{channel.mention} is already locked.",
+                color=config.COLORS["info"]
+            )
+            await ctx.send(embed=embed)
+            return
+        
         try:
-            # Update permissions for the default role (@everyone)
-            overwrite = channel.overwrites_for(ctx.guild.default_role)
-            overwrite.send_messages = False
-            await channel.set_permissions(ctx.guild.default_role, overwrite=overwrite)
+            # Deny @everyone send_messages, remembering what it was for unlock
+            if not await self.lockdowns.lock(ctx.guild, [channel], reason=f"{ctx.author}: {reason}"):
+                embed = discord.Embed(
+                    title="Error",
+                    description="I don't have permission to modify channel permissions.",
+                    color=config.COLORS["error"]
+                )
+                await ctx.send(embed=embed)
+                return
             
             embed = discord.Embed(
                 title="Channel Locked",
@@ -477,13 +543,13 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.set_footer(text=f"Locked by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the lockdown
             await self.log_mod_action(ctx.guild, "Lockdown", channel.name, ctx.author, reason)
-            logger.info(f"{ctx.author} locked down {channel.name}. Reason: {reason}")
+            logger.info("%s locked down %s. Reason: %s", ctx.author, channel.name, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -508,11 +574,27 @@ class Moderation(commands.Cog):
         channel = channel or ctx.channel
         reason = reason or "No reason provided"
         
+        denied = channel.overwrites_for(ctx.guild.default_role).send_messages is False
+        if not denied and not self.lockdowns.is_locked(ctx.guild.id, channel.id):
+            embed = discord.Embed(
+                title="Not Locked",
+                description=f"{channel.mention} is not locked.",
+                color=config.COLORS["info"]
+            )
+            await ctx.send(embed=embed)
+            return
+        
         try:
-            # Update permissions for the default role (@everyone)
-            overwrite = channel.overwrites_for(ctx.guild.default_role)
-            overwrite.send_messages = None  # Reset to default
-            await channel.set_permissions(ctx.guild.default_role, overwrite=overwrite)
+            # Restore what @everyone had before the lockdown
+            changed = await self.lockdowns.unlock(ctx.guild, [channel], reason=f"{ctx.author}: {reason}", force=True)
+            if denied and not changed:
+                embed = discord.Embed(
+                    title="Error",
+                    description="I don't have permission to modify channel permissions.",
+                    color=config.COLORS["error"]
+                )
+                await ctx.send(embed=embed)
+                return
             
             embed = discord.Embed(
                 title="Channel Unlocked",
@@ -521,13 +603,13 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason)
             embed.set_footer(text=f"Unlocked by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
             await ctx.send(embed=embed)
             
             # Log the unlock
             await self.log_mod_action(ctx.guild, "Unlock", channel.name, ctx.author, reason)
-            logger.info(f"{ctx.author} unlocked {channel.name}. Reason: {reason}")
+            logger.info("%s unlocked %s. Reason: %s", ctx.author, channel.name, reason)
             
         except discord.Forbidden:
             embed = discord.Embed(
@@ -544,8 +626,282 @@ class Moderation(commands.Cog):
             )
             await ctx.send(embed=embed)
     
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def unlockall(self, ctx, *, reason=None):
+        """Unlock every channel the bot locked, restoring their previous permissions"""
+        reason = reason or "No reason provided"
+        
+        try:
+            changed = await self.lockdowns.unlock(ctx.guild, reason=f"{ctx.author}: {reason}")
+            remaining = len(self.lockdowns.locked.get(ctx.guild.id, ()))
+            
+            embed = discord.Embed(
+                title="Channels Unlocked",
+                description=f"Unlocked {len(changed)} channel(s).",
+                color=config.COLORS["success"]
+            )
+            if remaining:
+                embed.add_field(name="Failed", value=f"{remaining} channel(s) could not be unlocked.", inline=False)
+            embed.add_field(name="Reason", value=reason)
+            embed.set_footer(text=f"Unlocked by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+            embed.timestamp = discord.utils.utcnow()
+            
+            await ctx.send(embed=embed)
+            
+            # Log the unlock
+            if changed:
+                await self.log_mod_action(ctx.guild, "Unlock", f"{len(changed)} Channels", ctx.author, reason)
+            logger.info("%s unlocked %d channels in %s. Reason: %s", ctx.author, len(changed), ctx.guild.name, reason)
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="Error",
+                description=f"An error occurred: {str(e)}",
+                color=config.COLORS["error"]
+            )
+            await ctx.send(embed=embed)
+    
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def endraid(self, ctx, *, reason=None):
+        """End raid verification mode and release quarantined members"""
+        reason = reason or "No reason provided"
+        
+        try:
+            released = await self.quarantine.release(ctx.guild)
+            
+            embed = discord.Embed(
+                title="Raid Mode Ended",
+                description=f"Releasing {released} quarantined member(s).",
+                color=config.COLORS["success"]
+            )
+            embed.add_field(name="Reason", value=reason)
+            embed.set_footer(text=f"Ended by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+            embed.timestamp = discord.utils.utcnow()
+            
+            await ctx.send(embed=embed)
+            
+            # Log the release
+            await self.log_mod_action(ctx.guild, "Raid Release", f"{released} Members", ctx.author, reason)
+            logger.info("%s ended raid mode in %s, releasing %d members", ctx.author, ctx.guild.name, released)
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="Error",
+                description=f"An error occurred: {str(e)}",
+                color=config.COLORS["error"]
+            )
+            await ctx.send(embed=embed)
+    
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def shadow(self, ctx):
+        """Compare shadow auto-mod rule sets with the live rules"""
+        if not self.shadow_rules:
+            embed = discord.Embed(
+                title="Shadow Rules",
+                description="No shadow rule sets are configured. Add some to `SHADOW_RULESETS` in `config.py`.",
+                color=config.COLORS["info"]
+            )
+            return await ctx.send(embed=embed)
+        
+        stats = self.shadow_rules.guild_stats(ctx.guild.id)
+        seen = stats.messages + stats.skipped
+        per_message = stats.cpu / stats.messages * 1e6 if stats.messages else 0
+        uptime = max(time.monotonic() - self.shadow_rules.started, 1)
+        
+        embed = discord.Embed(
+            title="Shadow Rules",
+            description=(
+                f"Evaluated {stats.messages} of {seen} messages "
+                f"({stats.skipped} skipped over the CPU budget).\n"
+                f"Overhead: {per_message:.1f} µs per message, {stats.cpu / uptime:.3%} of one CPU."
+            ),
+            color=config.COLORS["info"]
+        )
+        
+        def rate(n):
+            return f"{n / stats.messages:.2%}" if stats.messages else "0%"
+        
+        for candidate, counts in zip(self.shadow_rules.candidates, stats.counts):
+            lines = []
+            for rule, (live, hits, both) in zip(shadow.RULES, counts):
+                lines.append(
+                    f"**{rule}**: live {live} ({rate(live)}), shadow {hits} ({rate(hits)}), "
+                    f"{hits - both} new (possible false positives), {live - both} missed"
+                )
+            embed.add_field(name=candidate.name, value="\n".join(lines), inline=False)
+        
+        embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        await ctx.send(embed=embed)
+    
+    @shadow.command(name="reset")
+    @commands.has_permissions(administrator=True)
+    async def shadow_reset(self, ctx):
+        """Reset shadow rule statistics for this server"""
+        if self.shadow_rules:
+            self.shadow_rules.reset(ctx.guild.id)
+        embed = discord.Embed(
+            title="Shadow Rules",
+            description="Shadow rule statistics have been reset.",
+            color=config.COLORS["success"]
+        )
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="usage")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def usage_report(self, ctx):
+        """Show how much of the bot's message handling and API budget this server uses"""
+        usage = self.usage.get(ctx.guild.id)
+        total_time, total_calls = self.usage.totals()
+        
+        embed = discord.Embed(
+            title="Resource Usage",
+            description="Since the bot started",
+            color=config.COLORS["info"]
+        )
+        embed.add_field(name="Messages Checked", value=str(usage.messages))
+        embed.add_field(
+            name="Handling Time",
+            value=f"{usage.handler_time:.2f}s ({usage.handler_time / total_time:.0%} of all servers)" if total_time else "0.00s"
+        )
+        embed.add_field(name="Skipped Optional Filters", value=str(usage.degraded))
+        embed.add_field(
+            name="API Calls",
+            value=f"{usage.calls} ({usage.calls / total_calls:.0%} of all servers)" if total_calls else "0"
+        )
+        embed.add_field(name="Dropped Calls", value=str(usage.dropped))
+        embed.add_field(name="Queued Calls", value=str(self.outbound.queued(ctx.guild.id)))
+        embed.timestamp = discord.utils.utcnow()
+        await ctx.send(embed=embed)
+    
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_messages=True)
+    async def modlog(self, ctx):
+        """Search the moderation audit log"""
+        embed = discord.Embed(
+            title="Moderation Log",
+            description=(
+                f"Usage: `{config.PREFIX}modlog search [user:@user] [mod:@user] "
+                f"[action:\"name\"] [days:n] [before:id]`"
+            ),
+            color=config.COLORS["info"]
+        )
+        await ctx.send(embed=embed)
+    
+    @modlog.command(name="search")
+    @commands.has_permissions(manage_messages=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def modlog_search(self, ctx, *, filters=""):
+        """Search moderation actions by user, moderator, action and age"""
+        try:
+            query = self.parse_modlog_filters(filters)
+        except ValueError as e:
+            embed = discord.Embed(
+                title="Error",
+                description=str(e),
+                color=config.COLORS["error"]
+            )
+            return await ctx.send(embed=embed)
+        
+        # Keyset pagination: each page starts below the last entry of the one before,
+        # so only the ids where pages start are kept while the view is open
+        cursors = [query.pop("before_id", None)]
+        
+        async def render_page(page):
+            entries = await self.audit_log.search(
+                ctx.guild.id, before_id=cursors[page], limit=config.AUDIT_PAGE_SIZE + 1, **query
+            )
+            has_next = len(entries) > config.AUDIT_PAGE_SIZE
+            entries = entries[:config.AUDIT_PAGE_SIZE]
+            if has_next and len(cursors) == page + 1:
+                cursors.append(entries[-1]['id'])
+            
+            if not entries:
+                embed = discord.Embed(
+                    title="Moderation Log",
+                    description="No matching actions found.",
+                    color=config.COLORS["info"]
+                )
+                return embed, False
+            
+            embed = discord.Embed(
+                title="Moderation Log",
+                description=f"Showing {len(entries)} action(s), newest first.",
+                color=config.COLORS["info"]
+            )
+            for entry in entries:
+                name, value = self.format_audit_entry(entry)
+                embed.add_field(name=name, value=value, inline=False)
+            
+            embed.set_footer(text=f"Page {page + 1} • Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+            return embed, has_next
+        
+        await Paginator(ctx.author, render_page).start(ctx)
+    
+    def parse_modlog_filters(self, filters):
+        """Turn `key:value` search tokens into audit log query arguments"""
+        try:
+            tokens = shlex.split(filters)
+        except ValueError:
+            raise ValueError("Could not parse filters. Check your quotes.")
+        
+        query = {}
+        for token in tokens:
+            key, _, value = token.partition(":")
+            key = key.lower()
+            if not value:
+                raise ValueError(f"Invalid filter `{token}`. Use `key:value`.")
+            
+            if key in ("user", "target", "mod", "moderator"):
+                match = re.search(r"\d{15,20}", value)
+                if not match:
+                    raise ValueError(f"Invalid user for `{key}`.")
+                query["target_id" if key in ("user", "target") else "moderator_id"] = int(match.group())
+            elif key == "action":
+                query["action"] = value
+            elif key == "days":
+                if not value.isdigit():
+                    raise ValueError("`days` must be a whole number.")
+                query["since"] = self.clock.wall() - int(value) * 86400
+            elif key == "before":
+                if not value.isdigit():
+                    raise ValueError("`before` must be an entry number.")
+                query["before_id"] = int(value)
+            else:
+                raise ValueError(f"Unknown filter `{key}`.")
+        return query
+    
+    @staticmethod
+    def format_audit_entry(entry):
+        """Build an embed field name and value for an audit log entry"""
+        name = f"#{entry['id']} {entry['action']}"
+        lines = [f"**Target:** {entry['target'] or 'Unknown'}"]
+        if entry["target_id"]:
+            lines[0] += f" ({entry['target_id']})"
+        if entry["moderator_id"]:
+            lines.append(f"**Moderator:** <@{entry['moderator_id']}>")
+        if entry["reason"]:
+            lines.append(f"**Reason:** {entry['reason'][:200]}")
+        if entry["duration"]:
+            lines.append(f"**Duration:** {entry['duration']} seconds")
+        lines.append(f"**Time:** <t:{int(entry['created_at'])}:f>")
+        return name, "\n".join(lines)
+    
     async def log_mod_action(self, guild, action, target, moderator, reason=None, duration=None):
-        """Log moderation actions to the specified channel"""
+        """Log moderation actions to the audit log and the specified channel"""
+        self.action_counts[action] += 1
+        
+        # Record the action in the audit log
+        target_id = target.id if isinstance(target, (discord.Member, discord.User)) else None
+        self.audit_log.record(guild.id, action, target_id, str(target), moderator.id, reason, duration)
+        
         if config.MOD_LOG_CHANNEL is None:
             return
         
@@ -572,160 +928,413 @@ class Moderation(commands.Cog):
         if duration:
             embed.add_field(name="Duration", value=f"{duration} seconds", inline=False)
         
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
+        self.outbound.submit(("send", log_channel.id), lambda: log_channel.send(embed=embed), guild=guild.id)
 
     # Event listeners for auto-moderation
     @commands.Cog.listener()
     async def on_message(self, message):
         """Auto-moderation for messages"""
-        if message.author.bot or not message.guild:
+        if message.author.bot or not message.guild or not self.accepting:
             return
         
-        # Skip messages from moderators/admins
-        if message.author.guild_permissions.manage_messages:
+        # Charge the CPU time the filters take to the guild, so a noisy one can be held
+        # to its budget. They never wait on the API: enforcement is queued and its
+        # follow-up runs in the background, so rate limits aren't counted against it.
+        started = time.thread_time()
+        try:
+            self.moderate_message(message)
+        finally:
+            self.usage.charge(message.guild.id, time.thread_time() - started)
+    
+    def moderate_message(self, message):
+        """Run the auto-mod filters on a message"""
+        # Resolve the channel's policy; None skips moderators/admins, bypass roles and exempt channels
+        policies = self.bot.get_cog("AutomodPolicies")
+        if policies:
+            channel_policy = policies.resolve(message)
+            if channel_policy is None:
+                return
+        elif message.author.guild_permissions.manage_messages:
             return
+        else:
+            channel_policy = policy.DEFAULT_POLICY
+        
+        # Parse the message once for all filters
+        parsed = automod.ParsedMessage(message, now=self.clock.monotonic(), policy=channel_policy)
+        
+        # A guild over its handling budget only gets the core filters until its window ends
+        degraded = self.usage.over_budget(message.guild.id)
+        if degraded:
+            self.usage.get(message.guild.id).degraded += 1
+        
+        # Candidate rule sets see the same message but never act
+        if self.shadow_rules and not degraded:
+            self.shadow_rules.observe(parsed, self.bad_word_matcher(message.guild.id))
         
-        # Anti-spam check
-        if config.ENABLE_ANTI_SPAM:
-            await self.check_spam(message)
+        # Anti-spam check (always counts the message)
+        if config.ENABLE_ANTI_SPAM and channel_policy.spam:
+            self.check_spam(parsed)
+        
+        # The remaining filters stop at the first one that removes the message
+        
+        # Mention flood filter
+        if config.ENABLE_MENTION_FILTER and channel_policy.mentions and (parsed.mention_count or parsed.mentions_everyone):
+            if self.check_mentions(parsed):
+                return
         
         # Bad words filter
-        if config.ENABLE_BAD_WORDS_FILTER:
-            await self.check_bad_words(message)
+        if config.ENABLE_BAD_WORDS_FILTER and channel_policy.badwords:
+            if self.check_bad_words(parsed):
+                return
+        
+        # Malicious link and attachment filter
+        if config.ENABLE_LINK_FILTER and channel_policy.links and not degraded and (message.attachments or parsed.may_have_links):
+            self.check_links(parsed)
     
     @commands.Cog.listener()
     async def on_member_join(self, member):
-        """Raid protection for member joins"""
+        """Score new joins and run raid protection"""
+        if not self.accepting:
+            return
+        score = self.join_scorer.score(member) if config.ENABLE_JOIN_SCORING else None
         if config.ENABLE_ANTI_RAID:
-            await self.check_raid(member)
+            await self.check_raid(member, score)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.usage.forget(guild.id)
+        self.join_scorer.forget(guild.id)
+        self.recent_joins.pop(guild.id, None)
     
-    async def check_spam(self, message):
+    def after_enforced(self, call, follow_up):
+        """Run `follow_up()` in the background once the queued enforcement `call` succeeds
+        
+        With no `call` it runs right away. Either way the filter that queued
+        the action returns at once instead of waiting out rate limits.
+        """
+        async def wait():
+            if call is not None:
+                await asyncio.wait([call])
+                if call.cancelled() or call.exception() is not None:
+                    return  # Shed or failed; the outbound queue has logged why
+            await follow_up()
+        
+        task = asyncio.create_task(wait())
+        self.follow_ups.add(task)
+        task.add_done_callback(self.follow_ups.discard)
+    
+    def check_spam(self, parsed):
         """Check if a message is part of spam"""
-        author_id = message.author.id
-        channel_id = message.channel.id
-        current_time = datetime.datetime.now().timestamp()
+        message = parsed.message
         
         # Create a key for this author in this channel
-        key = f"{author_id}-{channel_id}"
-        
-        if key not in self.spam_check:
-            self.spam_check[key] = []
-        
-        # Add the current message timestamp
-        self.spam_check[key].append(current_time)
+        key = (parsed.author_id, parsed.channel_id)
         
-        # Clear old messages (older than the spam interval)
-        self.spam_check[key] = [t for t in self.spam_check[key] if current_time - t <= config.SPAM_INTERVAL]
+        # Record the message and count those within the spam interval
+        count = self.state.hit("spam", key, parsed.created, config.SPAM_INTERVAL)
         
-        # Check if the user has exceeded the spam threshold
-        if len(self.spam_check[key]) >= config.SPAM_THRESHOLD:
+        # Check if the user has exceeded the spam threshold, adapted to the channel's usual activity
+        threshold = parsed.policy.spam_threshold
+        if self.spam_baselines is not None:
+            threshold = self.spam_baselines.check(parsed.channel_id, count, parsed.created, threshold)
+        if count >= threshold:
             # Reset the spam counter for this user
-            self.spam_check[key] = []
+            self.state.reset("spam", key)
             
-            # Mute the user
-            try:
-                await message.author.timeout(
+            # Mute the user (one timeout per user per mute window, ahead of notifications)
+            author = message.author
+            call, is_new = self.outbound.submit(
+                ("timeout", message.guild.id),
+                lambda: author.timeout(
                     datetime.timedelta(seconds=config.SPAM_MUTE_DURATION),
                     reason="Auto-mute for spamming"
-                )
-                
+                ),
+                priority=outbound.ENFORCE,
+                key=("timeout", message.guild.id, author.id),
+                window=config.SPAM_MUTE_DURATION,
+                guild=message.guild.id
+            )
+            if not is_new:
+                return  # Already being muted, or muted within this window
+            
+            async def muted():
                 # Inform the channel
-                embed = discord.Embed(
-                    title="Anti-Spam",
-                    description=f"{message.author.mention} has been muted for spamming.",
-                    color=config.COLORS["warning"]
-                )
-                embed.add_field(
-                    name="Duration", 
-                    value=f"{config.SPAM_MUTE_DURATION} seconds"
-                )
-                embed.timestamp = datetime.datetime.now()
-                
-                await message.channel.send(embed=embed)
+                self.queue_alert(message.channel, author, "Anti-Spam", "muted for spamming", config.SPAM_MUTE_DURATION)
                 
                 # Log the action
                 await self.log_mod_action(
                     message.guild, 
                     "Auto-Mute (Spam)", 
-                    message.author, 
+                    author, 
                     self.bot.user, 
                     "Sending messages too quickly",
                     config.SPAM_MUTE_DURATION
                 )
-                logger.warning(f"Auto-muted {message.author} for spamming in {message.channel.name}")
-                
-            except:
-                pass
+                logger.warning("Auto-muted %s for spamming in %s", author, message.channel.name)
+            
+            self.after_enforced(call, muted)
     
-    async def check_bad_words(self, message):
+    def queue_alert(self, channel, member, title, action_text, duration=None):
+        """Announce an auto-mod action, merged with others of its kind in the channel over the alert window"""
+        key = (channel.id, title)
+        self.pending_alerts.setdefault(key, {})[member.id] = member.mention
+        
+        async def send_alert():
+            mentions = list(self.pending_alerts.pop(key, {}).values())
+            if not mentions:
+                return
+            
+            embed = discord.Embed(
+                title=title,
+                description=f"{', '.join(mentions)} {'has' if len(mentions) == 1 else 'have'} been {action_text}.",
+                color=config.COLORS["warning"]
+            )
+            if duration:
+                embed.add_field(
+                    name="Duration", 
+                    value=f"{duration} seconds"
+                )
+            embed.timestamp = discord.utils.utcnow()
+            
+            return await channel.send(embed=embed)
+        
+        self.outbound.submit(
+            ("send", channel.id),
+            send_alert,
+            key=("alert",) + key,
+            delay=config.OUTBOUND_ALERT_WINDOW,
+            guild=channel.guild.id
+        )
+    
+    def check_mentions(self, parsed):
+        """Check if a message, or a run of messages, pings too many users"""
+        weight = automod.mention_weight(parsed, config.MENTION_EVERYONE_WEIGHT)
+        
+        # Rolling mention total for this author in this guild
+        key = (parsed.guild_id, parsed.author_id)
+        total = self.mention_counter.add(key, weight, parsed.created)
+        
+        if weight >= parsed.policy.mention_limit:
+            reason = f"Mass mention ({weight} mentions in one message)"
+        elif total >= config.MENTION_RATE_LIMIT:
+            reason = f"Mention flood ({int(total)} mentions in {config.MENTION_INTERVAL} seconds)"
+        else:
+            return False
+        
+        self.mention_counter.reset(key)
+        message = parsed.message
+        author = parsed.author
+        
+        # Delete the message
+        self.outbound.submit(
+            ("delete", message.channel.id),
+            message.delete,
+            priority=outbound.ENFORCE,
+            key=("delete", message.id),
+            guild=message.guild.id
+        )
+        
+        # Take the configured action
+        action = config.MENTION_ACTION
+        if action == "mute":
+            call, is_new = self.outbound.submit(
+                ("timeout", message.guild.id),
+                lambda: author.timeout(
+                    datetime.timedelta(seconds=config.MENTION_MUTE_DURATION),
+                    reason=f"Auto-mute: {reason}"
+                ),
+                priority=outbound.ENFORCE,
+                key=("timeout", message.guild.id, author.id),
+                window=config.MENTION_MUTE_DURATION,
+                guild=message.guild.id
+            )
+            label, action_text, duration = "Auto-Mute (Mention Spam)", "muted for mass mentions", config.MENTION_MUTE_DURATION
+        elif action == "kick":
+            call, is_new = self.outbound.submit(
+                ("kick", message.guild.id),
+                lambda: author.kick(reason=f"Auto-kick: {reason}"),
+                priority=outbound.ENFORCE,
+                key=("kick", message.guild.id, author.id),
+                guild=message.guild.id
+            )
+            label, action_text, duration = "Auto-Kick (Mention Spam)", "kicked for mass mentions", None
+        elif action == "ban":
+            call, is_new = self.outbound.submit(
+                ("ban", message.guild.id),
+                lambda: message.guild.ban(author, reason=f"Auto-ban: {reason}", delete_message_days=0),
+                priority=outbound.ENFORCE,
+                key=("ban", message.guild.id, author.id),
+                guild=message.guild.id
+            )
+            label, action_text, duration = "Auto-Ban (Mention Spam)", "banned for mass mentions", None
+        else:
+            call, is_new = None, True
+            label, action_text, duration = "Auto-Delete (Mention Spam)", "warned for mass mentions", None
+        
+        if not is_new:
+            return True  # This author is already being dealt with
+        
+        async def acted():
+            # Inform the channel
+            self.queue_alert(message.channel, author, "Anti-Mention Spam", action_text, duration)
+            
+            # Log the action
+            await self.log_mod_action(message.guild, label, author, self.bot.user, reason, duration)
+            logger.warning("%s: %s in %s", label, author, message.channel.name)
+        
+        self.after_enforced(call, acted)
+        return True
+    
+    def bad_word_matcher(self, guild_id):
+        """The guild's blocklist.Matcher, shared with shadow rule evaluation"""
+        blocklists = self.bot.get_cog("Blocklists")
+        return blocklists.matcher(guild_id) if blocklists else blocklist.default_matcher()
+    
+    def check_bad_words(self, parsed):
         """Check if a message contains bad words"""
-        content = message.content.lower()
+        message = parsed.message
+        
+        # One compiled pass over the content for the guild's whole list
+        word = self.bad_word_matcher(message.guild.id).search(parsed.content_lower)
+        if word is not None:
+            # Delete the message
+            call, is_new = self.outbound.submit(
+                ("delete", message.channel.id),
+                message.delete,
+                priority=outbound.ENFORCE,
+                key=("delete", message.id),
+                guild=message.guild.id
+            )
+            if not is_new:
+                return True  # Already being deleted, or refused while the queue is full
+            
+            async def deleted():
+                # Warn the user
+                embed = discord.Embed(
+                    title="Message Deleted",
+                    description="Your message was deleted for containing prohibited words.",
+                    color=config.COLORS["warning"]
+                )
+                author = message.author
+                self.notifier.notify(author, embed, message.guild.id)
+                
+                # Log the action
+                await self.log_mod_action(
+                    message.guild,
+                    "Auto-Delete (Bad Word)",
+                    author,
+                    self.bot.user,
+                    f"Message contained prohibited word: {word}"
+                )
+                logger.warning("Deleted message from %s for containing bad word: %s", author, word)
+            
+            self.after_enforced(call, deleted)
+            return True
         
-        for word in config.BAD_WORDS:
-            if word.lower() in content:
-                try:
-                    # Delete the message
-                    await message.delete()
-                    
-                    # Warn the user
-                    embed = discord.Embed(
-                        title="Message Deleted",
-                        description="Your message was deleted for containing prohibited words.",
-                        color=config.COLORS["warning"]
-                    )
-                    
-                    await message.author.send(embed=embed)
-                    
-                    # Log the action
-                    await self.log_mod_action(
-                        message.guild,
-                        "Auto-Delete (Bad Word)",
-                        message.author,
-                        self.bot.user,
-                        f"Message contained prohibited word: {word}"
-                    )
-                    logger.warning(f"Deleted message from {message.author} for containing bad word: {word}")
-                    
-                    return  # Stop checking other words
-                except:
-                    pass
+        return False
+    
+    def check_links(self, parsed):
+        """Check if a message links a blocked domain or carries a known-bad attachment"""
+        message = parsed.message
+        domain = self.link_scanner.check_content(parsed.content) if parsed.may_have_links else None
+        if domain:
+            self.remove_malicious(message, f"Message linked a blocked domain: {domain}")
+        elif message.attachments:
+            # Hashing may need a download, so it runs outside message handling
+            self.after_enforced(None, lambda: self.check_attachments(message))
+    
+    async def check_attachments(self, message):
+        """Hash the message's risky attachments and remove it if one is known-bad"""
+        for attachment in message.attachments:
+            try:
+                if await self.link_scanner.check_attachment(attachment):
+                    self.remove_malicious(message, f"Message contained a known malicious file: {attachment.filename}")
+                    return
+            except discord.HTTPException:
+                continue
     
-    async def check_raid(self, member):
-        """Check if a new join is part of a raid"""
-        current_time = datetime.datetime.now().timestamp()
+    def remove_malicious(self, message, reason):
+        """Delete a message the link filter caught, then warn the author and log it"""
+        # Delete the message
+        call, is_new = self.outbound.submit(
+            ("delete", message.channel.id),
+            message.delete,
+            priority=outbound.ENFORCE,
+            key=("delete", message.id),
+            guild=message.guild.id
+        )
+        if not is_new:
+            return  # Already being deleted, or refused while the queue is full
+        
+        async def deleted():
+            # Warn the user
+            embed = discord.Embed(
+                title="Message Deleted",
+                description="Your message was deleted because it contained a malicious link or file.",
+                color=config.COLORS["warning"]
+            )
+            author = message.author
+            self.notifier.notify(author, embed, message.guild.id)
+            
+            # Log the action
+            await self.log_mod_action(message.guild, "Auto-Delete (Malicious Link)", author, self.bot.user, reason)
+            logger.warning("Deleted message from %s: %s", author, reason)
         
-        # Add the current join timestamp
-        self.raid_check.append(current_time)
+        self.after_enforced(call, deleted)
+    
+    async def check_raid(self, member, score=None):
+        """Check if a new join is part of a raid
+
+        `score` is the join's joinscore.JoinScore. Flagged joins are also
+        counted on their own, so a few suspicious accounts in a row trip
+        the detector before plain join volume would.
+        """
+        current_time = self.clock.monotonic()
+        
+        # Verification mode is already on: every new joiner is quarantined
+        if config.RAID_ACTION == "verification" and self.quarantine.active(member.guild.id, current_time):
+            await self.quarantine.start(member.guild, [member], current_time)
+            return
         
-        # Clear old joins (older than the raid interval)
-        self.raid_check = [t for t in self.raid_check if current_time - t <= config.RAID_JOIN_INTERVAL]
+        # Record the join and count those within the raid interval for this guild
+        count = self.state.hit("raid", member.guild.id, current_time, config.RAID_JOIN_INTERVAL)
+        reason = f"Raid detected - {config.RAID_JOIN_THRESHOLD} joins in {config.RAID_JOIN_INTERVAL} seconds"
+        
+        suspicious = score is not None and score.total >= config.JOIN_SUSPICIOUS_SCORE
+        if suspicious:
+            flagged = self.state.hit("raid_suspicious", member.guild.id, current_time, config.RAID_JOIN_INTERVAL)
+            if flagged >= config.JOIN_SUSPICIOUS_RAID_THRESHOLD and count < config.RAID_JOIN_THRESHOLD:
+                count = config.RAID_JOIN_THRESHOLD
+                reason = (f"Raid detected - {config.JOIN_SUSPICIOUS_RAID_THRESHOLD} suspicious joins "
+                          f"in {config.RAID_JOIN_INTERVAL} seconds")
+        
+        # Remember the latest joiners so the ones that tripped the detector can be quarantined too
+        recent = self.recent_joins.get(member.guild.id)
+        if recent is None:
+            recent = self.recent_joins[member.guild.id] = collections.deque(
+                maxlen=max(config.RAID_JOIN_THRESHOLD, config.JOIN_SUSPICIOUS_RAID_THRESHOLD)
+            )
+        recent.append((current_time, member))
         
         # Check if the joins have exceeded the raid threshold
-        if len(self.raid_check) >= config.RAID_JOIN_THRESHOLD:
-            # Reset the raid counter
-            self.raid_check = []
-            
-            if config.RAID_ACTION == "lockdown":
-                # Lockdown all text channels
-                for channel in member.guild.text_channels:
-                    try:
-                        overwrite = channel.overwrites_for(member.guild.default_role)
-                        overwrite.send_messages = False
-                        await channel.set_permissions(member.guild.default_role, overwrite=overwrite)
-                    except:
-                        pass
+        if count >= config.RAID_JOIN_THRESHOLD:
+            # Reset the raid counters
+            self.state.reset("raid", member.guild.id)
+            self.state.reset("raid_suspicious", member.guild.id)
+            
+            if config.RAID_ACTION == "verification":
+                cutoff = current_time - config.RAID_JOIN_INTERVAL
+                joiners = [m for joined, m in self.recent_joins.pop(member.guild.id) if joined >= cutoff]
+                await self.start_verification(member.guild, joiners, current_time, reason)
+            elif config.RAID_ACTION == "lockdown":
+                # Lockdown all text channels; ones already read-only are skipped
+                locked = await self.lockdowns.lock(member.guild, member.guild.text_channels, reason="Raid detected")
+                if not locked and self.lockdowns.locked.get(member.guild.id):
+                    return  # Still locked down from an earlier raid
                 
-                # Find a channel to send the alert
-                alert_channel = None
-                for channel in member.guild.text_channels:
-                    if channel.permissions_for(member.guild.me).send_messages:
-                        alert_channel = channel
-                        break
+                alert_channel = self.alert_channel(member.guild)
                 
                 if alert_channel:
                     embed = discord.Embed(
@@ -735,9 +1344,9 @@ class Moderation(commands.Cog):
                     )
                     embed.add_field(
                         name="Action Required",
-                        value="Server administrators need to run the `!unlock` command when it's safe."
+                        value="Server administrators need to run the `!unlockall` command when it's safe."
                     )
-                    embed.timestamp = datetime.datetime.now()
+                    embed.timestamp = discord.utils.utcnow()
                     
                     await alert_channel.send("@here", embed=embed)
                 
@@ -747,10 +1356,86 @@ class Moderation(commands.Cog):
                     "Auto-Lockdown (Raid)",
                     "All Channels",
                     self.bot.user,
-                    f"Raid detected - {config.RAID_JOIN_THRESHOLD} joins in {config.RAID_JOIN_INTERVAL} seconds"
+                    reason
                 )
-                logger.warning(f"Raid protection activated in {member.guild.name} - server locked down")
-
+                logger.warning("Raid protection activated in %s - server locked down (%d channels changed)",
+                               member.guild.name, len(locked))
+        elif suspicious:
+            await self.flag_join(member, score, current_time)
+    
+    async def flag_join(self, member, score, now):
+        """Log a suspicious join, quarantining it in verification mode if it scores high enough"""
+        action = "Suspicious Join"
+        if config.RAID_ACTION == "verification" and score.total >= config.JOIN_QUARANTINE_SCORE:
+            try:
+                role = await self.quarantine.get_role(member.guild)
+            except discord.Forbidden:
+                logger.error("Missing permissions to set up the quarantine role in %s", member.guild.name)
+            else:
+                self.quarantine.add(member, role)
+                action = "Auto-Quarantine (Suspicious Join)"
+        
+        await self.log_mod_action(
+            member.guild,
+            action,
+            member,
+            self.bot.user,
+            f"Join score {score.total:.2f} - {score.reasons()}"
+        )
+        logger.info("%s in %s: %s scored %.2f (%s)", action, member.guild.name, member, score.total, score.reasons())
+    
+    def alert_channel(self, guild):
+        """The channel raid alerts go to, cached by the AlertChannels cog"""
+        cache = self.bot.get_cog("AlertChannels")
+        if cache is None:
+            return alerts.find_alert_channel(guild)
+        return cache.get(guild)
+    
+    async def start_verification(self, guild, joiners, now, reason):
+        """Quarantine raid joiners and alert the server the first time raid mode turns on"""
+        try:
+            started = await self.quarantine.start(guild, joiners, now)
+        except discord.Forbidden:
+            logger.error("Missing permissions to set up the quarantine role in %s", guild.name)
+            return
+        if not started:
+            return
+        
+        alert_channel = self.alert_channel(guild)
+        
+        if alert_channel:
+            embed = discord.Embed(
+                title="Raid Protection Activated",
+                description=f"A raid has been detected. New members will be given the `{config.QUARANTINE_ROLE_NAME}` role.",
+                color=config.COLORS["error"]
+            )
+            embed.add_field(
+                name="Release",
+                value=f"Members are released {config.RAID_VERIFICATION_DURATION // 60} minutes after the last raid join, "
+                      "or when an administrator runs `!endraid`."
+            )
+            embed.timestamp = discord.utils.utcnow()
+            
+            await alert_channel.send("@here", embed=embed)
+        
+        # Log the action
+        await self.log_mod_action(
+            guild,
+            "Auto-Verification (Raid)",
+            "New Members",
+            self.bot.user,
+            reason
+        )
+        logger.warning("Raid protection activated in %s - quarantining new members", guild.name)
+    
+    async def log_verification_end(self, guild, released):
+        await self.log_mod_action(
+            guild,
+            "Raid Release",
+            f"{released} Members",
+            self.bot.user,
+            "Raid verification mode expired"
+        )
 
 class Information(commands.Cog):
     """Information commands for server and user details"""
@@ -760,55 +1445,62 @@ class Information(commands.Cog):
     
     @commands.command()
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def userinfo(self, ctx, member: discord.Member = None):
+    async def userinfo(self, ctx, member: CachedMember = None):
         """Show information about a user"""
         member = member or ctx.author
         
-        roles = [role.mention for role in member.roles if role.name != "@everyone"]
-        
-        embed = discord.Embed(
-            title=f"User Information: {member}",
-            color=config.COLORS["info"]
-        )
-        
-        embed.set_thumbnail(url=member.display_avatar.url)
-        
-        embed.add_field(name="ID", value=member.id)
-        embed.add_field(name="Nickname", value=member.nick or "None")
-        embed.add_field(name="Account Created", value=f"<t:{int(member.created_at.timestamp())}:R>")
-        embed.add_field(name="Joined Server", value=f"<t:{int(member.joined_at.timestamp())}:R>")
-        
-        if roles:
-            embed.add_field(name=f"Roles [{len(roles)}]", value=" ".join(roles), inline=False)
-        else:
-            embed.add_field(name=f"Roles [0]", value="None", inline=False)
-        
-        embed.add_field(name="Boosting Since", value=f"<t:{int(member.premium_since.timestamp())}:R>" if member.premium_since else "Not boosting")
+        # Role mentions are only built for the page being shown
+        roles = [role for role in member.roles if not role.is_default()]
+        roles.reverse()  # Highest role first
         
         # Get permission information
+        permissions = member.guild_permissions
         key_permissions = []
-        if member.guild_permissions.administrator:
+        if permissions.administrator:
             key_permissions.append("Administrator")
-        if member.guild_permissions.ban_members:
+        if permissions.ban_members:
             key_permissions.append("Ban Members")
-        if member.guild_permissions.kick_members:
+        if permissions.kick_members:
             key_permissions.append("Kick Members")
-        if member.guild_permissions.manage_channels:
+        if permissions.manage_channels:
             key_permissions.append("Manage Channels")
-        if member.guild_permissions.manage_guild:
+        if permissions.manage_guild:
             key_permissions.append("Manage Server")
-        if member.guild_permissions.manage_messages:
+        if permissions.manage_messages:
             key_permissions.append("Manage Messages")
-        if member.guild_permissions.manage_roles:
+        if permissions.manage_roles:
             key_permissions.append("Manage Roles")
         
-        if key_permissions:
-            embed.add_field(name="Key Permissions", value=", ".join(key_permissions), inline=False)
-        
-        embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        def build_page(page_roles, page, page_count):
+            embed = discord.Embed(
+                title=f"User Information: {member}",
+                color=config.COLORS["info"]
+            )
+            
+            embed.set_thumbnail(url=member.display_avatar.url)
+            
+            embed.add_field(name="ID", value=member.id)
+            embed.add_field(name="Nickname", value=member.nick or "None")
+            embed.add_field(name="Account Created", value=f"<t:{int(member.created_at.timestamp())}:R>")
+            embed.add_field(name="Joined Server", value=f"<t:{int(member.joined_at.timestamp())}:R>")
+            
+            if page_roles:
+                name = f"Roles [{len(roles)}]" if page_count == 1 else f"Roles [{len(roles)}] ({page + 1}/{page_count})"
+                embed.add_field(name=name, value=" ".join(role.mention for role in page_roles), inline=False)
+            else:
+                embed.add_field(name=f"Roles [0]", value="None", inline=False)
+            
+            embed.add_field(name="Boosting Since", value=f"<t:{int(member.premium_since.timestamp())}:R>" if member.premium_since else "Not boosting")
+            
+            if key_permissions:
+                embed.add_field(name="Key Permissions", value=", ".join(key_permissions), inline=False)
+            
+            embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+            embed.timestamp = discord.utils.utcnow()
+            return embed
         
-        await ctx.send(embed=embed)
+        view = Paginator.from_sequence(ctx.author, roles, config.ROLES_PER_PAGE, build_page)
+        await view.start(ctx)
     
     @commands.command()
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
@@ -854,7 +1546,7 @@ class Information(commands.Cog):
             embed.add_field(name="Features", value=features, inline=False)
         
         embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -862,11 +1554,11 @@ class Information(commands.Cog):
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
     async def ping(self, ctx):
         """Check the bot's latency"""
-        start_time = datetime.datetime.now()
+        start_time = time.perf_counter()
         message = await ctx.send("Pinging...")
-        end_time = datetime.datetime.now()
+        end_time = time.perf_counter()
         
-        latency = (end_time - start_time).total_seconds() * 1000
+        latency = (end_time - start_time) * 1000
         api_latency = self.bot.latency * 1000
         
         embed = discord.Embed(
@@ -878,13 +1570,13 @@ class Information(commands.Cog):
         embed.add_field(name="API Latency", value=f"{api_latency:.2f}ms")
         
         embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await message.edit(content=None, embed=embed)
     
     @commands.command()
     @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
-    async def avatar(self, ctx, member: discord.Member = None):
+    async def avatar(self, ctx, member: CachedMember = None):
         """Show a user's avatar"""
         member = member or ctx.author
         
@@ -895,7 +1587,7 @@ class Information(commands.Cog):
         
         embed.set_image(url=member.display_avatar.url)
         embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -912,7 +1604,7 @@ class Information(commands.Cog):
         embed.set_thumbnail(url=self.bot.user.display_avatar.url)
         
         # Calculate uptime
-        current_time = datetime.datetime.now()
+        current_time = discord.utils.utcnow()
         uptime = current_time - self.bot.start_time
         
         days, remainder = divmod(int(uptime.total_seconds()), 86400)
@@ -933,7 +1625,7 @@ class Information(commands.Cog):
         embed.add_field(name="Python", value=f"{discord.version_info.major}.{discord.version_info.minor}.{discord.version_info.micro}")
         
         embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -961,7 +1653,7 @@ class Information(commands.Cog):
                 embed.add_field(name=cog_name, value=command_list, inline=False)
             
             embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
             
         else:
             # Show help for a specific command
@@ -1011,7 +1703,7 @@ class Information(commands.Cog):
                 embed.add_field(name="Required Permissions", value=", ".join(f"`{perm}`" for perm in required_perms), inline=False)
             
             embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-            embed.timestamp = datetime.datetime.now()
+            embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
 
@@ -1053,7 +1745,7 @@ class Config(commands.Cog):
             color=config.COLORS["success"]
         )
         embed.set_footer(text=f"Changed by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -1072,7 +1764,7 @@ class Config(commands.Cog):
             color=config.COLORS["success"]
         )
         embed.set_footer(text=f"Set by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -1093,7 +1785,7 @@ class Config(commands.Cog):
             color=config.COLORS["success"]
         )
         embed.set_footer(text=f"Toggled by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
     
@@ -1114,10 +1806,186 @@ class Config(commands.Cog):
             color=config.COLORS["success"]
         )
         embed.set_footer(text=f"Toggled by {ctx.author}", icon_url=ctx.author.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
+        embed.timestamp = discord.utils.utcnow()
         
         await ctx.send(embed=embed)
-
+    
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def automod(self, ctx):
+        """Show auto-mod channel overrides and bypass roles"""
+        policies = self.bot.get_cog("AutomodPolicies")
+        settings = policies.guild_settings(ctx.guild.id) if policies else {"channels": {}, "bypass_roles": []}
+        
+        embed = discord.Embed(
+            title="Auto-Mod Settings",
+            description=(
+                f"Usage: `{config.PREFIX}automod channel <channel|category> <setting> <value>` or "
+                f"`{config.PREFIX}automod bypass <role>`\n"
+                f"Settings: `exempt`, {', '.join(f'`{f}`' for f in policy.FLAGS)} (on/off), "
+                f"{', '.join(f'`{t}`' for t in policy.THRESHOLDS)} (number); `default` clears a setting"
+            ),
+            color=config.COLORS["info"]
+        )
+        
+        lines = []
+        for channel_id, channel_settings in settings["channels"].items():
+            values = ", ".join(f"{k}={'on' if v is True else 'off' if v is False else v}" for k, v in channel_settings.items())
+            lines.append(f"<#{channel_id}>: {values}")
+        embed.add_field(name="Channel Overrides", value="\n".join(lines)[:1024] or "None", inline=False)
+        
+        roles = " ".join(f"<@&{role_id}>" for role_id in settings["bypass_roles"])
+        embed.add_field(name="Bypass Roles", value=roles[:1024] or "None", inline=False)
+        
+        await ctx.send(embed=embed)
+    
+    @automod.command(name="channel")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def automod_channel(self, ctx, channel: discord.abc.GuildChannel, setting: str, value: str):
+        """Override an auto-mod setting for a channel or category"""
+        setting = setting.lower()
+        value = value.lower()
+        try:
+            if value == "default":
+                parsed = None
+            elif setting == "exempt" or setting in policy.FLAGS:
+                if value not in ("on", "off"):
+                    raise ValueError(f"`{setting}` takes `on`, `off` or `default`.")
+                parsed = value == "on"
+            elif setting in policy.THRESHOLDS:
+                if not value.isdigit() or int(value) < 1:
+                    raise ValueError(f"`{setting}` takes a positive number or `default`.")
+                parsed = int(value)
+            else:
+                raise ValueError(f"Unknown setting `{setting}`. Run `{config.PREFIX}automod` to see the settings.")
+        except ValueError as e:
+            embed = discord.Embed(
+                title="Error",
+                description=str(e),
+                color=config.COLORS["error"]
+            )
+            return await ctx.send(embed=embed)
+        
+        self.bot.get_cog("AutomodPolicies").set_channel(ctx.guild.id, channel.id, setting, parsed)
+        
+        embed = discord.Embed(
+            title="Auto-Mod Override Updated",
+            description=f"`{setting}` in {channel.mention} is now `{value}`.",
+            color=config.COLORS["success"]
+        )
+        embed.set_footer(text=f"Updated by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        
+        await ctx.send(embed=embed)
+    
+    @automod.command(name="bypass")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def automod_bypass(self, ctx, role: discord.Role):
+        """Toggle whether a role bypasses auto-mod"""
+        enabled = self.bot.get_cog("AutomodPolicies").toggle_bypass(ctx.guild.id, role.id)
+        status = "now bypasses" if enabled else "no longer bypasses"
+        
+        embed = discord.Embed(
+            title="Auto-Mod Bypass Toggled",
+            description=f"{role.mention} {status} auto-mod.",
+            color=config.COLORS["success"]
+        )
+        embed.set_footer(text=f"Toggled by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        
+        await ctx.send(embed=embed)
+    
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def blocklist(self, ctx):
+        """Show the words blocked in this server"""
+        blocklists = self.bot.get_cog("Blocklists")
+        terms = sorted(blocklists.terms(ctx.guild.id)) if blocklists else []
+        
+        embed = discord.Embed(
+            title="Blocked Words",
+            description=(
+                f"Usage: `{config.PREFIX}blocklist add <words...>`, `{config.PREFIX}blocklist remove <words...>` "
+                f"or `{config.PREFIX}blocklist import` with a text file attached (one word or phrase per line)"
+            ),
+            color=config.COLORS["info"]
+        )
+        listed = ", ".join(f"||{term}||" for term in terms)
+        if len(listed) > 1024:
+            listed = listed[:listed.rfind(", ", 0, 1000)] + ", ..."
+        embed.add_field(name=f"{len(terms)} Words", value=listed or "None", inline=False)
+        await ctx.send(embed=embed)
+    
+    @blocklist.command(name="add")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def blocklist_add(self, ctx, *words):
+        """Block words in this server (quote phrases)"""
+        added = await self.bot.get_cog("Blocklists").add(ctx.guild.id, words)
+        
+        embed = discord.Embed(
+            title="Blocklist Updated",
+            description=f"Blocked {len(added)} new word(s).",
+            color=config.COLORS["success"]
+        )
+        embed.set_footer(text=f"Updated by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        await ctx.send(embed=embed)
+    
+    @blocklist.command(name="remove")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def blocklist_remove(self, ctx, *words):
+        """Unblock words in this server, including default ones"""
+        removed = await self.bot.get_cog("Blocklists").remove(ctx.guild.id, words)
+        
+        embed = discord.Embed(
+            title="Blocklist Updated",
+            description=f"Unblocked {len(removed)} word(s).",
+            color=config.COLORS["success"]
+        )
+        embed.set_footer(text=f"Updated by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        await ctx.send(embed=embed)
+    
+    @blocklist.command(name="import")
+    @commands.has_permissions(administrator=True)
+    @commands.cooldown(1, config.COMMAND_COOLDOWN, commands.BucketType.user)
+    async def blocklist_import(self, ctx):
+        """Block every word or phrase in an attached text file, one per line"""
+        attachment = ctx.message.attachments[0] if ctx.message.attachments else None
+        if attachment is None or attachment.size > config.BLOCKLIST_IMPORT_MAX_BYTES:
+            embed = discord.Embed(
+                title="Error",
+                description=f"Attach a text file of at most {config.BLOCKLIST_IMPORT_MAX_BYTES // 1024} KiB.",
+                color=config.COLORS["error"]
+            )
+            return await ctx.send(embed=embed)
+        
+        try:
+            text = (await attachment.read()).decode("utf-8")
+        except (discord.HTTPException, UnicodeDecodeError) as e:
+            embed = discord.Embed(
+                title="Error",
+                description=f"Could not read the file: {str(e)}",
+                color=config.COLORS["error"]
+            )
+            return await ctx.send(embed=embed)
+        
+        lines = [line.split("#", 1)[0] for line in text.splitlines()]
+        added = await self.bot.get_cog("Blocklists").add(ctx.guild.id, lines)
+        
+        embed = discord.Embed(
+            title="Blocklist Imported",
+            description=f"Blocked {len(added)} new word(s) from `{attachment.filename}`.",
+            color=config.COLORS["success"]
+        )
+        embed.set_footer(text=f"Imported by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        embed.timestamp = discord.utils.utcnow()
+        await ctx.send(embed=embed)
 
 # Error handling
 class ErrorHandler(commands.Cog):
@@ -1213,7 +2081,7 @@ class ErrorHandler(commands.Cog):
             return await ctx.send(embed=embed)
         
         # Log the error
-        logger.error(f"Unhandled command error: {error}", exc_info=error)
+        logger.error("Unhandled command error: %s", error, exc_info=error)
         
         # Send generic error message
         embed = discord.Embed(
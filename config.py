@@ -4,6 +4,11 @@
 # Command prefix
 PREFIX = "!"
 
+# Command entry points
+ENABLE_PREFIX_COMMANDS = True  # Set to False to only accept slash commands (skips prefix parsing on every message)
+ENABLE_SLASH_COMMANDS = True
+SLASH_SYNC_STATE_FILE = "command_tree.json"  # Hash of the last synced command tree, to skip unchanged syncs
+
 # Bot activity status
 ACTIVITY = "!help | Protecting the server"
 
@@ -19,6 +24,9 @@ COLORS = {
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_SAMPLE_WINDOW = 10  # In seconds, identical log lines are sampled within this window (0 to disable)
+LOG_SAMPLE_BURST = 5  # Identical log lines let through per window before suppressing
+LOG_JSON_FILE = None  # Path for JSON-lines log output (for log shipping), None to disable
 
 # Cooldowns and rate limits (in seconds)
 COMMAND_COOLDOWN = 3
@@ -29,14 +37,51 @@ KICK_COMMAND_COOLDOWN = 5
 SPAM_THRESHOLD = 5  # Number of messages
 SPAM_INTERVAL = 5   # In seconds
 SPAM_MUTE_DURATION = 300  # 5 minutes in seconds
+ADAPTIVE_SPAM = True  # Adjust the spam threshold per channel to its normal activity
+SPAM_BASELINE_ALPHA = 0.02  # Weight of each new message in a channel's baseline (about the last 50 messages)
+SPAM_BASELINE_WARMUP = 50  # Messages a channel needs before its baseline is used
+SPAM_BASELINE_DEVIATIONS = 3  # Threshold is the baseline mean plus this many standard deviations
+SPAM_THRESHOLD_RANGE = (1.0, 2.0)  # Adaptive threshold bounds, as multiples of the configured threshold
+# (a lower bound under 1.0 lets quiet channels mute people faster than configured)
+SPAM_BASELINE_IDLE = 3600  # In seconds, a channel quiet this long starts a new baseline
+
+# Mention flood settings
+ENABLE_MENTION_FILTER = True
+MENTION_MESSAGE_LIMIT = 10  # Mentions allowed in a single message
+MENTION_RATE_LIMIT = 20  # Mentions allowed per user within the mention interval
+MENTION_INTERVAL = 30  # In seconds
+MENTION_EVERYONE_WEIGHT = 10  # An @everyone/@here ping counts as this many mentions
+MENTION_ACTION = "mute"  # Options: "delete", "mute", "kick", "ban"
+MENTION_MUTE_DURATION = 600  # 10 minutes in seconds
 
 # Auto-mod settings
 ENABLE_ANTI_SPAM = True
 ENABLE_ANTI_RAID = True
 ENABLE_BAD_WORDS_FILTER = True
+AUTOMOD_POLICY_FILE = "automod_policies.json"  # Per-guild channel overrides and bypass roles
+
+# Shadow rule sets, evaluated on live messages without taking action (compare with !shadow)
+# Each overrides any of SPAM_THRESHOLD, SPAM_INTERVAL, MENTION_MESSAGE_LIMIT, MENTION_RATE_LIMIT,
+# MENTION_INTERVAL, MENTION_EVERYONE_WEIGHT and BAD_WORDS, e.g. {"strict": {"SPAM_THRESHOLD": 4}}
+SHADOW_RULESETS = {}
+SHADOW_CPU_BUDGET = 0.02  # Fraction of one CPU shadow rules may use; messages over budget are skipped
+SHADOW_BUDGET_WINDOW = 1  # In seconds
 
 # Bad words list (can be extended)
-BAD_WORDS = ["badword1", "badword2", "badword3"]
+BAD_WORDS = ["badword1", "badword2", "badword3"]  # Defaults for every server; each can add and remove words
+BLOCKLIST_FILE = "blocklists.json"  # Per-server additions and removals, edited with !blocklist
+BLOCKLIST_RELOAD_INTERVAL = 30  # In seconds, how often the file is checked for outside edits (0 to disable)
+BLOCKLIST_IMPORT_MAX_BYTES = 256 * 1024
+
+# Link and attachment filter
+ENABLE_LINK_FILTER = True
+BLOCKED_DOMAINS = []  # Blocked domains; subdomains are blocked too
+BLOCKED_DOMAINS_FILE = "blocked_domains.txt"  # One domain per line, loaded at startup if present
+BAD_ATTACHMENT_HASHES_FILE = "bad_attachment_hashes.txt"  # One SHA-256 per line, loaded at startup if present
+RISKY_ATTACHMENT_EXTENSIONS = [".exe", ".scr", ".bat", ".cmd", ".com", ".msi", ".js", ".vbs", ".jar", ".apk", ".dll"]
+LINK_SCAN_MAX_ATTACHMENT_BYTES = 8 * 1024 * 1024  # Larger risky attachments are not hashed
+LINK_VERDICT_CACHE_SIZE = 50000  # Memoized domain and attachment verdicts
+LINK_VERDICT_TTL = 3600  # In seconds
 
 # Moderation settings
 DEFAULT_MUTE_DURATION = 3600  # 1 hour in seconds
@@ -47,7 +92,87 @@ WARN_ACTION = "mute"  # Options: "mute", "kick", "ban"
 RAID_JOIN_THRESHOLD = 5  # Number of joins
 RAID_JOIN_INTERVAL = 10  # In seconds
 RAID_ACTION = "lockdown"  # Options: "lockdown", "verification"
+QUARANTINE_ROLE_NAME = "Quarantined"  # Role given to members who join during a raid in verification mode
+RAID_VERIFICATION_DURATION = 600  # In seconds, verification mode ends this long after the last raid join
+LOCKDOWN_STATE_FILE = "lockdown_state.json"  # Channels the bot locked and their previous permissions
+
+# Join scoring (suspicious new members)
+ENABLE_JOIN_SCORING = True
+JOIN_NEW_ACCOUNT_AGE = 7 * 86400  # In seconds, younger accounts score higher the newer they are
+JOIN_NAME_HISTORY = 50  # Recent joins per server that new names are compared against
+JOIN_NAME_MIN_SHARED = 2  # A name fragment counts as seen once this many recent joins share it
+JOIN_SCORE_WEIGHTS = {"age": 0.5, "avatar": 0.2, "name": 0.3}  # Scores range from 0 to the sum of these
+JOIN_SUSPICIOUS_SCORE = 0.6  # Joins scoring at least this are flagged
+JOIN_SUSPICIOUS_RAID_THRESHOLD = 3  # Flagged joins within RAID_JOIN_INTERVAL that count as a raid
+JOIN_QUARANTINE_SCORE = 0.8  # In verification mode, joins scoring at least this are quarantined on their own
+
+# Shared state (detection windows and warnings)
+STATE_BACKEND = "memory"  # Options: "memory", "redis" (share state between bot processes)
+STATE_REDIS_URL = "redis://localhost:6379/0"
+STATE_REDIS_PREFIX = "modbot"
+STATE_FLUSH_INTERVAL = 0.25  # In seconds, how often counter updates are pipelined to Redis
+STATE_WINDOW_SLOTS = 5  # Counter slots per detection window
+STATE_COUNTER_TTL = 120  # In seconds, should exceed the longest detection window
+STATE_MAX_KEYS = 100000  # Counter totals kept locally before trimming
+STATE_SNAPSHOT_FILE = "state_snapshot.bin"  # In-memory detection state is saved here and loaded at startup
+STATE_SNAPSHOT_INTERVAL = 60  # In seconds, how often the snapshot is rewritten (0 to only write at shutdown)
+
+# Event recording for offline replay (python replay.py <file>)
+RECORD_EVENTS_FILE = None  # Path to append sanitized message and join events to, None to disable
+RECORD_MAX_CONTENT = 512  # Characters of message content kept per event, 0 to drop content
+
+# Health endpoint for the process supervisor (GET /ready, GET /health)
+HEALTH_HOST = "127.0.0.1"
+HEALTH_PORT = 8080  # None to disable
+HEALTH_LAG_INTERVAL = 0.5  # In seconds, how often event loop lag is sampled
+
+# Shutdown
+SHUTDOWN_DRAIN_TIMEOUT = 10  # In seconds, how long queued enforcement actions get to finish on SIGTERM
+
+# Outbound API call budgets (local estimates of Discord's per-route rate limits; a 429
+# response empties the bucket for its retry_after, so an estimate that is too high self-corrects)
+OUTBOUND_GLOBAL_BUDGET = (40, 1)  # Calls per seconds, across all buckets
+OUTBOUND_BUDGETS = {
+    "send": (5, 5),  # Per channel
+    "delete": (5, 1),  # Per channel
+    "timeout": (10, 10),  # Per guild
+    "role": (10, 1),  # Per guild (member role adds and removes)
+    "channel_edit": (5, 1),  # Per channel (permission overwrites)
+    "dm": (5, 5),
+}
+OUTBOUND_DEFAULT_BUDGET = (5, 5)
+OUTBOUND_RESERVE = 0.25  # Fraction of the global budget kept for enforcement calls
+OUTBOUND_NOTIFY_MAX_AGE = 30  # In seconds, queued notifications older than this are dropped under pressure
+OUTBOUND_MAX_QUEUE = 5000  # Maximum queued calls
+OUTBOUND_ALERT_WINDOW = 3  # In seconds, auto-mod alerts are merged over this window
+DM_BATCH_WINDOW = 3  # In seconds, DM notices to the same user within this window are sent as one message
+DM_FAILURE_TTL = 3600  # In seconds, users whose DMs are closed are not messaged again for this long
+DM_FAILURE_CACHE_SIZE = 50000  # Users remembered as having closed DMs
+
+# Per-guild fairness (one noisy guild must not starve the others)
+OUTBOUND_GUILD_BUDGET = (20, 1)  # Calls per seconds for any one guild, so a noisy guild can't use the whole global budget
+OUTBOUND_GUILD_MAX_QUEUE = 1000  # Maximum queued calls for one guild
+GUILD_WEIGHTS = {}  # guild_id -> calls per scheduling round (default 1), to favour some guilds
+GUILD_HANDLER_BUDGET = 0.25  # Fraction of one CPU a guild's message handling may use before optional filters are skipped
+GUILD_HANDLER_WINDOW = 1  # In seconds
+
+# Paginated list views
+PAGINATOR_TIMEOUT = 120  # In seconds, buttons stop working after this long without use
+PAGINATOR_MAX_OPEN = 200  # Maximum open paginators, the oldest is closed first
+WARNINGS_PER_PAGE = 5
+ROLES_PER_PAGE = 40  # Role mentions stay well under the 1024 character field limit
+
+# Member resolution cache
+RESOLVER_NEGATIVE_TTL = 60  # In seconds, how long a missing member/user ID is remembered
+RESOLVER_NEGATIVE_MAX = 10000  # Maximum remembered missing IDs
+
+# Moderation audit log (local SQLite store)
+AUDIT_DB_PATH = "audit.db"
+AUDIT_BATCH_SIZE = 100  # Pending entries that trigger an immediate write
+AUDIT_FLUSH_INTERVAL = 2  # In seconds
+AUDIT_PAGE_SIZE = 10  # Entries per search page
 
 # Logging channels (IDs, set to None if not used)
 MOD_LOG_CHANNEL = None
 JOIN_LEAVE_CHANNEL = None
+ALERT_CHANNEL = None  # Raid alerts and the welcome message; otherwise the first channel the bot can send in
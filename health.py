@@ -0,0 +1,162 @@
+import asyncio
+import collections
+import logging
+import math
+import time
+from aiohttp import web
+from discord.ext import commands
+import config
+import outbound
+
+logger = logging.getLogger("bot.health")
+
+
+class HealthServer(commands.Cog):
+    """Local HTTP endpoint for the process supervisor
+
+    GET /ready answers 200 once the gateway session is ready and connected
+    and the bot is not shutting down, 503 otherwise. GET /health always
+    answers 200 with a JSON report: readiness, gateway latency, event loop
+    lag, background queue depths, cache sizes and command and auto-mod
+    counters. Both only read in-process attributes, so they never touch
+    the Discord API and answer in well under a millisecond.
+    """
+
+    def __init__(self, bot, host=None, port=None):
+        self.bot = bot
+        self.host = host or config.HEALTH_HOST
+        self.port = port or config.HEALTH_PORT
+        self.connected = False
+        self.disconnects = 0
+        self.commands_run = 0
+        self.command_errors = 0
+        self.started = time.monotonic()
+        self.lag = 0.0
+        self._lags = collections.deque(maxlen=max(int(60 / config.HEALTH_LAG_INTERVAL), 1))
+        self._runner = None
+        self._lag_task = None
+
+    async def cog_load(self):
+        app = web.Application()
+        app.router.add_get("/ready", self.ready)
+        app.router.add_get("/health", self.health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            # A taken port must not keep the bot from starting
+            logger.error("Health endpoint could not listen on %s:%s: %s", self.host, self.port, e)
+        else:
+            logger.info("Health endpoint listening on http://%s:%s", self.host, self.port)
+        self._lag_task = asyncio.create_task(self._measure_lag())
+
+    async def cog_unload(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_lag(self):
+        """Sample how late a short sleep wakes up; that delay is what every event waits too"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(config.HEALTH_LAG_INTERVAL)
+            self.lag = max(loop.time() - start - config.HEALTH_LAG_INTERVAL, 0.0)
+            self._lags.append(self.lag)
+
+    def is_ready(self):
+        moderation = self.bot.get_cog("Moderation")
+        accepting = moderation.accepting if moderation else False
+        return self.bot.is_ready() and self.connected and not self.bot.is_closed() and accepting
+
+    async def ready(self, request):
+        ready = self.is_ready()
+        return web.json_response({"ready": ready}, status=200 if ready else 503)
+
+    async def health(self, request):
+        return web.json_response(self.report())
+
+    def report(self):
+        latency = self.bot.latency
+        report = {
+            "ready": self.is_ready(),
+            "connected": self.connected,
+            "disconnects": self.disconnects,
+            "uptime": round(time.monotonic() - self.started, 1),
+            "guilds": len(self.bot.guilds),
+            "gateway_latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+            "loop_lag_ms": round(self.lag * 1000, 2),
+            "loop_lag_max_ms": round(max(self._lags, default=0.0) * 1000, 2),
+            "commands": {"run": self.commands_run, "errors": self.command_errors},
+        }
+
+        moderation = self.bot.get_cog("Moderation")
+        if moderation is not None:
+            queue = moderation.outbound
+            report["queues"] = {
+                "outbound_enforce": queue.depth(outbound.ENFORCE),
+                "outbound_notify": queue.depth(outbound.NOTIFY),
+                "outbound_running": queue.running,
+                "audit_pending": moderation.audit_log.pending,
+                "dm_pending": len(moderation.notifier),
+            }
+            report["outbound"] = {
+                "dispatched": queue.dispatched,
+                "coalesced": queue.coalesced,
+                "dropped": queue.dropped,
+            }
+            report["caches"] = {
+                "state": moderation.state.sizes(),
+                "raid_guilds": len(moderation.recent_joins),
+                "join_name_guilds": len(moderation.join_scorer),
+                "spam_baselines": len(moderation.spam_baselines) if moderation.spam_baselines is not None else 0,
+                "pending_alerts": len(moderation.pending_alerts),
+                "link_verdicts": len(moderation.link_scanner.verdicts),
+                "attachment_verdicts": len(moderation.link_scanner.attachment_verdicts),
+                "dm_closed": len(moderation.notifier.failed),
+            }
+            report["dms"] = {
+                "sent": moderation.notifier.sent,
+                "collapsed": moderation.notifier.collapsed,
+                "skipped_closed": moderation.notifier.skipped,
+            }
+            report["joins"] = {
+                "scored": moderation.join_scorer.scored,
+                "flagged": moderation.join_scorer.flagged,
+            }
+            report["automod_actions"] = dict(moderation.action_counts)
+
+        members = self.bot.get_cog("MemberCache")
+        if members is not None:
+            report.setdefault("caches", {})["members"] = members.sizes()
+        return report
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        self.connected = True
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        self.connected = True
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if self.connected:
+            self.disconnects += 1
+        self.connected = False
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        self.commands_run += 1
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        self.command_errors += 1
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction, command):
+        self.commands_run += 1
@@ -0,0 +1,139 @@
+import collections
+import hashlib
+import logging
+import os
+import re
+import time
+import config
+
+logger = logging.getLogger("bot.linkscan")
+
+# Host part of anything that looks like a link: scheme or www. prefix, or a
+# bare domain followed by a path (e.g. "free-nitro.gift/claim"). Userinfo
+# after the scheme is skipped, so "https://discord.com@evil.com" is evil.com
+URL_PATTERN = re.compile(
+    r"(?:https?://(?:[^/@\s]*@)?|www\.)([a-z0-9.-]+\.[a-z]{2,})"
+    r"|\b([a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,})/",
+    re.IGNORECASE,
+)
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expiry = entry
+        if expiry < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _read_list(path):
+    """Read one entry per line, skipping blanks and # comments"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip().lower() for line in f if line.split("#", 1)[0].strip()]
+
+
+class LinkScanner:
+    """Check message links and attachments against local blocklists
+
+    Domains are matched by walking a host's parent domains through a hashed
+    set ("a.b.evil.com" checks "a.b.evil.com", "b.evil.com", "evil.com"),
+    and verdicts are memoized per host. Attachments with a risky extension
+    are fingerprinted against a known-bad SHA-256 set. Only matches are
+    memoized, by filename and size, since raids repost the same payload;
+    the sender picks both, so a clean verdict is never reused for a later
+    upload. Links never cause a network request; only a small, risky
+    attachment that isn't a known repost is downloaded to be hashed.
+    """
+
+    def __init__(self, domains=(), bad_hashes=(), risky_extensions=()):
+        self.domains = set(d.strip(".").lower() for d in domains)
+        self.bad_hashes = set(h.lower() for h in bad_hashes)
+        self.risky_extensions = tuple(e.lower() for e in risky_extensions)
+        self.verdicts = TTLCache(config.LINK_VERDICT_CACHE_SIZE, config.LINK_VERDICT_TTL)
+        self.attachment_verdicts = TTLCache(config.LINK_VERDICT_CACHE_SIZE, config.LINK_VERDICT_TTL)
+
+    @classmethod
+    def from_config(cls):
+        domains = list(config.BLOCKED_DOMAINS) + _read_list(config.BLOCKED_DOMAINS_FILE)
+        hashes = _read_list(config.BAD_ATTACHMENT_HASHES_FILE)
+        scanner = cls(domains, hashes, config.RISKY_ATTACHMENT_EXTENSIONS)
+        logger.info("Loaded %d blocked domains and %d attachment hashes", len(scanner.domains), len(scanner.bad_hashes))
+        return scanner
+
+    @staticmethod
+    def extract_hosts(content):
+        """Return the distinct lowercased hosts linked in `content`"""
+        if "." not in content:
+            return set()
+        return {(a or b).lower().rstrip(".") for a, b in URL_PATTERN.findall(content)}
+
+    def check_host(self, host):
+        """Return the blocked domain `host` falls under, or None"""
+        verdict = self.verdicts.get(host, False)
+        if verdict is not False:
+            return verdict
+
+        verdict = None
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            candidate = ".".join(labels[i:])
+            if candidate in self.domains:
+                verdict = candidate
+                break
+        self.verdicts.set(host, verdict)
+        return verdict
+
+    def check_content(self, content):
+        """Return the first blocked domain linked in `content`, or None"""
+        for host in self.extract_hosts(content):
+            verdict = self.check_host(host)
+            if verdict:
+                return verdict
+        return None
+
+    def needs_fingerprint(self, attachment):
+        if not self.bad_hashes:
+            return False
+        if attachment.size > config.LINK_SCAN_MAX_ATTACHMENT_BYTES:
+            return False
+        return attachment.filename.lower().endswith(self.risky_extensions)
+
+    async def check_attachment(self, attachment):
+        """Return True if the attachment matches a known-bad hash"""
+        key = (attachment.filename.lower(), attachment.size)
+        if self.attachment_verdicts.get(key):
+            return True
+        if not self.needs_fingerprint(attachment):
+            return False
+
+        data = await attachment.read()
+        if hashlib.sha256(data).hexdigest() not in self.bad_hashes:
+            return False
+        self.attachment_verdicts.set(key, True)
+        return True
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import logging
+import os
+import config
+import outbound
+
+logger = logging.getLogger("bot.lockdown")
+
+
+class LockdownManager:
+    """Track which channels the bot locked and what they were before
+
+    Locking records each channel's original @everyone send_messages value
+    (allow, deny or unset) and only edits channels that are not already
+    denied. Unlocking restores exactly the recorded value, removing the
+    overwrite when it ends up empty, so deliberately read-only channels
+    stay read-only. Channels already in the target state cost no API
+    call. State is kept in config.LOCKDOWN_STATE_FILE so an unlock after a
+    restart still knows what to restore.
+    """
+
+    def __init__(self, outbound_queue, path=None):
+        self.outbound = outbound_queue
+        self.path = path or config.LOCKDOWN_STATE_FILE
+        self.locked = self._load()  # guild_id -> {channel_id: original send_messages}
+        self._locks = {}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to read lockdown state from %s: %s", self.path, e)
+            return {}
+        return {int(g): {int(c): v for c, v in channels.items()} for g, channels in data.items()}
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({g: channels for g, channels in self.locked.items() if channels}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_locked(self, guild_id, channel_id):
+        return channel_id in self.locked.get(guild_id, {})
+
+    async def _apply(self, guild, edits, reason):
+        """Queue the permission edits and return the channels that succeeded"""
+        role = guild.default_role
+        calls = []
+        for channel, value in edits:
+            overwrite = channel.overwrites_for(role)
+            overwrite.send_messages = value
+            # Drop the overwrite entirely when nothing else is set on it
+            target = None if overwrite.is_empty() else overwrite
+            call, _ = self.outbound.submit(
+                ("channel_edit", channel.id),
+                lambda channel=channel, target=target: channel.set_permissions(role, overwrite=target, reason=reason),
+                priority=outbound.ENFORCE,
+                guild=guild.id
+            )
+            calls.append(call)
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        done = []
+        for (channel, _), result in zip(edits, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to update %s in %s: %s", channel.name, guild.name, result)
+            else:
+                done.append(channel)
+        return done
+
+    async def lock(self, guild, channels, reason=None):
+        """Deny @everyone send_messages in `channels`; return the channels that changed"""
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            state = self.locked.setdefault(guild.id, {})
+            edits = []
+            for channel in channels:
+                current = channel.overwrites_for(guild.default_role).send_messages
+                if current is False:
+                    continue  # Already read-only, locked by us or not
+                edits.append((channel, False))
+                state[channel.id] = current
+            if not edits:
+                return []
+
+            done = await self._apply(guild, edits, reason)
+            failed = {channel.id for channel, _ in edits} - {channel.id for channel in done}
+            for channel_id in failed:
+                state.pop(channel_id, None)
+            self._save()
+            return done
+
+    async def unlock(self, guild, channels=None, reason=None, force=False):
+        """Restore channels the bot locked (all of them if `channels` is None)
+
+        With `force`, channels the bot did not lock but that deny
+        send_messages are reset to unset, as an explicit unlock asks.
+        Returns the channels that changed.
+        """
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            state = self.locked.get(guild.id, {})
+            if channels is None:
+                channels = [c for c in (guild.get_channel(cid) for cid in list(state)) if c is not None]
+                # Forget channels that were deleted while locked
+                for channel_id in set(state) - {c.id for c in channels}:
+                    del state[channel_id]
+
+            edits = []
+            for channel in channels:
+                current = channel.overwrites_for(guild.default_role).send_messages
+                if channel.id in state:
+                    original = state[channel.id]
+                    if current is not False:
+                        # Someone already changed it by hand; leave their setting
+                        del state[channel.id]
+                        continue
+                    edits.append((channel, original))
+                elif force and current is False:
+                    edits.append((channel, None))
+
+            if not edits:
+                self._save()
+                return []
+
+            done = await self._apply(guild, edits, reason)
+            for channel in done:
+                state.pop(channel.id, None)
+            self._save()
+            return done
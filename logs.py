@@ -0,0 +1,150 @@
+import json
+import logging
+import logging.handlers
+import queue
+import coloredlogs
+import config
+
+# Loggers that go through the background pipeline
+PIPELINE_LOGGERS = ("bot",)
+
+
+class RepeatSampler(logging.Filter):
+    """Let a burst of identical log lines through per window and count the rest
+
+    Records are keyed on their unformatted %-style template, so
+    "Auto-muted %s" from 300 different users counts as one repeated
+    message. The first record after a window rolls over carries a
+    "(N similar suppressed)" suffix. Windows that end without another
+    record of their kind are summarized to `sink` instead, on the next
+    record of any kind at least a window later, when keys are evicted at
+    MAX_KEYS, and on flush() at shutdown. Errors are never sampled.
+    """
+
+    MAX_KEYS = 4096
+
+    def __init__(self, window, burst, sink=None):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.sink = sink  # Called with summary records for windows that ended quietly
+        self._state = {}  # key -> [window start, records, suppressed, last suppressed record]
+        self._next_sweep = 0.0
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or self.window <= 0:
+            return True
+
+        if record.created >= self._next_sweep:
+            self._sweep(record.created)
+        key = (record.name, record.levelno, record.msg)
+        state = self._state.get(key)
+        if state is None or record.created - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            if state is None and len(self._state) >= self.MAX_KEYS:
+                self.flush()
+            self._state[key] = [record.created, 1, 0, None]
+            if suppressed:
+                # Only the summary line is formatted on the calling thread
+                record.msg = "%s (%d similar suppressed)" % (record.getMessage(), suppressed)
+                record.args = None
+            return True
+
+        state[1] += 1
+        if state[1] <= self.burst:
+            return True
+        state[2] += 1
+        state[3] = record
+        return False
+
+    def _sweep(self, now):
+        """Summarize and forget windows that ended before `now`"""
+        self._next_sweep = now + self.window
+        expired = [key for key, state in self._state.items() if now - state[0] >= self.window]
+        for key in expired:
+            self._summarize(self._state.pop(key))
+
+    def flush(self):
+        """Summarize every window with suppressed records and forget all keys"""
+        for state in self._state.values():
+            self._summarize(state)
+        self._state.clear()
+
+    def _summarize(self, state):
+        if state[2] and self.sink is not None:
+            summary = logging.makeLogRecord(state[3].__dict__)
+            summary.msg = "%s (%d similar suppressed)" % (summary.getMessage(), state[2])
+            summary.args = None
+            self.sink(summary)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line for log shipping"""
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue records untouched so formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        # The stock handler formats here to make records picklable; our queue
+        # never leaves the process, so hand the raw record to the writer thread
+        return record
+
+
+_listener = None
+_sampler = None
+
+
+def setup_logging():
+    """Route bot logging through a queue drained by a background writer thread"""
+    global _listener, _sampler
+    if _listener is not None:
+        return _listener
+
+    console = logging.StreamHandler()
+    console.setFormatter(coloredlogs.ColoredFormatter(fmt=config.LOG_FORMAT))
+    handlers = [console]
+
+    if config.LOG_JSON_FILE:
+        json_handler = logging.FileHandler(config.LOG_JSON_FILE, encoding="utf-8")
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _LocalQueueHandler(log_queue)
+    # Summaries go straight onto the queue; they have been through the sampler already
+    _sampler = RepeatSampler(config.LOG_SAMPLE_WINDOW, config.LOG_SAMPLE_BURST, sink=log_queue.put_nowait)
+    queue_handler.addFilter(_sampler)
+
+    for name in PIPELINE_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(config.LOG_LEVEL)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _sampler
+    if _sampler is not None:
+        # Floods that were still being counted get their summary line
+        _sampler.flush()
+        _sampler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -3,20 +3,23 @@ import discord
 from discord.ext import commands
 import asyncio
 import logging
-import coloredlogs
 import os
-import datetime
 from dotenv import load_dotenv
+import alerts
+import blocklist
 import commands as cmd_module
 import config
+import health
+import logs
+import policy
+import recorder
+import resolver
+import shutdown
+import slash
 
 # Set up logging
+logs.setup_logging()
 logger = logging.getLogger('bot')
-coloredlogs.install(
-    level=config.LOG_LEVEL,
-    logger=logger,
-    fmt=config.LOG_FORMAT
-)
 
 # Load environment variables
 load_dotenv()
@@ -24,39 +27,75 @@ TOKEN = os.getenv('BOT_TOKEN')
 
 # Create the bot instance
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=config.PREFIX, intents=intents)
+# Message content is only needed by prefix commands and the filters, shadow rules
+# and recorder that read it (links and @everyone/@here text included)
+intents.message_content = bool(
+    config.ENABLE_PREFIX_COMMANDS
+    or config.ENABLE_BAD_WORDS_FILTER
+    or config.ENABLE_LINK_FILTER
+    or config.ENABLE_MENTION_FILTER
+    or config.SHADOW_RULESETS
+    or config.RECORD_EVENTS_FILE
+)
+# The Information cog provides its own help command
+bot = commands.Bot(command_prefix=config.PREFIX, intents=intents, help_command=None)
 
 # Add start time attribute for uptime command
-bot.start_time = datetime.datetime.now()
+bot.start_time = discord.utils.utcnow()
+
+# Drains queued actions and saves state on SIGTERM/SIGINT
+coordinator = shutdown.ShutdownCoordinator(bot, config.SHUTDOWN_DRAIN_TIMEOUT)
+
+async def setup_hook():
+    """Called once after login, before connecting to the gateway"""
+    # Add cogs (here rather than in on_ready, which runs again on every reconnect)
+    if config.HEALTH_PORT:
+        await bot.add_cog(health.HealthServer(bot))
+    await bot.add_cog(resolver.MemberCache(bot))
+    await bot.add_cog(policy.AutomodPolicies(bot))
+    await bot.add_cog(blocklist.Blocklists(bot))
+    await bot.add_cog(alerts.AlertChannels(bot))
+    await bot.add_cog(cmd_module.Moderation(bot))
+    await bot.add_cog(cmd_module.Information(bot))
+    await bot.add_cog(cmd_module.Config(bot))
+    await bot.add_cog(cmd_module.ErrorHandler(bot))
+    
+    if config.RECORD_EVENTS_FILE:
+        await bot.add_cog(recorder.EventRecorder(bot))
+    
+    if config.ENABLE_SLASH_COMMANDS:
+        await bot.add_cog(slash.SlashCommands(bot))
+        try:
+            await slash.sync_command_tree(bot)
+        except discord.HTTPException as e:
+            logger.error("Failed to sync application commands: %s", e)
+
+bot.setup_hook = setup_hook
 
 @bot.event
 async def on_ready():
     """Called when the bot is ready"""
-    logger.info(f'Logged in as {bot.user.name} ({bot.user.id})')
-    logger.info(f'Prefix: {config.PREFIX}')
+    logger.info('Logged in as %s (%s)', bot.user.name, bot.user.id)
+    logger.info('Prefix: %s', config.PREFIX)
     
     # Set status
     await bot.change_presence(activity=discord.Activity(type=discord.ActivityType.listening, name=config.ACTIVITY))
     
-    # Add cogs
-    await bot.add_cog(cmd_module.Moderation(bot))
-    await bot.add_cog(cmd_module.Information(bot))
-    await bot.add_cog(cmd_module.Config(bot))
-    await bot.add_cog(cmd_module.ErrorHandler(bot))
-    
     logger.info('Bot is ready!')
 
+@bot.event
+async def on_message(message):
+    """Parse prefix commands, unless they are turned off in favour of slash commands"""
+    if config.ENABLE_PREFIX_COMMANDS and not coordinator.closing:
+        await bot.process_commands(message)
+
 @bot.event
 async def on_guild_join(guild):
     """Called when the bot joins a new guild"""
-    logger.info(f'Joined new guild: {guild.name} (ID: {guild.id})')
+    logger.info('Joined new guild: %s (ID: %s)', guild.name, guild.id)
     
-    # Try to find a suitable channel to send a welcome message
-    target_channel = None
-    for channel in guild.text_channels:
-        if channel.permissions_for(guild.me).send_messages:
-            target_channel = channel
-            break
+    # Send the welcome message where raid alerts would go
+    target_channel = bot.get_cog("AlertChannels").get(guild)
     
     if target_channel:
         embed = discord.Embed(
@@ -76,7 +115,7 @@ async def on_guild_join(guild):
 @bot.event
 async def on_guild_remove(guild):
     """Called when the bot leaves a guild"""
-    logger.info(f'Left guild: {guild.name} (ID: {guild.id})')
+    logger.info('Left guild: %s (ID: %s)', guild.name, guild.id)
 
 async def main():
     """Main entry point for the bot"""
@@ -85,12 +124,17 @@ async def main():
             logger.error("No bot token found in .env file. Please add your token.")
             return
         
-        await bot.start(TOKEN)
+        coordinator.install()
+        async with bot:
+            await bot.start(TOKEN)
     except discord.errors.LoginFailure:
         logger.error("Invalid bot token. Please check your .env file.")
     except Exception as e:
-        logger.error(f"Error starting bot: {e}", exc_info=e)
+        logger.error("Error starting bot: %s", e, exc_info=e)
 
 if __name__ == "__main__":
     # Run the bot
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        logs.stop_logging()
@@ -0,0 +1,80 @@
+import logging
+import discord
+import config
+from linkscan import TTLCache
+
+logger = logging.getLogger("bot.notifier")
+
+MAX_EMBEDS = 10  # Discord's limit per message
+
+
+class DMNotifier:
+    """Send direct-message notices through the outbound queue
+
+    Notices to the same user within config.DM_BATCH_WINDOW seconds are
+    collapsed into one message. Users whose DMs are closed (the send is
+    forbidden) are remembered for config.DM_FAILURE_TTL seconds and
+    skipped without an API call until then.
+    """
+
+    def __init__(self, outbound_queue):
+        self.outbound = outbound_queue
+        self.failed = TTLCache(config.DM_FAILURE_CACHE_SIZE, config.DM_FAILURE_TTL)
+        self._pending = {}  # user_id -> list of embeds waiting to be sent
+        self.sent = 0
+        self.collapsed = 0
+        self.skipped = 0
+
+    def notify(self, user, embed, guild_id=None):
+        """Queue `embed` for `user`; returns False if their DMs are known to be closed"""
+        if self.failed.get(user.id):
+            self.skipped += 1
+            return False
+
+        batch = self._pending.get(user.id)
+        if batch is not None:
+            batch.append(embed)
+            self.collapsed += 1
+            return True
+
+        batch = self._pending[user.id] = [embed]
+        future, _ = self.outbound.submit(
+            ("dm",),
+            lambda: self._send(user, batch),
+            key=("dm", user.id),
+            delay=config.DM_BATCH_WINDOW,
+            guild=guild_id
+        )
+        if future is None:
+            self._release(user.id, batch)
+        else:
+            # Also covers a call that is shed before it runs
+            future.add_done_callback(lambda _: self._release(user.id, batch))
+        return True
+
+    def _release(self, user_id, batch):
+        if self._pending.get(user_id) is batch:
+            del self._pending[user_id]
+
+    async def _send(self, user, batch):
+        # Notices arriving from here on start a new batch
+        self._release(user.id, batch)
+        embeds = batch
+        if len(batch) > MAX_EMBEDS:
+            more = discord.Embed(
+                description=f"...and {len(batch) - MAX_EMBEDS + 1} more notices.",
+                color=config.COLORS["warning"]
+            )
+            embeds = batch[:MAX_EMBEDS - 1] + [more]
+        try:
+            message = await user.send(embeds=embeds)
+        except discord.Forbidden:
+            # DMs closed or no shared server; don't try again for a while
+            self.failed.set(user.id, True)
+            logger.debug("DMs to %s are closed, skipping for %ss", user.id, config.DM_FAILURE_TTL)
+            raise
+        self.sent += 1
+        return message
+
+    def __len__(self):
+        return len(self._pending)
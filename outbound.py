@@ -0,0 +1,351 @@
+import asyncio
+import collections
+import logging
+import time
+import discord
+import config
+
+logger = logging.getLogger("bot.outbound")
+
+# Priorities: enforcement actions always go ahead of cosmetic notifications
+ENFORCE = 0
+NOTIFY = 1
+
+
+def _consume(future):
+    if not future.cancelled():
+        future.exception()
+
+
+class TokenBucket:
+    """Local estimate of a rate-limit bucket's remaining budget"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        # A bucket created during a scheduling pass is newer than that pass's `now`
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available"""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def exhaust(self, retry_after):
+        self.tokens = -retry_after * self.rate
+
+
+class _Job:
+    __slots__ = ("bucket", "guild", "factory", "priority", "key", "not_before", "created", "future")
+
+    def __init__(self, bucket, guild, factory, priority, key, not_before, created, future):
+        self.bucket = bucket
+        self.guild = guild
+        self.factory = factory
+        self.priority = priority
+        self.key = key
+        self.not_before = not_before
+        self.created = created
+        self.future = future
+
+
+class OutboundQueue:
+    """Client-side scheduler for outbound Discord API calls
+
+    Calls are grouped into buckets (e.g. ("send", channel_id) or
+    ("timeout", guild_id)) with a local token-bucket budget per kind from
+    config.OUTBOUND_BUDGETS, plus a global budget. Submissions sharing a
+    coalescing key are merged while pending and, optionally, for a window
+    after they run. When the global budget runs low, only enforcement
+    calls are dispatched and stale notifications are dropped.
+
+    Each priority keeps one queue per guild, served weighted round-robin
+    (config.GUILD_WEIGHTS, default 1 call per round), and each guild has
+    its own budget (config.OUTBOUND_GUILD_BUDGET) and backlog limit
+    (config.OUTBOUND_GUILD_MAX_QUEUE). A guild under attack fills its own
+    queue and budget, so other guilds' calls still go out promptly.
+    """
+
+    def __init__(self, usage=None):
+        # Per priority: guild_id -> deque of jobs, in round-robin order
+        self._lanes = (collections.OrderedDict(), collections.OrderedDict())
+        self._counts = [0, 0]
+        self._guild_sizes = collections.Counter()
+        self._buckets = {}
+        self._guild_buckets = {}
+        self._global = TokenBucket(*config.OUTBOUND_GLOBAL_BUDGET)
+        self._pending_keys = {}  # key -> future of the queued job
+        self._recent_keys = {}  # key -> monotonic time the window ends
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+        self.usage = usage  # accounting.UsageTracker charged with calls per guild
+        self.dispatched = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __len__(self):
+        return self._counts[ENFORCE] + self._counts[NOTIFY]
+
+    def depth(self, priority):
+        """Calls queued at one priority"""
+        return self._counts[priority]
+
+    @property
+    def running(self):
+        """Calls dispatched and not yet finished"""
+        return len(self._running)
+
+    def queued(self, guild_id):
+        """Calls queued for one guild"""
+        return self._guild_sizes.get(guild_id, 0)
+
+    async def drain(self, timeout):
+        """Wait up to `timeout` seconds for queued enforcement calls and running calls to finish
+
+        Notifications keep being dispatched meanwhile but are not waited
+        for. Returns how many enforcement calls were still queued.
+        """
+        deadline = time.monotonic() + timeout
+        while self._counts[ENFORCE] or self._running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(0.05, remaining))
+        return self._counts[ENFORCE]
+
+    def submit(self, bucket, factory, priority=NOTIFY, key=None, window=0, delay=0, guild=None):
+        """Queue `factory()` (a coroutine function) for dispatch
+
+        `guild` is the guild the call is made for, used for fair scheduling
+        and accounting. Returns (future, is_new): the future is for the
+        call's result (or exception), and is_new is False when the call
+        was merged into another, so callers attach follow-ups only once.
+        A call merged into a pending one shares its future; the future is
+        None when the call was merged into one that already ran within its
+        window, or was shed. Cancelling the future before the call is
+        dispatched withdraws it.
+        """
+        now = time.monotonic()
+        if key is not None:
+            pending = self._pending_keys.get(key)
+            if pending is not None:
+                self.coalesced += 1
+                return pending, False
+            until = self._recent_keys.get(key)
+            if until is not None:
+                if until > now:
+                    self.coalesced += 1
+                    return None, False
+                del self._recent_keys[key]
+
+        if len(self) >= config.OUTBOUND_MAX_QUEUE:
+            # Shed a notification to make room, never an enforcement call,
+            # taken from the guild with the most queued notifications
+            notify = self._lanes[NOTIFY]
+            if priority == NOTIFY or not notify:
+                self._refuse(guild)
+                return None, False
+            self._drop(self._pop(NOTIFY, max(notify, key=lambda g: len(notify[g]))))
+        elif guild is not None and self._guild_sizes[guild] >= config.OUTBOUND_GUILD_MAX_QUEUE:
+            # This guild's backlog is full: it sheds its own oldest notification or the new call
+            if priority == NOTIFY or guild not in self._lanes[NOTIFY]:
+                self._refuse(guild)
+                return None, False
+            self._drop(self._pop(NOTIFY, guild))
+
+        future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never read the outcome; don't warn about it
+        future.add_done_callback(_consume)
+        lanes = self._lanes[priority]
+        lane = lanes.get(guild)
+        if lane is None:
+            lane = lanes[guild] = collections.deque()
+        lane.append(_Job(bucket, guild, factory, priority, key, now + delay, now, future))
+        self._counts[priority] += 1
+        self._guild_sizes[guild] += 1
+        if key is not None:
+            self._pending_keys[key] = future
+            if window:
+                self._recent_keys[key] = now + delay + window
+        self._wakeup.set()
+        return future, True
+
+    def _pop(self, priority, guild):
+        lanes = self._lanes[priority]
+        lane = lanes[guild]
+        job = lane.popleft()
+        if not lane:
+            del lanes[guild]
+        self._dequeued(job)
+        return job
+
+    def _dequeued(self, job):
+        self._counts[job.priority] -= 1
+        self._guild_sizes[job.guild] -= 1
+        if not self._guild_sizes[job.guild]:
+            del self._guild_sizes[job.guild]
+
+    def _refuse(self, guild):
+        self.dropped += 1
+        if self.usage is not None and guild is not None:
+            self.usage.get(guild).dropped += 1
+
+    def _drop(self, job):
+        self._refuse(job.guild)
+        self._finish(job)
+        job.future.cancel()
+
+    def _finish(self, job):
+        if job.key is not None and self._pending_keys.get(job.key) is job.future:
+            del self._pending_keys[job.key]
+
+    def _bucket(self, bucket):
+        state = self._buckets.get(bucket)
+        if state is None:
+            capacity, per = config.OUTBOUND_BUDGETS.get(bucket[0], config.OUTBOUND_DEFAULT_BUDGET)
+            state = self._buckets[bucket] = TokenBucket(capacity, per)
+        return state
+
+    def _guild_bucket(self, guild):
+        if guild is None:
+            return None
+        state = self._guild_buckets.get(guild)
+        if state is None:
+            state = self._guild_buckets[guild] = TokenBucket(*config.OUTBOUND_GUILD_BUDGET)
+        return state
+
+    def _schedule(self, now):
+        """Dispatch every job whose budget allows it; return seconds to the next try"""
+        next_try = None
+        global_wait = self._global.wait_time(now)
+        tight = self._global.tokens < self._global.capacity * config.OUTBOUND_RESERVE
+
+        for priority, lanes in enumerate(self._lanes):
+            if priority == NOTIFY and tight:
+                # Budget is tight: keep it for enforcement, shed stale notices
+                for guild in list(lanes):
+                    lane = lanes[guild]
+                    while guild in lanes and now - lane[0].created > config.OUTBOUND_NOTIFY_MAX_AGE:
+                        self._drop(self._pop(NOTIFY, guild))
+                if lanes:
+                    wait = 1.0 / self._global.rate
+                    next_try = wait if next_try is None else min(next_try, wait)
+                continue
+
+            # Weighted round-robin: each round, every guild still able to
+            # send dispatches up to its weight. Guilds that run out of jobs
+            # or budget sit out the remaining rounds of this pass, and jobs
+            # held back by their bucket are set aside so they are not
+            # rescanned every round.
+            held = {}
+            active = list(lanes)
+            while active and global_wait <= 0:
+                still_active = []
+                for guild in active:
+                    lane = lanes[guild]
+                    guild_bucket = self._guild_bucket(guild)
+                    quota = config.GUILD_WEIGHTS.get(guild, 1)
+                    sent = 0
+                    while lane and sent < quota and global_wait <= 0:
+                        wait = guild_bucket.wait_time(now) if guild_bucket is not None else 0
+                        if wait > 0:
+                            next_try = wait if next_try is None else min(next_try, wait)
+                            break
+                        job = lane.popleft()
+                        if job.future.cancelled():
+                            # Withdrawn by the caller before it was sent
+                            self._dequeued(job)
+                            self._finish(job)
+                            continue
+                        if job.not_before > now:
+                            wait = job.not_before - now
+                        else:
+                            wait = self._bucket(job.bucket).wait_time(now)
+                        if wait > 0:
+                            held.setdefault(guild, []).append(job)
+                            next_try = wait if next_try is None else min(next_try, wait)
+                            continue
+
+                        self._bucket(job.bucket).take()
+                        self._global.take()
+                        if guild_bucket is not None:
+                            guild_bucket.take()
+                        global_wait = self._global.wait_time(now)
+                        self._dequeued(job)
+                        if self.usage is not None and guild is not None:
+                            self.usage.get(guild).calls += 1
+                        task = asyncio.create_task(self._dispatch(job))
+                        self._running.add(task)
+                        task.add_done_callback(self._running.discard)
+                        sent += 1
+                    if sent:
+                        # Served guilds go to the back for the next pass
+                        lanes.move_to_end(guild)
+                    if sent == quota and lane:
+                        still_active.append(guild)
+                active = still_active
+
+            for guild, jobs in held.items():
+                lanes[guild].extendleft(reversed(jobs))
+            for guild in [g for g, lane in lanes.items() if not lane]:
+                del lanes[guild]
+            if lanes and global_wait > 0:
+                next_try = global_wait if next_try is None else min(next_try, global_wait)
+
+        self._prune_recent(now)
+        return next_try
+
+    def _prune_recent(self, now):
+        if len(self._recent_keys) > config.OUTBOUND_MAX_QUEUE:
+            self._recent_keys = {k: v for k, v in self._recent_keys.items() if v > now}
+
+    async def _dispatch(self, job):
+        self._finish(job)
+        try:
+            result = await job.factory()
+        except Exception as e:
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                self._bucket(job.bucket).exhaust(getattr(e, "retry_after", None) or 1.0)
+            logger.debug("Outbound call %s failed: %s", job.bucket[0], e)
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.dispatched += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            wait = self._schedule(time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
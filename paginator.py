@@ -0,0 +1,104 @@
+import asyncio
+import collections
+import discord
+import config
+
+# Open paginators, oldest first; bounded so abandoned views can't pile up
+_open = collections.OrderedDict()
+
+
+class Paginator(discord.ui.View):
+    """Button-driven paginator that renders one page at a time
+
+    `render_page(page)` is an async callable returning `(embed, has_next)`
+    for a zero-based page number. Only the current page is ever built, so
+    callers can render from a slice (or a query) of the underlying data.
+    Views expire after config.PAGINATOR_TIMEOUT seconds, and at most
+    config.PAGINATOR_MAX_OPEN stay open; the oldest is closed to make room.
+    """
+
+    def __init__(self, author, render_page, timeout=None):
+        super().__init__(timeout=timeout or config.PAGINATOR_TIMEOUT)
+        self.author = author
+        self.render_page = render_page
+        self.page = 0
+        self.has_next = False
+        self.message = None
+
+    @classmethod
+    def from_sequence(cls, author, items, per_page, build_embed, timeout=None):
+        """Paginate a sequence, passing `build_embed(page_items, page, page_count)` one slice"""
+        async def render_page(page):
+            page_count = max(1, -(-len(items) // per_page))
+            page = min(page, page_count - 1)
+            embed = build_embed(items[page * per_page:(page + 1) * per_page], page, page_count)
+            return embed, page + 1 < page_count
+
+        return cls(author, render_page, timeout=timeout)
+
+    async def start(self, ctx):
+        """Send the first page, attaching buttons only if there is more than one"""
+        embed, self.has_next = await self.render_page(0)
+        if not self.has_next:
+            self.stop()
+            return await ctx.send(embed=embed)
+
+        self._update_buttons()
+        self.message = await ctx.send(embed=embed, view=self)
+        self._register()
+        return self.message
+
+    def _register(self):
+        _open[id(self)] = self
+        while len(_open) > config.PAGINATOR_MAX_OPEN:
+            _, oldest = _open.popitem(last=False)
+            asyncio.ensure_future(oldest.close())
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+        self.page_label.label = f"Page {self.page + 1}"
+
+    async def close(self):
+        """Stop listening and disable the buttons"""
+        _open.pop(id(self), None)
+        self.stop()
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    async def on_timeout(self):
+        await self.close()
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("Only the person who ran this command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction, page):
+        embed, has_next = await self.render_page(page)
+        self.page, self.has_next = page, has_next
+        self._update_buttons()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self._show(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(label="Page 1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def page_label(self, interaction, button):
+        pass
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self._show(interaction, self.page + 1)
+
+    @discord.ui.button(label="✖", style=discord.ButtonStyle.danger)
+    async def close_button(self, interaction, button):
+        await interaction.response.defer()
+        await self.close()
@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+from discord.ext import commands
+import config
+
+logger = logging.getLogger("bot.policy")
+
+# Settings an admin can change per channel (or category), besides "exempt"
+FLAGS = ("spam", "mentions", "badwords", "links")
+THRESHOLDS = ("spam_threshold", "mention_limit")
+
+
+class Policy:
+    """Auto-mod settings in effect for one channel"""
+
+    __slots__ = ("spam", "mentions", "badwords", "links", "spam_threshold", "mention_limit")
+
+    def __init__(self, spam=True, mentions=True, badwords=True, links=True, spam_threshold=None, mention_limit=None):
+        self.spam = spam
+        self.mentions = mentions
+        self.badwords = badwords
+        self.links = links
+        self.spam_threshold = spam_threshold or config.SPAM_THRESHOLD
+        self.mention_limit = mention_limit or config.MENTION_MESSAGE_LIMIT
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(**{k: v for k, v in settings.items() if k in cls.__slots__})
+
+
+DEFAULT_POLICY = Policy()
+
+
+class _GuildTable:
+    """Precomputed lookups for one guild"""
+
+    __slots__ = ("channels", "bypass_roles", "everyone_bypasses")
+
+    def __init__(self, channels, bypass_roles, everyone_bypasses):
+        self.channels = channels  # channel_id -> Policy, None when exempt
+        self.bypass_roles = bypass_roles  # role IDs whose members skip auto-mod
+        self.everyone_bypasses = everyone_bypasses
+
+
+class AutomodPolicies(commands.Cog):
+    """Per-guild auto-mod exemptions and channel overrides
+
+    Settings (channel or category -> policy, role -> bypass) are stored in
+    config.AUTOMOD_POLICY_FILE. Each guild's settings are compiled into a
+    table on first use: every channel's effective policy, with category
+    settings inherited, and the set of roles that bypass auto-mod, which
+    also includes every role granting Manage Messages or Administrator.
+    Role, channel and settings changes drop the table, so resolving a
+    message is a couple of dict and set lookups instead of recomputing the
+    author's guild permissions.
+    """
+
+    def __init__(self, bot, path=None):
+        self.bot = bot
+        self.path = path or config.AUTOMOD_POLICY_FILE
+        self.settings = self._load()  # guild_id -> {"channels": {id: settings}, "bypass_roles": [id]}
+        self._tables = {}
+
+    # Settings storage
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to read auto-mod policies from %s: %s", self.path, e)
+            return {}
+        return {
+            int(guild_id): {
+                "channels": {int(cid): s for cid, s in guild.get("channels", {}).items()},
+                "bypass_roles": [int(rid) for rid in guild.get("bypass_roles", [])],
+            }
+            for guild_id, guild in data.items()
+        }
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.settings, f)
+        os.replace(tmp_path, self.path)
+
+    def guild_settings(self, guild_id):
+        return self.settings.setdefault(guild_id, {"channels": {}, "bypass_roles": []})
+
+    def set_channel(self, guild_id, channel_id, name, value):
+        """Set one channel setting; a value of None restores the default"""
+        channel = self.guild_settings(guild_id)["channels"].setdefault(channel_id, {})
+        if value is None:
+            channel.pop(name, None)
+        else:
+            channel[name] = value
+        if not channel:
+            del self.guild_settings(guild_id)["channels"][channel_id]
+        self._save()
+        self.invalidate(guild_id)
+
+    def toggle_bypass(self, guild_id, role_id):
+        """Toggle auto-mod bypass for a role; return True if it now bypasses"""
+        roles = self.guild_settings(guild_id)["bypass_roles"]
+        if role_id in roles:
+            roles.remove(role_id)
+            enabled = False
+        else:
+            roles.append(role_id)
+            enabled = True
+        self._save()
+        self.invalidate(guild_id)
+        return enabled
+
+    # Compiled tables
+
+    def invalidate(self, guild_id):
+        self._tables.pop(guild_id, None)
+
+    def _compile(self, guild):
+        settings = self.settings.get(guild.id, {"channels": {}, "bypass_roles": []})
+        overrides = settings["channels"]
+
+        channels = {}
+        for channel in guild.channels:
+            merged = dict(overrides.get(channel.category_id, {})) if channel.category_id else {}
+            merged.update(overrides.get(channel.id, {}))
+            if not merged:
+                continue
+            channels[channel.id] = None if merged.get("exempt") else Policy.from_settings(merged)
+
+        bypass_roles = set(settings["bypass_roles"])
+        for role in guild.roles:
+            permissions = role.permissions
+            if permissions.administrator or permissions.manage_messages:
+                bypass_roles.add(role.id)
+
+        table = self._tables[guild.id] = _GuildTable(channels, frozenset(bypass_roles), guild.default_role.id in bypass_roles)
+        return table
+
+    def resolve(self, message):
+        """Return the Policy for a guild message, or None if auto-mod should skip it"""
+        guild = message.guild
+        table = self._tables.get(guild.id) or self._compile(guild)
+
+        author = message.author
+        if table.everyone_bypasses or author.id == guild.owner_id:
+            return None
+        # Member._roles holds the author's role IDs without building Role objects
+        if not table.bypass_roles.isdisjoint(getattr(author, "_roles", ())):
+            return None
+
+        channel = message.channel
+        policy = table.channels.get(channel.id, DEFAULT_POLICY)
+        if policy is DEFAULT_POLICY and getattr(channel, "parent_id", None):
+            # Threads follow their parent channel
+            policy = table.channels.get(channel.parent_id, DEFAULT_POLICY)
+        return policy
+
+    # Invalidation
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions:
+            self.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.category_id != after.category_id:
+            self.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        settings = self.settings.get(channel.guild.id)
+        if settings and settings["channels"].pop(channel.id, None) is not None:
+            self._save()
+        self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.invalidate(guild.id)
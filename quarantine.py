@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import discord
+import clocks
+import config
+import outbound
+
+logger = logging.getLogger("bot.quarantine")
+
+
+class _PendingAdd:
+    __slots__ = ("member", "future", "sent")
+
+    def __init__(self, member, future):
+        self.member = member
+        self.future = future
+        self.sent = False  # The call has left the outbound queue
+
+
+class QuarantineManager:
+    """Verification-gate raid mode
+
+    Instead of editing every channel, each member who joins during a raid
+    gets the quarantine role: one role add per member, queued through the
+    outbound scheduler so adds are rate-limited per guild. Raid mode ends
+    config.RAID_VERIFICATION_DURATION seconds after the last raid join,
+    and everyone still holding the role is released in bulk from the
+    role's own member list rather than a scan of the whole guild. Adds
+    still queued at release are withdrawn, and ones already sent are
+    followed by a removal, so nobody is left quarantined after a raid.
+    """
+
+    def __init__(self, bot, outbound_queue, on_release=None, clock=None):
+        self.bot = bot
+        self.outbound = outbound_queue
+        self.clock = clock or clocks.SYSTEM
+        self.on_release = on_release  # async callback(guild, released count) when raid mode ends by itself
+        self._until = {}  # guild_id -> monotonic time raid mode ends
+        self._timers = {}  # guild_id -> release task
+        self._role_locks = {}
+        self._adds = {}  # guild_id -> {member_id: _PendingAdd}
+
+    def active(self, guild_id, now=None):
+        return self._until.get(guild_id, 0) > (now if now is not None else self.clock.monotonic())
+
+    async def get_role(self, guild):
+        """Find the quarantine role, creating and configuring it once if missing"""
+        role = discord.utils.get(guild.roles, name=config.QUARANTINE_ROLE_NAME)
+        if role is not None:
+            return role
+
+        lock = self._role_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            role = discord.utils.get(guild.roles, name=config.QUARANTINE_ROLE_NAME)
+            if role is not None:
+                return role
+
+            role = await guild.create_role(
+                name=config.QUARANTINE_ROLE_NAME,
+                permissions=discord.Permissions.none(),
+                reason="Raid protection quarantine role"
+            )
+            # One-time setup: the role can read but not talk anywhere
+            overwrite = discord.PermissionOverwrite(
+                send_messages=False,
+                add_reactions=False,
+                create_public_threads=False,
+                send_messages_in_threads=False,
+                speak=False
+            )
+            calls = [
+                self.outbound.submit(
+                    ("channel_edit", channel.id),
+                    lambda channel=channel: channel.set_permissions(role, overwrite=overwrite, reason="Quarantine role setup"),
+                    priority=outbound.ENFORCE,
+                    guild=guild.id
+                )[0]
+                for channel in guild.channels
+            ]
+            # The role only restricts anyone once the overwrites exist, so they go before the first add
+            calls = [call for call in calls if call is not None]
+            if calls:
+                await asyncio.wait(calls)
+            logger.info("Created quarantine role in %s", guild.name)
+            return role
+
+    async def start(self, guild, members, now=None):
+        """Enter (or extend) raid mode and quarantine `members`"""
+        now = now if now is not None else self.clock.monotonic()
+        was_active = self.active(guild.id, now)
+        self._until[guild.id] = now + config.RAID_VERIFICATION_DURATION
+        if guild.id not in self._timers:
+            self._timers[guild.id] = asyncio.create_task(self._release_when_over(guild))
+
+        role = await self.get_role(guild)
+        for member in members:
+            self.add(member, role)
+        return not was_active
+
+    def add(self, member, role):
+        """Queue the quarantine role for one member"""
+        guild_id = member.guild.id
+        if role in member.roles or member.id in self._adds.get(guild_id, ()):
+            return
+
+        async def add_role():
+            entry.sent = True
+            return await member.add_roles(role, reason="Joined during a raid")
+
+        future, is_new = self.outbound.submit(
+            ("role", guild_id),
+            add_role,
+            priority=outbound.ENFORCE,
+            key=("quarantine", guild_id, member.id),
+            guild=guild_id
+        )
+        if not is_new:
+            return
+        entry = self._adds.setdefault(guild_id, {})[member.id] = _PendingAdd(member, future)
+        future.add_done_callback(lambda _: self._add_done(guild_id, member.id, entry))
+
+    def _add_done(self, guild_id, member_id, entry):
+        pending = self._adds.get(guild_id)
+        if pending is not None and pending.get(member_id) is entry:
+            del pending[member_id]
+            if not pending:
+                del self._adds[guild_id]
+
+    async def release(self, guild):
+        """Leave raid mode and remove the quarantine role from everyone holding it"""
+        self._until.pop(guild.id, None)
+        timer = self._timers.pop(guild.id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        # Withdraw adds still queued; ones already sent are undone once they land
+        in_flight = []
+        for entry in self._adds.pop(guild.id, {}).values():
+            if entry.sent:
+                in_flight.append(entry)
+            else:
+                entry.future.cancel()
+
+        role = discord.utils.get(guild.roles, name=config.QUARANTINE_ROLE_NAME)
+        if role is None:
+            return 0
+
+        members = list(role.members)
+        holders = {member.id for member in members}
+        for entry in in_flight:
+            if entry.member.id not in holders:
+                members.append(entry.member)
+        waits = {entry.member.id: entry.future for entry in in_flight}
+
+        for member in members:
+            async def remove_role(member=member, added=waits.get(member.id)):
+                if added is not None:
+                    await asyncio.wait([added])
+                return await member.remove_roles(role, reason="Raid ended")
+
+            self.outbound.submit(
+                ("role", guild.id),
+                remove_role,
+                priority=outbound.ENFORCE,
+                key=("release", guild.id, member.id),
+                guild=guild.id
+            )
+        logger.info("Releasing %d quarantined members in %s", len(members), guild.name)
+        return len(members)
+
+    async def _release_when_over(self, guild):
+        while True:
+            remaining = self._until.get(guild.id, 0) - self.clock.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+        released = await self.release(guild)
+        if self.on_release is not None:
+            try:
+                await self.on_release(guild, released)
+            except Exception as e:
+                logger.error("Raid release callback failed: %s", e)
+
+    async def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import os
+import re
+import struct
+from discord.ext import commands
+import config
+
+logger = logging.getLogger("bot.recorder")
+
+# File layout: MAGIC, then one record per event, each a RECORD header
+# followed by `content length` bytes of UTF-8 content
+MAGIC = b"MBEV1\n"
+RECORD = struct.Struct("<BBHdQQQI")  # kind, flags, mention count, time, guild, channel, author, content length
+MESSAGE, JOIN = 1, 2
+EVERYONE, ATTACHMENTS = 1, 2
+
+MENTION_PATTERN = re.compile(r"<(@[!&]?|#)[0-9]+>")
+
+
+class EventRecorder(commands.Cog):
+    """Append sanitized message and join events to config.RECORD_EVENTS_FILE
+
+    IDs are replaced by a keyed hash that is consistent within one process
+    and cannot be reversed, mention markup loses its IDs, and content is
+    cut to config.RECORD_MAX_CONTENT characters. Records go through a
+    buffered append-only file; replay.py feeds them back through the
+    Moderation cog.
+    """
+
+    def __init__(self, bot, path=None):
+        self.bot = bot
+        self.path = path or config.RECORD_EVENTS_FILE
+        self._salt = os.urandom(16)
+        self._ids = {}
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "ab", buffering=1 << 16)
+        if new:
+            self._file.write(MAGIC)
+        self.recorded = 0
+
+    async def cog_unload(self):
+        self._file.close()
+
+    def _pseudonym(self, snowflake):
+        value = self._ids.get(snowflake)
+        if value is None:
+            if len(self._ids) > 100000:
+                self._ids.clear()
+            digest = hashlib.blake2b(snowflake.to_bytes(8, "little"), digest_size=8, key=self._salt).digest()
+            value = self._ids[snowflake] = int.from_bytes(digest, "little") >> 1
+        return value
+
+    @staticmethod
+    def sanitize(content):
+        return MENTION_PATTERN.sub(lambda m: f"<{m.group(1)}>", content[:config.RECORD_MAX_CONTENT])
+
+    def _write(self, kind, flags, mentions, created, guild_id, channel_id, author_id, content=""):
+        data = content.encode("utf-8", "replace")
+        self._file.write(RECORD.pack(
+            kind, flags, min(mentions, 0xFFFF), created,
+            self._pseudonym(guild_id), self._pseudonym(channel_id) if channel_id else 0,
+            self._pseudonym(author_id), len(data),
+        ))
+        self._file.write(data)
+        self.recorded += 1
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+        flags = (EVERYONE if message.mention_everyone else 0) | (ATTACHMENTS if message.attachments else 0)
+        mentions = len(message.mentions) + len(message.role_mentions)
+        content = self.sanitize(message.content) if config.RECORD_MAX_CONTENT else ""
+        self._write(MESSAGE, flags, mentions, message.created_at.timestamp(),
+                    message.guild.id, message.channel.id, message.author.id, content)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self._write(JOIN, 0, 0, member.joined_at.timestamp() if member.joined_at else 0.0,
+                    member.guild.id, 0, member.id)
+
+
+def read_events(path):
+    """Yield (kind, flags, mentions, time, guild, channel, author, content) from a recording"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an event recording")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return  # End of file, or a record cut short by a crash
+            kind, flags, mentions, created, guild_id, channel_id, author_id, length = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield kind, flags, mentions, created, guild_id, channel_id, author_id, data.decode("utf-8", "replace")
@@ -0,0 +1,264 @@
+"""Replay a recorded event stream through the Moderation cog
+
+    python replay.py events.bin [--speed N] [--actions actions.txt]
+
+Events are fed to the cog's on_message and on_member_join handlers
+with a clocks.SimulatedClock pinned to each event's recorded time, so
+detection windows see the original traffic shape however fast the
+replay runs. Discord API calls are not made: outbound calls and direct
+channel/member calls are counted, and every logged moderation action is
+written to the actions file with its virtual time, so two runs can be
+diffed.
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import time
+import discord
+import clocks
+import commands as cmd_module
+import config
+import recorder
+import state
+
+
+class ReplaySink:
+    """Stands in for the outbound queue, the audit log and the Discord API"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = collections.Counter()
+        self.actions = []
+
+    # Outbound queue
+
+    def submit(self, bucket, factory, priority=None, key=None, window=0, delay=0, guild=None):
+        self.calls[bucket[0]] += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future, True
+
+    def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    # Audit log
+
+    def record(self, guild_id, action, target_id=None, target=None, moderator_id=None,
+               reason=None, duration=None, created_at=None):
+        self.actions.append(f"{self.clock.wall():.3f}\t{guild_id}\t{action}\t{target}\t{reason or ''}")
+
+    # Direct API calls
+
+    def direct(self, name):
+        self.calls[name] += 1
+
+
+class ReplayRole:
+    def __init__(self, role_id, name="@everyone"):
+        self.id = role_id
+        self.name = name
+        self.permissions = discord.Permissions.none()
+        self.members = []
+
+    def is_default(self):
+        return self.name == "@everyone"
+
+
+class ReplayMember:
+    bot = False
+    name = ""  # Names and avatars aren't recorded, so join scoring only sees the ID
+    avatar = "recorded"
+
+    def __init__(self, member_id, guild, sink):
+        self.id = member_id
+        self.guild = guild
+        self._sink = sink
+        self._roles = ()
+        self.roles = []
+        self.guild_permissions = discord.Permissions.none()
+        self.mention = f"<@{member_id}>"
+
+    def __str__(self):
+        return f"user-{self.id}"
+
+    async def add_roles(self, *roles, reason=None):
+        self._sink.direct("add_roles")
+
+
+class ReplayChannel:
+    category_id = None
+    parent_id = None
+
+    def __init__(self, channel_id, guild, sink):
+        self.id = channel_id
+        self.guild = guild
+        self.name = f"channel-{channel_id}"
+        self.mention = f"<#{channel_id}>"
+        self._sink = sink
+
+    def permissions_for(self, member):
+        return discord.Permissions.all()
+
+    def overwrites_for(self, target):
+        return discord.PermissionOverwrite()
+
+    async def set_permissions(self, target, *, overwrite=None, reason=None, **kwargs):
+        self._sink.direct("set_permissions")
+
+    async def send(self, *args, **kwargs):
+        self._sink.direct("channel_send")
+
+
+class ReplayGuild:
+    def __init__(self, guild_id, sink):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.owner_id = 0
+        self._sink = sink
+        self.default_role = ReplayRole(guild_id)
+        self.roles = [self.default_role]
+        self.channel_map = {}
+        self.me = ReplayMember(0, self, sink)
+
+    @property
+    def channels(self):
+        return list(self.channel_map.values())
+
+    @property
+    def text_channels(self):
+        return list(self.channel_map.values())
+
+    def channel(self, channel_id):
+        channel = self.channel_map.get(channel_id)
+        if channel is None:
+            channel = self.channel_map[channel_id] = ReplayChannel(channel_id, self, self._sink)
+        return channel
+
+    async def create_role(self, name=None, **kwargs):
+        self._sink.direct("create_role")
+        role = ReplayRole(len(self.roles) + 1, name)
+        self.roles.append(role)
+        return role
+
+
+class ReplayMessage:
+    def __init__(self, message_id, author, guild, channel, content, mentions, everyone):
+        self.id = message_id
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.content = content
+        self.mentions = [None] * mentions
+        self.role_mentions = []
+        self.mention_everyone = everyone
+        self.attachments = []
+
+    async def delete(self):
+        pass
+
+
+class ReplayBot:
+    def __init__(self):
+        self.user = ReplayMember(0, None, None)
+
+    def get_cog(self, name):
+        return None
+
+    def get_channel(self, channel_id):
+        return None
+
+
+def build_cog(clock, sink):
+    """A Moderation cog with in-memory state and every side effect routed to `sink`"""
+    cog = cmd_module.Moderation(ReplayBot(), clock=clock)
+    # Never shared state or snapshot files, whatever config.STATE_BACKEND says
+    cog.state = state.MemoryStateBackend(clock=clock)
+    cog.outbound = sink
+    cog.audit_log = sink
+    cog.quarantine.outbound = sink
+    cog.lockdowns.outbound = sink
+    cog.notifier.outbound = sink
+    return cog
+
+
+async def settle(cog):
+    """Wait for the cog's background follow-ups, including ones they start"""
+    while cog.follow_ups:
+        await asyncio.wait(list(cog.follow_ups))
+
+
+async def replay(path, speed=0.0):
+    """Feed a recording through a fresh cog; return (sink, events, wall seconds)"""
+    clock = clocks.SimulatedClock()
+    sink = ReplaySink(clock)
+    cog = build_cog(clock, sink)
+    guilds = {}
+    members = {}
+    events = 0
+    first = None
+    started = time.perf_counter()
+
+    for kind, flags, mentions, created, guild_id, channel_id, author_id, content in recorder.read_events(path):
+        if speed > 0:
+            # Keep recorded gaps, divided by the speed-up
+            if first is None:
+                first = (created, time.perf_counter())
+            delay = (created - first[0]) / speed - (time.perf_counter() - first[1])
+            if delay > 0:
+                await asyncio.sleep(delay)
+        clock.now = created
+
+        guild = guilds.get(guild_id)
+        if guild is None:
+            guild = guilds[guild_id] = ReplayGuild(guild_id, sink)
+        member = members.get((guild_id, author_id))
+        if member is None:
+            member = members[(guild_id, author_id)] = ReplayMember(author_id, guild, sink)
+
+        if kind == recorder.MESSAGE:
+            events += 1
+            message = ReplayMessage(events, member, guild, guild.channel(channel_id), content,
+                                    mentions, bool(flags & recorder.EVERYONE))
+            await cog.on_message(message)
+        elif kind == recorder.JOIN:
+            events += 1
+            await cog.on_member_join(member)
+        # Announcements and log entries follow enforcement in the background;
+        # let them run at this event's time, before the clock moves on
+        await settle(cog)
+
+    await cog.quarantine.close()
+    return sink, events, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded events through the Moderation cog")
+    parser.add_argument("path", help="Recording made with RECORD_EVENTS_FILE")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Speed-up over recorded time (0 replays as fast as possible)")
+    parser.add_argument("--actions", help="Write logged moderation actions to this file")
+    args = parser.parse_args()
+
+    # Replays never touch the real audit database, state snapshot or lockdown state
+    config.STATE_BACKEND = "memory"
+    config.MOD_LOG_CHANNEL = None
+    config.LOCKDOWN_STATE_FILE = None
+    logging.disable(logging.WARNING)
+
+    sink, events, elapsed = asyncio.run(replay(args.path, args.speed))
+
+    print(f"{events} events in {elapsed:.2f}s ({events / elapsed if elapsed else 0:.0f} events/s)")
+    print(f"{len(sink.actions)} moderation actions")
+    for name, count in sorted(sink.calls.items()):
+        print(f"  {name}: {count}")
+    if args.actions:
+        with open(args.actions, "w", encoding="utf-8") as f:
+            f.write("\n".join(sink.actions) + ("\n" if sink.actions else ""))
+
+
+if __name__ == "__main__":
+    main()
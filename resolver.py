@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import re
+import time
+import discord
+from discord.ext import commands
+import config
+
+logger = logging.getLogger("bot.resolver")
+
+ID_PATTERN = re.compile(r"<@!?([0-9]{15,20})>$|([0-9]{15,20})$")
+
+
+class MemberCache(commands.Cog):
+    """Per-guild member name indexes, negative caching and coalesced fetches
+
+    Name and nickname indexes are built lazily the first time a guild is
+    searched and kept current from member events afterwards, so name
+    lookups are a dict hit instead of a scan of the member list. Each name
+    keeps every member holding it, so one of them leaving or renaming
+    doesn't hide the others. IDs that could not be found are remembered
+    for a short TTL, and concurrent fetches for the same ID share one HTTP
+    request.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._names = {}  # guild_id -> {lowered name: {member_id: None}, in indexing order}
+        self._missing = {}  # lookup key -> expiry (monotonic)
+        self._inflight = {}  # lookup key -> task
+
+    def sizes(self):
+        """Entry counts for health reporting"""
+        return {
+            "indexed_guilds": len(self._names),
+            "missing": len(self._missing),
+            "inflight": len(self._inflight),
+        }
+
+    # Index maintenance
+
+    @staticmethod
+    def _keys(member):
+        keys = {member.name.lower(), str(member).lower()}
+        if member.global_name:
+            keys.add(member.global_name.lower())
+        if member.nick:
+            keys.add(member.nick.lower())
+        return keys
+
+    def _index(self, guild):
+        index = self._names.get(guild.id)
+        if index is None:
+            index = {}
+            for member in guild.members:
+                for key in self._keys(member):
+                    index.setdefault(key, {})[member.id] = None
+            self._names[guild.id] = index
+        return index
+
+    def _add(self, member):
+        index = self._names.get(member.guild.id)
+        if index is not None:
+            for key in self._keys(member):
+                index.setdefault(key, {})[member.id] = None
+        self._forget_missing(member.guild.id, member.id)
+
+    @staticmethod
+    def _unindex(index, keys, member_id):
+        for key in keys:
+            holders = index.get(key)
+            if holders is not None:
+                holders.pop(member_id, None)
+                if not holders:
+                    del index[key]
+
+    def _remove(self, member):
+        index = self._names.get(member.guild.id)
+        if index is not None:
+            self._unindex(index, self._keys(member), member.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self._add(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self._remove(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.nick != after.nick or before.name != after.name or before.global_name != after.global_name:
+            self._remove(before)
+            self._add(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        if before.name == after.name and before.global_name == after.global_name:
+            return
+        for guild_id in list(self._names):
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(after.id) if guild else None
+            if member is None:
+                continue
+            keys = (before.name.lower(), str(before).lower(), (before.global_name or "").lower())
+            self._unindex(self._names[guild_id], keys, after.id)
+            self._add(member)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self._names.pop(guild.id, None)
+
+    # Negative cache and request coalescing
+
+    def _is_missing(self, key):
+        expiry = self._missing.get(key)
+        if expiry is None:
+            return False
+        if expiry < time.monotonic():
+            del self._missing[key]
+            return False
+        return True
+
+    def _mark_missing(self, key):
+        if len(self._missing) >= config.RESOLVER_NEGATIVE_MAX:
+            now = time.monotonic()
+            self._missing = {k: v for k, v in self._missing.items() if v >= now}
+            if len(self._missing) >= config.RESOLVER_NEGATIVE_MAX:
+                self._missing.clear()
+        self._missing[key] = time.monotonic() + config.RESOLVER_NEGATIVE_TTL
+
+    def _forget_missing(self, guild_id, user_id):
+        self._missing.pop(("member", guild_id, user_id), None)
+        self._missing.pop(("user", user_id), None)
+
+    async def _coalesce(self, key, factory):
+        """Run `factory` once for all concurrent callers asking for `key`"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, factory):
+        if self._is_missing(key):
+            return None
+        try:
+            result = await self._coalesce(key, factory)
+        except (discord.NotFound, discord.Forbidden):
+            result = None
+        except discord.HTTPException as e:
+            logger.warning("Lookup %s failed: %s", key, e)
+            return None
+        if result is None:
+            self._mark_missing(key)
+        return result
+
+    # Lookups
+
+    def lookup_cached(self, guild, user_id):
+        """Find a member or user already in the client cache, without HTTP"""
+        return guild.get_member(user_id) or self.bot.get_user(user_id)
+
+    async def get_member(self, guild, user_id):
+        """Get a member from cache, fetching it (once) if it is not cached"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        return await self._fetch(("member", guild.id, user_id), lambda: guild.fetch_member(user_id))
+
+    async def get_user(self, user_id):
+        """Get a user from cache, fetching it (once) if it is not cached"""
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+        return await self._fetch(("user", user_id), lambda: self.bot.fetch_user(user_id))
+
+    async def find_member(self, guild, argument):
+        """Resolve a mention, ID, name, global name or nickname to a member"""
+        match = ID_PATTERN.match(argument)
+        if match:
+            return await self.get_member(guild, int(match.group(1) or match.group(2)))
+
+        for member_id in self._index(guild).get(argument.lower(), ()):
+            member = guild.get_member(member_id)
+            if member is not None:
+                return member
+
+        if guild.chunked:
+            return None
+
+        # Members may be missing from a guild that was never chunked
+        async def query():
+            members = await guild.query_members(argument, limit=1, cache=True)
+            return members[0] if members else None
+
+        return await self._fetch(("query", guild.id, argument.lower()), query)
+
+
+class CachedMember(commands.Converter):
+    """Member converter backed by the MemberCache indexes"""
+
+    async def convert(self, ctx, argument):
+        cache = ctx.bot.get_cog("MemberCache")
+        if cache is None or ctx.guild is None:
+            return await commands.MemberConverter().convert(ctx, argument)
+
+        member = await cache.find_member(ctx.guild, argument)
+        if member is None:
+            raise commands.MemberNotFound(argument)
+        return member
+
+
+class CachedMemberOrUser(commands.Converter):
+    """Resolve to a member when possible, otherwise to any Discord user by ID"""
+
+    async def convert(self, ctx, argument):
+        cache = ctx.bot.get_cog("MemberCache")
+        if cache is None or ctx.guild is None:
+            return await commands.UserConverter().convert(ctx, argument)
+
+        member = await cache.find_member(ctx.guild, argument)
+        if member is not None:
+            return member
+
+        match = ID_PATTERN.match(argument)
+        user = await cache.get_user(int(match.group(1) or match.group(2))) if match else None
+        if user is None:
+            raise commands.UserNotFound(argument)
+        return user
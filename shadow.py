@@ -0,0 +1,151 @@
+import logging
+import time
+import automod
+import blocklist
+import config
+
+logger = logging.getLogger("bot.shadow")
+
+RULES = ("spam", "mentions", "badwords")
+SPAM, MENTIONS, BADWORDS = 1, 2, 4
+
+# config names a shadow rule set may override
+SETTINGS = (
+    "SPAM_THRESHOLD", "SPAM_INTERVAL", "MENTION_MESSAGE_LIMIT", "MENTION_RATE_LIMIT",
+    "MENTION_INTERVAL", "MENTION_EVERYONE_WEIGHT", "BAD_WORDS",
+)
+
+
+class RuleSet:
+    """Auto-mod thresholds evaluated on a message without acting on it
+
+    Settings not overridden follow the live config and channel policy;
+    without a BAD_WORDS override, bad words are those the guild's live
+    blocklist matcher finds. Windows use automod.RollingCounter estimates
+    so a rule set costs a few dict operations per message.
+    """
+
+    def __init__(self, name, overrides=None):
+        overrides = overrides or {}
+        for key in overrides:
+            if key not in SETTINGS:
+                logger.warning("Shadow rule set %s: unknown setting %s", name, key)
+        self.name = name
+        self.spam_threshold = overrides.get("SPAM_THRESHOLD")
+        self.mention_limit = overrides.get("MENTION_MESSAGE_LIMIT")
+        self.mention_rate = overrides.get("MENTION_RATE_LIMIT", config.MENTION_RATE_LIMIT)
+        self.everyone_weight = overrides.get("MENTION_EVERYONE_WEIGHT", config.MENTION_EVERYONE_WEIGHT)
+        self.bad_words = None  # blocklist.Matcher, or None to use the live one
+        if "BAD_WORDS" in overrides:
+            self.bad_words = blocklist.Matcher(frozenset(filter(None, map(blocklist.normalize, overrides["BAD_WORDS"]))))
+        self.spam = automod.RollingCounter(overrides.get("SPAM_INTERVAL", config.SPAM_INTERVAL))
+        self.mentions = automod.RollingCounter(overrides.get("MENTION_INTERVAL", config.MENTION_INTERVAL))
+
+    def evaluate(self, parsed, live_words):
+        """Return a bitmask of the rules that would act on `parsed`
+
+        `live_words` is the blocklist.Matcher enforced in the message's guild.
+        """
+        policy = parsed.policy
+        hits = 0
+
+        if policy.spam:
+            key = (parsed.author_id, parsed.channel_id)
+            if self.spam.add(key, 1, parsed.created) >= (self.spam_threshold or policy.spam_threshold):
+                self.spam.reset(key)
+                hits |= SPAM
+
+        if policy.mentions and (parsed.mention_count or parsed.mentions_everyone):
+            weight = automod.mention_weight(parsed, self.everyone_weight)
+            key = (parsed.guild_id, parsed.author_id)
+            total = self.mentions.add(key, weight, parsed.created)
+            if weight >= (self.mention_limit or policy.mention_limit) or total >= self.mention_rate:
+                self.mentions.reset(key)
+                hits |= MENTIONS
+
+        if policy.badwords:
+            if (self.bad_words or live_words).search(parsed.content_lower) is not None:
+                hits |= BADWORDS
+
+        return hits
+
+
+class GuildStats:
+    """Shadow counters for one guild"""
+
+    __slots__ = ("messages", "skipped", "cpu", "counts")
+
+    def __init__(self, candidates):
+        self.messages = 0
+        self.skipped = 0  # Messages not evaluated because the CPU budget was spent
+        self.cpu = 0.0
+        # Per candidate, per rule: [live hits, shadow hits, both]
+        self.counts = [[[0, 0, 0] for _ in RULES] for _ in range(candidates)]
+
+
+class ShadowEvaluator:
+    """Run candidate rule sets next to the live ones and count where they differ
+
+    The live settings are evaluated by the same estimator as the
+    candidates, so differences come from the settings rather than from
+    how they are measured. Evaluation is capped at config.SHADOW_CPU_BUDGET
+    of one CPU per config.SHADOW_BUDGET_WINDOW; past that, messages are
+    skipped (and counted) until the next window.
+    """
+
+    def __init__(self, rulesets, budget=None, window=None):
+        self.baseline = RuleSet("live")
+        self.candidates = [RuleSet(name, overrides) for name, overrides in rulesets.items()]
+        self.budget = budget if budget is not None else config.SHADOW_CPU_BUDGET
+        self.window = window if window is not None else config.SHADOW_BUDGET_WINDOW
+        self.stats = {}  # guild_id -> GuildStats
+        self.started = time.monotonic()
+        self._window_start = time.perf_counter()
+        self._spent = 0.0
+
+    @classmethod
+    def from_config(cls):
+        if not config.SHADOW_RULESETS:
+            return None
+        return cls(config.SHADOW_RULESETS)
+
+    def guild_stats(self, guild_id):
+        stats = self.stats.get(guild_id)
+        if stats is None:
+            stats = self.stats[guild_id] = GuildStats(len(self.candidates))
+        return stats
+
+    def observe(self, parsed, live_words):
+        """Evaluate every rule set on `parsed`; `live_words` is the guild's live blocklist.Matcher"""
+        stats = self.guild_stats(parsed.guild_id)
+        start = time.perf_counter()
+        if start - self._window_start >= self.window:
+            self._window_start = start
+            self._spent = 0.0
+        elif self._spent >= self.budget * self.window:
+            stats.skipped += 1
+            return
+
+        live = self.baseline.evaluate(parsed, live_words)
+        for counts, candidate in zip(stats.counts, self.candidates):
+            shadow = candidate.evaluate(parsed, live_words)
+            if not (live or shadow):
+                continue
+            for bit, rule in enumerate(counts):
+                mask = 1 << bit
+                in_live = live & mask
+                in_shadow = shadow & mask
+                if in_live:
+                    rule[0] += 1
+                if in_shadow:
+                    rule[1] += 1
+                if in_live and in_shadow:
+                    rule[2] += 1
+        stats.messages += 1
+
+        elapsed = time.perf_counter() - start
+        self._spent += elapsed
+        stats.cpu += elapsed
+
+    def reset(self, guild_id):
+        self.stats.pop(guild_id, None)
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import signal
+import time
+
+logger = logging.getLogger("bot.shutdown")
+
+
+class ShutdownCoordinator:
+    """Stop the bot cleanly on SIGTERM or SIGINT
+
+    Every cog with a `prepare_shutdown(timeout)` coroutine is asked to stop
+    taking new events and finish in-flight work, all within one shared
+    deadline. The bot is then closed, which unloads the cogs so they can
+    flush their stores.
+    """
+
+    def __init__(self, bot, timeout):
+        self.bot = bot
+        self.timeout = timeout
+        self._task = None
+
+    @property
+    def closing(self):
+        return self._task is not None
+
+    def install(self):
+        """Register signal handlers on the running loop"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.request, sig.name)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows; Ctrl+C still ends asyncio.run
+                pass
+
+    def request(self, reason="requested"):
+        if self._task is None:
+            self._task = asyncio.create_task(self.shutdown(reason))
+
+    async def shutdown(self, reason):
+        logger.info("Shutting down (%s)", reason)
+        deadline = time.monotonic() + self.timeout
+
+        for name, cog in list(self.bot.cogs.items()):
+            prepare = getattr(cog, "prepare_shutdown", None)
+            if prepare is None:
+                continue
+            remaining = max(deadline - time.monotonic(), 0)
+            try:
+                await asyncio.wait_for(prepare(remaining), timeout=remaining)
+            except asyncio.TimeoutError:
+                logger.warning("%s did not finish draining before the shutdown deadline", name)
+            except Exception as e:
+                logger.error("Error preparing %s for shutdown: %s", name, e)
+
+        await self.bot.close()
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import logging
+import os
+import shlex
+from typing import Optional
+import discord
+from discord import app_commands
+from discord.ext import commands
+import config
+import policy
+
+logger = logging.getLogger("bot.slash")
+
+
+class SlashCommands(commands.Cog):
+    """Slash command versions of the moderation, info and config commands
+
+    Each slash command builds a Context from the interaction and runs the
+    matching prefix command's callback, so both paths share one
+    implementation. Slow commands defer first so Discord's 3 second
+    response deadline never applies to them.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def invoke(self, interaction, name, *args, defer=False, **kwargs):
+        """Run the prefix command `name` for an interaction"""
+        if defer:
+            await interaction.response.defer(thinking=True)
+        ctx = await commands.Context.from_interaction(interaction)
+        command = self.bot.get_command(name)
+        await command(ctx, *args, **kwargs)
+
+    async def cog_app_command_error(self, interaction, error):
+        if isinstance(error, app_commands.MissingPermissions):
+            perms = [perm.replace('_', ' ').title() for perm in error.missing_permissions]
+            description = f"You're missing the following permissions: {', '.join(perms)}"
+        elif isinstance(error, app_commands.BotMissingPermissions):
+            perms = [perm.replace('_', ' ').title() for perm in error.missing_permissions]
+            description = f"I'm missing the following permissions: {', '.join(perms)}"
+        elif isinstance(error, app_commands.CommandOnCooldown):
+            description = f"This command is on cooldown. Try again in {error.retry_after:.1f} seconds."
+        elif isinstance(error, app_commands.NoPrivateMessage):
+            description = "This command cannot be used in private messages."
+        else:
+            logger.error("Unhandled slash command error: %s", error, exc_info=error)
+            description = "An unexpected error occurred. Please try again later."
+
+        embed = discord.Embed(title="Error", description=description, color=config.COLORS["error"])
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Moderation
+
+    @app_commands.command(name="kick", description="Kick a member from the server")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(kick_members=True)
+    @app_commands.checks.has_permissions(kick_members=True)
+    @app_commands.checks.cooldown(1, config.KICK_COMMAND_COOLDOWN)
+    async def kick(self, interaction, member: discord.Member, reason: Optional[str] = None):
+        await self.invoke(interaction, "kick", member, reason=reason)
+
+    @app_commands.command(name="ban", description="Ban a member from the server")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.checks.has_permissions(ban_members=True)
+    @app_commands.checks.cooldown(1, config.BAN_COMMAND_COOLDOWN)
+    async def ban(self, interaction, member: discord.User, reason: Optional[str] = None):
+        await self.invoke(interaction, "ban", member, reason=reason)
+
+    @app_commands.command(name="mute", description="Mute a member in the server")
+    @app_commands.describe(duration="Duration in seconds")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def mute(self, interaction, member: discord.Member, duration: Optional[int] = None, reason: Optional[str] = None):
+        await self.invoke(interaction, "mute", member, duration, reason=reason)
+
+    @app_commands.command(name="unmute", description="Unmute a member in the server")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def unmute(self, interaction, member: discord.Member, reason: Optional[str] = None):
+        await self.invoke(interaction, "unmute", member, reason=reason)
+
+    @app_commands.command(name="warn", description="Warn a member in the server")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def warn(self, interaction, member: discord.Member, reason: Optional[str] = None):
+        # Reaching the warning limit chains into a mute, kick or ban
+        await self.invoke(interaction, "warn", member, reason=reason, defer=True)
+
+    @app_commands.command(name="warnings", description="View warnings for a member")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def warnings(self, interaction, member: discord.Member):
+        await self.invoke(interaction, "warnings", member)
+
+    @app_commands.command(name="clearwarn", description="Clear warnings for a member (specific warning or all)")
+    @app_commands.describe(index="Warning number to remove, leave empty to clear all")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def clearwarn(self, interaction, member: discord.Member, index: Optional[int] = None):
+        await self.invoke(interaction, "clearwarn", member, index)
+
+    @app_commands.command(name="purge", description="Purge messages from a channel")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def purge(self, interaction, amount: app_commands.Range[int, 1, 1000], member: Optional[discord.Member] = None):
+        await self.invoke(interaction, "purge", amount, member, defer=True)
+
+    @app_commands.command(name="lockdown", description="Lock down a channel or the current channel")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def lockdown(self, interaction, channel: Optional[discord.TextChannel] = None, reason: Optional[str] = None):
+        await self.invoke(interaction, "lockdown", channel, reason=reason, defer=True)
+
+    @app_commands.command(name="unlock", description="Unlock a channel or the current channel")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def unlock(self, interaction, channel: Optional[discord.TextChannel] = None, reason: Optional[str] = None):
+        await self.invoke(interaction, "unlock", channel, reason=reason, defer=True)
+
+    @app_commands.command(name="unlockall", description="Unlock every channel the bot locked")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def unlockall(self, interaction, reason: Optional[str] = None):
+        await self.invoke(interaction, "unlockall", reason=reason, defer=True)
+
+    @app_commands.command(name="endraid", description="End raid verification mode and release quarantined members")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def endraid(self, interaction, reason: Optional[str] = None):
+        await self.invoke(interaction, "endraid", reason=reason, defer=True)
+
+    modlog = app_commands.Group(
+        name="modlog",
+        description="Search the moderation audit log",
+        guild_only=True,
+        default_permissions=discord.Permissions(manage_messages=True)
+    )
+
+    @modlog.command(name="search", description="Search moderation actions by user, moderator, action and age")
+    @app_commands.checks.has_permissions(manage_messages=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def modlog_search(self, interaction, user: Optional[discord.User] = None, moderator: Optional[discord.User] = None,
+                            action: Optional[str] = None, days: Optional[app_commands.Range[int, 1, 3650]] = None):
+        filters = []
+        if user:
+            filters.append(f"user:{user.id}")
+        if moderator:
+            filters.append(f"mod:{moderator.id}")
+        if action:
+            filters.append(f"action:{action}")
+        if days:
+            filters.append(f"days:{days}")
+        await self.invoke(interaction, "modlog search", filters=shlex.join(filters), defer=True)
+
+    # Information
+
+    @app_commands.command(name="userinfo", description="Show information about a user")
+    @app_commands.guild_only()
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def userinfo(self, interaction, member: Optional[discord.Member] = None):
+        await self.invoke(interaction, "userinfo", member)
+
+    @app_commands.command(name="serverinfo", description="Show information about the server")
+    @app_commands.guild_only()
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def serverinfo(self, interaction):
+        await self.invoke(interaction, "serverinfo")
+
+    @app_commands.command(name="ping", description="Check the bot's latency")
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def ping(self, interaction):
+        await self.invoke(interaction, "ping")
+
+    @app_commands.command(name="avatar", description="Show a user's avatar")
+    @app_commands.guild_only()
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def avatar(self, interaction, member: Optional[discord.Member] = None):
+        await self.invoke(interaction, "avatar", member)
+
+    @app_commands.command(name="botinfo", description="Show information about the bot")
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def botinfo(self, interaction):
+        await self.invoke(interaction, "botinfo")
+
+    # Configuration
+
+    @app_commands.command(name="prefix", description="View or change the bot's prefix")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def prefix(self, interaction, new_prefix: Optional[str] = None):
+        await self.invoke(interaction, "prefix", new_prefix)
+
+    @app_commands.command(name="setlogchannel", description="Set the moderation log channel")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def setlogchannel(self, interaction, channel: discord.TextChannel):
+        await self.invoke(interaction, "setlogchannel", channel)
+
+    @app_commands.command(name="toggleantispam", description="Toggle the anti-spam feature")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def toggleantispam(self, interaction):
+        await self.invoke(interaction, "toggleantispam")
+
+    @app_commands.command(name="toggleraid", description="Toggle the anti-raid feature")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def toggleraid(self, interaction):
+        await self.invoke(interaction, "toggleraid")
+
+    automod = app_commands.Group(
+        name="automod",
+        description="Per-channel auto-mod overrides and bypass roles",
+        guild_only=True,
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
+    @automod.command(name="show", description="Show auto-mod channel overrides and bypass roles")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def automod_show(self, interaction):
+        await self.invoke(interaction, "automod")
+
+    @automod.command(name="channel", description="Override an auto-mod setting for a channel or category")
+    @app_commands.describe(value="on/off for filters and exempt, a number for thresholds, or default")
+    @app_commands.choices(setting=[
+        app_commands.Choice(name=name, value=name) for name in ("exempt", *policy.FLAGS, *policy.THRESHOLDS)
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def automod_channel(self, interaction, channel: discord.abc.GuildChannel, setting: str, value: str):
+        await self.invoke(interaction, "automod channel", channel, setting, value)
+
+    @automod.command(name="bypass", description="Toggle whether a role bypasses auto-mod")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def automod_bypass(self, interaction, role: discord.Role):
+        await self.invoke(interaction, "automod bypass", role)
+
+    blocklist = app_commands.Group(
+        name="blocklist",
+        description="Words blocked in this server",
+        guild_only=True,
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
+    @blocklist.command(name="show", description="Show the words blocked in this server")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def blocklist_show(self, interaction):
+        await self.invoke(interaction, "blocklist")
+
+    @blocklist.command(name="add", description="Block a word or phrase in this server")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def blocklist_add(self, interaction, word: str):
+        await self.invoke(interaction, "blocklist add", word)
+
+    @blocklist.command(name="remove", description="Unblock a word or phrase in this server")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    async def blocklist_remove(self, interaction, word: str):
+        await self.invoke(interaction, "blocklist remove", word)
+
+
+def _tree_hash(tree):
+    payload = sorted((command.to_dict() for command in tree.get_commands()), key=lambda c: c["name"])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def sync_command_tree(bot):
+    """Sync application commands with Discord only when the tree has changed
+
+    A hash of the command payload is stored per application in
+    config.SLASH_SYNC_STATE_FILE, so restarts with an unchanged tree make
+    no sync request at all.
+    """
+    digest = _tree_hash(bot.tree)
+    app_id = str(bot.application_id)
+
+    synced = {}
+    if os.path.exists(config.SLASH_SYNC_STATE_FILE):
+        try:
+            with open(config.SLASH_SYNC_STATE_FILE, encoding="utf-8") as f:
+                synced = json.load(f)
+        except (OSError, ValueError):
+            synced = {}
+
+    if synced.get(app_id) == digest:
+        logger.info("Application commands unchanged, skipping sync")
+        return False
+
+    commands_synced = await bot.tree.sync()
+    synced[app_id] = digest
+    tmp_path = config.SLASH_SYNC_STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(synced, f)
+    os.replace(tmp_path, config.SLASH_SYNC_STATE_FILE)
+    logger.info("Synced %d application commands", len(commands_synced))
+    return True
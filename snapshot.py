@@ -0,0 +1,210 @@
+import array
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+
+logger = logging.getLogger("bot.snapshot")
+
+# File layout (little-endian, every array 8-byte aligned):
+#   header     magic, version, written_at, namespace count, extra length
+#   extra      JSON bytes for anything that is not a detection window
+#   namespace  name length, key width, window, key count, event count, name
+#              then `width` columns of key_count uint64 key parts (rows sorted),
+#              key_count + 1 uint64 offsets into the timestamps,
+#              event_count float64 timestamps
+MAGIC = b"MBSS"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxdII")
+NAMESPACE = struct.Struct("<HBxxxxxdQQ")
+
+
+def _pad(n):
+    return -n % 8
+
+
+def _le(arr):
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def write(path, windows, written_at, extra=None):
+    """Write detection windows to `path` atomically
+
+    `windows` maps namespace -> (window seconds, [(key, timestamps)]), where
+    every key in a namespace is a non-negative int or a tuple of the same
+    number of them. Namespaces with other keys are skipped.
+    """
+    extra_bytes = json.dumps(extra or {}).encode()
+    sections = []
+    for namespace, (window, entries) in windows.items():
+        section = _pack_namespace(namespace, window, entries)
+        if section is not None:
+            sections.append(section)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, written_at, len(sections), len(extra_bytes)))
+        f.write(extra_bytes + b"\0" * _pad(len(extra_bytes)))
+        for section in sections:
+            for part in section:
+                f.write(part)
+    os.replace(tmp_path, path)
+
+
+def _pack_namespace(namespace, window, entries):
+    if not entries:
+        return None
+    first = entries[0][0]
+    width = len(first) if isinstance(first, tuple) else 1
+
+    columns = [array.array("Q") for _ in range(width)]
+    offsets = array.array("Q", [0])
+    timestamps = array.array("d")
+    try:
+        for key, events in sorted(entries, key=lambda e: e[0]):
+            parts = key if width > 1 else (key,)
+            if len(parts) != width:
+                raise TypeError("mixed key widths")
+            for column, part in zip(columns, parts):
+                column.append(part)
+            timestamps.extend(events)
+            offsets.append(len(timestamps))
+    except (TypeError, OverflowError) as e:
+        logger.warning("Not snapshotting %s windows: keys are not fixed-width integers (%s)", namespace, e)
+        return None
+
+    name = namespace.encode()
+    parts = [
+        NAMESPACE.pack(len(name), width, window, len(offsets) - 1, len(timestamps)),
+        name + b"\0" * _pad(len(name)),
+    ]
+    parts.extend(_le(column).tobytes() for column in columns)
+    parts.append(_le(offsets).tobytes())
+    parts.append(_le(timestamps).tobytes())
+    return parts
+
+
+class _Rows:
+    """Sequence view of multi-part keys, for bisect"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __getitem__(self, i):
+        return tuple(column[i] for column in self.columns)
+
+
+class _Namespace:
+    def __init__(self, width, window, columns, offsets, timestamps):
+        self.width = width
+        self.window = window
+        self.keys = columns[0] if width == 1 else _Rows(columns)
+        self.offsets = offsets
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class Snapshot:
+    """A snapshot file mapped into memory
+
+    Opening only reads the headers; the arrays stay in the page cache and
+    keys are found by binary search, so startup cost does not grow with
+    the number of keys.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self._file.close()
+            raise ValueError("empty snapshot")
+        self._view = memoryview(self._map)
+        self._views = []
+        self.namespaces = {}
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, path):
+        """Map `path`, or return None if it is missing or unreadable"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Ignoring unreadable snapshot %s: %s", path, e)
+            return None
+
+    def _array(self, offset, fmt, count):
+        end = offset + count * 8
+        if end > len(self._view):
+            raise ValueError("truncated snapshot")
+        view = self._view[offset:end].cast(fmt)
+        self._views.append(view)
+        if sys.byteorder != "little":
+            # Rare enough to not be worth a zero-copy path
+            view = _le(array.array(fmt, view))
+        return view, end
+
+    def _parse(self):
+        magic, version, self.written_at, count, extra_len = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a snapshot file")
+        offset = HEADER.size
+        self.extra = json.loads(bytes(self._view[offset:offset + extra_len]) or b"{}")
+        offset += extra_len + _pad(extra_len)
+
+        for _ in range(count):
+            name_len, width, window, keys, events = NAMESPACE.unpack_from(self._view, offset)
+            offset += NAMESPACE.size
+            name = bytes(self._view[offset:offset + name_len]).decode()
+            offset += name_len + _pad(name_len)
+            columns = []
+            for _ in range(width):
+                column, offset = self._array(offset, "Q", keys)
+                columns.append(column)
+            offsets, offset = self._array(offset, "Q", keys + 1)
+            timestamps, offset = self._array(offset, "d", events)
+            self.namespaces[name] = _Namespace(width, window, columns, offsets, timestamps)
+
+    def lookup(self, namespace, key):
+        """Return the saved timestamps for `key`, or None"""
+        ns = self.namespaces.get(namespace)
+        if ns is None or not len(ns):
+            return None
+        i = bisect.bisect_left(ns.keys, key)
+        if i == len(ns) or ns.keys[i] != key:
+            return None
+        return ns.timestamps[ns.offsets[i]:ns.offsets[i + 1]]
+
+    def expires_at(self):
+        """Wall time after which no saved event is inside its window"""
+        return self.written_at + max((ns.window for ns in self.namespaces.values()), default=0)
+
+    def close(self):
+        self.namespaces = {}
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
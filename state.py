@@ -0,0 +1,552 @@
+import asyncio
+import collections
+import datetime
+import json
+import logging
+import sys
+import urllib.parse
+import clocks
+import config
+import snapshot
+
+logger = logging.getLogger("bot.state")
+
+
+class WarningRecord:
+    """One warning: reason, moderator ID and epoch seconds
+
+    Slotted, and the reason is interned so the handful of stock reasons
+    ("No reason provided", auto-mod reasons) are stored once rather than
+    once per warning.
+    """
+
+    __slots__ = ("reason", "mod", "time")
+
+    def __init__(self, reason, mod, time):
+        self.reason = sys.intern(reason)
+        self.mod = mod
+        self.time = int(time)
+
+    def to_dict(self):
+        return {"reason": self.reason, "mod": self.mod, "time": self.time}
+
+    @classmethod
+    def from_dict(cls, data):
+        created = data["time"]
+        if isinstance(created, str):
+            # Written before warnings stored epoch seconds
+            created = datetime.datetime.fromisoformat(created).timestamp()
+        return cls(data["reason"], data["mod"], created)
+
+
+class StateBackend:
+    """Storage for detection windows and warnings
+
+    Window counters are synchronous because they sit on the per-message
+    path; implementations that share state across processes must answer
+    from local data and sync in the background. Window timestamps are
+    `clock.monotonic()` seconds. Warning operations are async and only
+    used by commands.
+    """
+
+    clock = clocks.SYSTEM
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def stop_snapshots(self):
+        """Stop periodic snapshots and wait for one being written"""
+
+    def hit(self, namespace, key, now, window):
+        """Record an event for `key` and return how many fell within `window` seconds"""
+        raise NotImplementedError
+
+    def reset(self, namespace, key):
+        """Forget all events recorded for `key`"""
+        raise NotImplementedError
+
+    async def add_warning(self, guild_id, user_id, warning):
+        """Store a WarningRecord and return the member's new warning count"""
+        raise NotImplementedError
+
+    async def get_warnings(self, guild_id, user_id):
+        raise NotImplementedError
+
+    async def remove_warning(self, guild_id, user_id, index):
+        """Remove and return the warning at `index`, or None if there is none"""
+        raise NotImplementedError
+
+    async def clear_warnings(self, guild_id, user_id):
+        raise NotImplementedError
+
+    def snapshot(self):
+        """Capture process-local state worth carrying over a restart
+
+        Returns (windows, extra) for snapshot.write, or None if the state
+        lives elsewhere.
+        """
+        return None
+
+    def restore(self, snap):
+        """Warm-start from a snapshot.Snapshot written by an earlier process"""
+        snap.close()
+
+    def sizes(self):
+        """Entry counts for health reporting; must be cheap"""
+        return {}
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local state, exact sliding windows
+
+    Snapshots store wall-clock times, converted from and back to the
+    monotonic clock when written and restored.
+    """
+
+    SWEEP_EVERY = 10000
+
+    def __init__(self, snapshot_path=None, clock=None):
+        self.clock = clock or clocks.SYSTEM
+        self.windows = {}  # (namespace, key) -> deque of monotonic timestamps
+        self.warnings = {}  # guild_id -> {user_id: [WarningRecord]}
+        self.snapshot_path = snapshot_path
+        self._namespace_windows = {}
+        self._hits = 0
+        self._restored = None  # snapshot.Snapshot read lazily until its events expire
+        self._restored_until = 0  # monotonic
+        self._restored_offset = 0.0  # wall minus monotonic when restored
+        self._restored_reset = set()  # keys reset since the restore
+        self._task = None
+        self._writing = None  # Periodic snapshot write running in a thread
+
+    async def start(self):
+        if self.snapshot_path and config.STATE_SNAPSHOT_INTERVAL and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def sizes(self):
+        return {
+            "windows": len(self.windows),
+            "warned_guilds": len(self.warnings),
+            "restored": self._restored is not None,
+        }
+
+    async def close(self):
+        await self.stop_snapshots()
+        self._drop_restored()
+
+    async def stop_snapshots(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Cancelling doesn't stop the thread, and it writes to the same temporary file as a final save
+        if self._writing is not None:
+            await asyncio.wait([self._writing])
+            if self._writing.exception() is not None:
+                logger.warning("Periodic state snapshot failed: %s", self._writing.exception())
+            self._writing = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(config.STATE_SNAPSHOT_INTERVAL)
+            try:
+                windows, extra = self.snapshot()
+                self._writing = asyncio.ensure_future(
+                    asyncio.to_thread(snapshot.write, self.snapshot_path, windows, self.clock.wall(), extra)
+                )
+                await asyncio.shield(self._writing)
+                self._writing = None
+            except Exception as e:
+                self._writing = None
+                logger.warning("Periodic state snapshot failed: %s", e)
+
+    def hit(self, namespace, key, now, window):
+        events = self.windows.get((namespace, key))
+        if events is None:
+            events = self.windows[(namespace, key)] = self._take_restored(namespace, key, now)
+        events.append(now)
+
+        # Clear old events (older than the window)
+        cutoff = now - window
+        while events[0] < cutoff:
+            events.popleft()
+
+        self._namespace_windows[namespace] = window
+        self._hits += 1
+        if self._hits >= self.SWEEP_EVERY:
+            self._sweep(now)
+        return len(events)
+
+    def _take_restored(self, namespace, key, now):
+        """Start a window from the snapshot's events for `key`, if any are left"""
+        if self._restored is None:
+            return collections.deque()
+        if now > self._restored_until:
+            self._drop_restored()
+            return collections.deque()
+        if (namespace, key) in self._restored_reset:
+            return collections.deque()
+        saved = self._restored.lookup(namespace, key)
+        if saved is None:
+            return collections.deque()
+        offset = self._restored_offset
+        return collections.deque(t - offset for t in saved)
+
+    def _drop_restored(self):
+        if self._restored is not None:
+            self._restored.close()
+            self._restored = None
+            self._restored_reset.clear()
+
+    def _sweep(self, now):
+        """Drop keys whose newest event has left their window"""
+        self._hits = 0
+        if self._restored is not None and now > self._restored_until:
+            self._drop_restored()
+        stale = [
+            k for k, events in self.windows.items()
+            if not events or events[-1] < now - self._namespace_windows.get(k[0], 0)
+        ]
+        for k in stale:
+            del self.windows[k]
+
+    def reset(self, namespace, key):
+        self.windows.pop((namespace, key), None)
+        if self._restored is not None:
+            self._restored_reset.add((namespace, key))
+
+    async def add_warning(self, guild_id, user_id, warning):
+        user_warnings = self.warnings.setdefault(guild_id, {}).setdefault(user_id, [])
+        user_warnings.append(warning)
+        return len(user_warnings)
+
+    async def get_warnings(self, guild_id, user_id):
+        return self.warnings.get(guild_id, {}).get(user_id, [])
+
+    async def remove_warning(self, guild_id, user_id, index):
+        user_warnings = self.warnings.get(guild_id, {}).get(user_id, [])
+        if 0 <= index < len(user_warnings):
+            return user_warnings.pop(index)
+        return None
+
+    async def clear_warnings(self, guild_id, user_id):
+        self.warnings.get(guild_id, {}).pop(user_id, None)
+
+    def snapshot(self):
+        offset = self.clock.wall() - self.clock.monotonic()
+        windows = {}
+        for (namespace, key), events in self.windows.items():
+            if events:
+                entries = windows.setdefault(namespace, (self._namespace_windows.get(namespace, 0), []))[1]
+                entries.append((key, tuple(t + offset for t in events)))
+        if self._restored is not None:
+            # Carry over restored windows nothing has touched yet (already wall times)
+            now = self.clock.wall()
+            for namespace, ns in self._restored.namespaces.items():
+                entries = windows.setdefault(namespace, (ns.window, []))[1]
+                for i in range(len(ns)):
+                    key = ns.keys[i]
+                    if (namespace, key) in self.windows or (namespace, key) in self._restored_reset:
+                        continue
+                    events = [t for t in ns.timestamps[ns.offsets[i]:ns.offsets[i + 1]] if t >= now - ns.window]
+                    if events:
+                        entries.append((key, events))
+        warnings = {
+            str(guild_id): {str(user_id): [w.to_dict() for w in entries] for user_id, entries in users.items() if entries}
+            for guild_id, users in self.warnings.items()
+        }
+        return windows, {"warnings": warnings}
+
+    def restore(self, snap):
+        # Windows are read from the mapped file on first use, so a large
+        # snapshot costs nothing up front
+        self._drop_restored()
+        if snap.namespaces and snap.expires_at() > self.clock.wall():
+            self._restored = snap
+            self._restored_offset = self.clock.wall() - self.clock.monotonic()
+            self._restored_until = snap.expires_at() - self._restored_offset
+            for namespace, ns in snap.namespaces.items():
+                self._namespace_windows.setdefault(namespace, ns.window)
+        else:
+            snap.close()
+        for guild_id, users in snap.extra.get("warnings", {}).items():
+            guild_warnings = self.warnings.setdefault(int(guild_id), {})
+            for user_id, entries in users.items():
+                guild_warnings.setdefault(int(user_id), []).extend(WarningRecord.from_dict(w) for w in entries)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    """Minimal RESP client: one connection, pipelined commands"""
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            for reply in await self._roundtrip(setup):
+                if isinstance(reply, RedisError):
+                    # Don't leave an unauthenticated connection for the next call to use
+                    await self.close()
+                    raise reply
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            return RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply type {kind!r}")
+
+    async def _roundtrip(self, commands):
+        self._writer.write(b"".join(self._encode(c) for c in commands))
+        await self._writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def pipeline(self, commands):
+        """Send all commands in one write and return their replies in order"""
+        if not commands:
+            return []
+        async with self._lock:
+            if self._writer is None:
+                await self._connect()
+            try:
+                return await self._roundtrip(commands)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                await self.close()
+                raise
+
+    async def execute(self, *args):
+        reply = (await self.pipeline([args]))[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+
+class RedisStateBackend(StateBackend):
+    """State shared between processes through a Redis-protocol server
+
+    Windows are split into config.STATE_WINDOW_SLOTS fixed slots, each a
+    Redis counter. Slots are aligned on wall-clock time so every process
+    agrees on them; monotonic timestamps are shifted by an offset that is
+    re-read from the clock on every flush. `hit` answers from the last
+    totals Redis reported plus increments not yet sent; a background task
+    pipelines pending increments every config.STATE_FLUSH_INTERVAL
+    seconds and reads back the cross-process totals from the INCRBY
+    replies. Detection therefore never waits on the network, and lags
+    other processes by one flush.
+    """
+
+    def __init__(self, url, prefix="modbot", clock=None):
+        self.conn = RedisConnection(url)
+        self.prefix = prefix
+        self.clock = clock or clocks.SYSTEM
+        self._offset = self.clock.wall() - self.clock.monotonic()
+        self._known = {}  # slot key -> total reported by Redis
+        self._pending = collections.Counter()  # slot key -> increments not yet sent
+        self._deletes = set()
+        self._watched = {}  # slot key -> time it leaves every window that read it
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def sizes(self):
+        return {
+            "slots": len(self._known),
+            "pending_increments": len(self._pending),
+            "pending_deletes": len(self._deletes),
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Failed to flush counters to Redis: %s", e)
+        await self.conn.close()
+
+    def _key(self, *parts):
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def _slot_keys(self, namespace, key, now, window):
+        key = ":".join(map(str, key)) if isinstance(key, tuple) else key
+        width = window / config.STATE_WINDOW_SLOTS
+        current = int(now // width)
+        first = int((now - window) // width) + 1
+        return [self._key(namespace, key, int(window * 1000), slot) for slot in range(first, current + 1)]
+
+    def hit(self, namespace, key, now, window):
+        now += self._offset
+        slots = self._slot_keys(namespace, key, now, window)
+        # A pending DEL from reset() stays: the flush sends it before the INCRBY
+        self._pending[slots[-1]] += 1
+        # Keep refreshing these slots while they can still count towards this window
+        expiry = now + window
+        for slot in slots:
+            self._watched[slot] = expiry
+        return sum(self._known.get(slot, 0) + self._pending.get(slot, 0) for slot in slots)
+
+    def reset(self, namespace, key):
+        key = ":".join(map(str, key)) if isinstance(key, tuple) else key
+        prefix = self._key(namespace, key) + ":"
+        for slot in [s for s in list(self._known) + list(self._pending) if s.startswith(prefix)]:
+            self._known.pop(slot, None)
+            self._pending.pop(slot, None)
+            self._deletes.add(slot)
+
+    async def flush(self):
+        """Send pending increments and deletes, and refresh watched totals, in one pipeline"""
+        if not self._pending and not self._deletes and not self._watched:
+            return
+        pending, self._pending = self._pending, collections.Counter()
+        deletes, self._deletes = self._deletes, set()
+        now = self.clock.wall()
+        self._offset = now - self.clock.monotonic()
+        self._watched = {slot: expiry for slot, expiry in self._watched.items() if expiry > now}
+
+        commands = [("DEL", *deletes)] if deletes else []
+        slots = list(pending)
+        for slot in slots:
+            commands.append(("INCRBY", slot, pending[slot]))
+            commands.append(("EXPIRE", slot, config.STATE_COUNTER_TTL))
+        # Pick up increments other processes made to slots we only read
+        refresh = [slot for slot in self._watched if slot not in pending and slot not in deletes]
+        if refresh:
+            commands.append(("MGET", *refresh))
+
+        try:
+            replies = await self.conn.pipeline(commands)
+        except Exception:
+            # Put the work back so the next flush retries it
+            self._pending.update(pending)
+            self._deletes |= deletes
+            raise
+
+        replies = replies[1:] if deletes else replies
+        for slot, reply in zip(slots, replies[:2 * len(slots):2]):
+            if isinstance(reply, int):
+                self._known[slot] = reply
+        if refresh and isinstance(replies[-1], list):
+            for slot, reply in zip(refresh, replies[-1]):
+                self._known[slot] = int(reply) if reply is not None else 0
+
+        if len(self._known) > config.STATE_MAX_KEYS:
+            # Only slots touched in this flush are still interesting
+            self._known = {slot: self._known[slot] for slot in slots if slot in self._known}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(config.STATE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Redis counter flush failed: %s", e)
+
+    async def add_warning(self, guild_id, user_id, warning):
+        return await self.conn.execute("RPUSH", self._key("warn", guild_id, user_id), json.dumps(warning.to_dict()))
+
+    async def get_warnings(self, guild_id, user_id):
+        entries = await self.conn.execute("LRANGE", self._key("warn", guild_id, user_id), 0, -1)
+        return [WarningRecord.from_dict(json.loads(entry)) for entry in entries or []]
+
+    async def remove_warning(self, guild_id, user_id, index):
+        key = self._key("warn", guild_id, user_id)
+        # Mark the entry, then remove the marker; other entries keep their order
+        removed, _, _ = await self.conn.pipeline([
+            ("LINDEX", key, index),
+            ("LSET", key, index, "__removed__"),
+            ("LREM", key, 1, "__removed__"),
+        ])
+        if removed is None or isinstance(removed, RedisError):
+            return None
+        return WarningRecord.from_dict(json.loads(removed))
+
+    async def clear_warnings(self, guild_id, user_id):
+        await self.conn.execute("DEL", self._key("warn", guild_id, user_id))
+
+
+def save_snapshot(backend, path):
+    """Write the backend's snapshot to `path`; return False if it has none"""
+    data = backend.snapshot()
+    if data is None:
+        return False
+    windows, extra = data
+    snapshot.write(path, windows, backend.clock.wall(), extra)
+    return True
+
+
+def load_snapshot(backend, path):
+    """Warm-start the backend from a snapshot written by an earlier process"""
+    snap = snapshot.Snapshot.open(path)
+    if snap is None:
+        return False
+    backend.restore(snap)
+    return True
+
+
+def create_backend(clock=None):
+    """Build the state backend selected in config"""
+    if config.STATE_BACKEND == "redis":
+        return RedisStateBackend(config.STATE_REDIS_URL, prefix=config.STATE_REDIS_PREFIX, clock=clock)
+    return MemoryStateBackend(snapshot_path=config.STATE_SNAPSHOT_FILE, clock=clock)
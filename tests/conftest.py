@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the bot's top-level modules the same way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """Keep every file the bot writes inside the test's temporary directory"""
+    monkeypatch.setattr(config, "STATE_BACKEND", "memory")
+    monkeypatch.setattr(config, "MOD_LOG_CHANNEL", None)
+    monkeypatch.setattr(config, "AUDIT_DB_PATH", str(tmp_path / "audit.db"))
+    monkeypatch.setattr(config, "STATE_SNAPSHOT_FILE", str(tmp_path / "state.snapshot"))
+    monkeypatch.setattr(config, "LOCKDOWN_STATE_FILE", str(tmp_path / "lockdown_state.json"))
+    monkeypatch.setattr(config, "BLOCKLIST_FILE", str(tmp_path / "blocklists.json"))
+    monkeypatch.setattr(config, "RECORD_EVENTS_FILE", None)
+    return tmp_path
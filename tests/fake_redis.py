@@ -0,0 +1,139 @@
+"""In-process Redis-protocol server for the RedisStateBackend tests
+
+Speaks enough RESP for the commands state.py sends, keeps every value in
+a dict and records what each connection received, so tests can check
+pipelining, inject error replies and drop connections.
+"""
+import asyncio
+
+
+class FakeRedis:
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}  # key -> bytes counter/value or list of bytes
+        self.ttl = {}  # key -> seconds from the last EXPIRE
+        self.batches = []  # Commands parsed from each read, as lists of tuples
+        self.errors = {}  # command name -> error text to reply with instead
+        self.connections = 0
+        self._writers = set()
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    @property
+    def url(self):
+        port = self._server.sockets[0].getsockname()[1]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{port}/0"
+
+    def drop_connections(self):
+        for writer in self._writers:
+            writer.close()
+
+    async def close(self):
+        self.drop_connections()
+        while self._writers:
+            await asyncio.sleep(0.01)
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        authed = self.password is None
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                batch = []
+                while True:
+                    command, buffer = _parse(buffer)
+                    if command is None:
+                        break
+                    batch.append(command)
+                if not batch:
+                    continue
+                self.batches.append(batch)
+                replies = []
+                for command in batch:
+                    if command[0] == "AUTH":
+                        authed = command[1] == self.password
+                        replies.append(b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n")
+                    elif not authed:
+                        replies.append(b"-NOAUTH Authentication required.\r\n")
+                    else:
+                        replies.append(self._reply(command))
+                writer.write(b"".join(replies))
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _reply(self, command):
+        name, args = command[0], command[1:]
+        if name in self.errors:
+            return b"-%s\r\n" % self.errors[name].encode()
+        if name == "SELECT":
+            return b"+OK\r\n"
+        if name == "INCRBY":
+            value = int(self.data.get(args[0], b"0")) + int(args[1])
+            self.data[args[0]] = str(value).encode()
+            return b":%d\r\n" % value
+        if name == "EXPIRE":
+            if args[0] not in self.data:
+                return b":0\r\n"
+            self.ttl[args[0]] = int(args[1])
+            return b":1\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args)
+        if name == "MGET":
+            return b"*%d\r\n" % len(args) + b"".join(_bulk(self.data.get(key)) for key in args)
+        if name == "RPUSH":
+            items = self.data.setdefault(args[0], [])
+            if not isinstance(items, list):
+                return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+            items.extend(arg.encode() for arg in args[1:])
+            return b":%d\r\n" % len(items)
+        if name == "LRANGE":
+            items = self.data.get(args[0], [])
+            if not isinstance(items, list):
+                return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+            start, stop = int(args[1]), int(args[2])
+            selected = items[start:None if stop == -1 else stop + 1]
+            return b"*%d\r\n" % len(selected) + b"".join(_bulk(item) for item in selected)
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _parse(buffer):
+    """Parse one RESP array of bulk strings; returns (command or None, rest)"""
+    end = buffer.find(b"\r\n")
+    if end == -1:
+        return None, buffer
+    count = int(buffer[1:end])
+    pos = end + 2
+    parts = []
+    for _ in range(count):
+        end = buffer.find(b"\r\n", pos)
+        if end == -1:
+            return None, buffer
+        length = int(buffer[pos + 1:end])
+        start = end + 2
+        if len(buffer) < start + length + 2:
+            return None, buffer
+        parts.append(buffer[start:start + length].decode())
+        pos = start + length + 2
+    parts[0] = parts[0].upper()
+    return tuple(parts), buffer[pos:]
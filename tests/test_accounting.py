@@ -0,0 +1,43 @@
+import asyncio
+import clocks
+import config
+import replay
+from accounting import UsageTracker
+
+
+def test_over_budget_within_window_only():
+    usage = UsageTracker(budget=0.25, window=5)
+    usage.charge(1, 1.0)
+    assert not usage.over_budget(1)
+    usage.charge(1, 0.3)
+    assert usage.over_budget(1)
+    assert not usage.over_budget(2)
+    assert usage.get(1).messages == 2
+
+
+def test_waiting_on_enforcement_is_not_charged():
+    async def run():
+        clock = clocks.SimulatedClock(1000.0)
+        sink = replay.ReplaySink(clock)
+        cog = replay.build_cog(clock, sink)
+        # Every API call sits behind a rate limit for a while
+        loop = asyncio.get_running_loop()
+        slow = loop.create_future()
+        loop.call_later(0.3, slow.set_result, None)
+        sink.submit = lambda *args, **kwargs: (slow, True)
+
+        guild = replay.ReplayGuild(1, sink)
+        author = replay.ReplayMember(2, guild, sink)
+        channel = guild.channel(3)
+        for i in range(config.SPAM_THRESHOLD):
+            await cog.on_message(replay.ReplayMessage(i, author, guild, channel, "hi", 0, False))
+
+        usage = cog.usage.get(guild.id)
+        assert usage.messages == config.SPAM_THRESHOLD
+        assert usage.handler_time < 0.1
+        assert not sink.actions  # Logged only once the mute goes through
+
+        await asyncio.wait(list(cog.follow_ups))
+        assert [a.split("\t")[2] for a in sink.actions] == ["Auto-Mute (Spam)"]
+
+    asyncio.run(run())
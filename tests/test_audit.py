@@ -0,0 +1,49 @@
+import asyncio
+
+from audit import AuditLog
+
+
+def fill(log):
+    # Two guilds, alternating actions, one entry a minute
+    for i in range(30):
+        log.record(1, "Warn" if i % 2 else "Mute", target_id=100 + i % 3, moderator_id=7, created_at=1000.0 + 60 * i)
+    log.record(2, "Warn", target_id=100, moderator_id=7, created_at=1000.0)
+
+
+def test_filters_combine_and_stay_within_the_guild(isolated_config):
+    async def run():
+        log = AuditLog(str(isolated_config / "audit.db"))
+        fill(log)
+        warns = await log.search(1, action="warn", limit=100)
+        target = await log.search(1, target_id=101, limit=100)
+        recent = await log.search(1, since=1000.0 + 60 * 25, limit=100)
+        none = await log.search(1, since=1000.0 + 60 * 30, limit=100)
+        await log.close()
+        return warns, target, recent, none
+
+    warns, target, recent, none = asyncio.run(run())
+    assert len(warns) == 15 and all(e["action"] == "Warn" and e["guild_id"] == 1 for e in warns)
+    assert len(target) == 10 and all(e["target_id"] == 101 for e in target)
+    assert [e["created_at"] for e in recent] == [1000.0 + 60 * i for i in range(29, 24, -1)]
+    assert none == []
+
+
+def test_pages_follow_on_without_gaps_or_repeats(isolated_config):
+    async def run():
+        log = AuditLog(str(isolated_config / "audit.db"))
+        fill(log)
+        pages = []
+        before = None
+        while True:
+            page = await log.search(1, action="mute", since=1000.0 + 60 * 4, before_id=before, limit=4)
+            if not page:
+                break
+            pages.append(page)
+            before = page[-1]["id"]
+        await log.close()
+        return pages
+
+    pages = asyncio.run(run())
+    assert [len(page) for page in pages] == [4, 4, 4, 1]
+    times = [entry["created_at"] for page in pages for entry in page]
+    assert times == [1000.0 + 60 * i for i in range(28, 3, -2)]
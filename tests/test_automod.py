@@ -0,0 +1,50 @@
+import asyncio
+
+import clocks
+import replay
+from automod import ChannelBaselines
+
+
+def train(baselines, channel_id, counts):
+    now = 0.0
+    for count in counts:
+        now += 1.0
+        baselines.check(channel_id, count, now, 5)
+    return now
+
+
+def test_quiet_channels_keep_the_configured_threshold():
+    baselines = ChannelBaselines()
+    now = train(baselines, 1, [1] * 200)
+    # Everyone sends one message at a time here, but adapting never tightens the limit
+    assert baselines.check(1, 1, now + 1, 5) == 5
+
+
+def test_busy_channels_get_more_headroom_up_to_the_upper_bound():
+    baselines = ChannelBaselines()
+    now = train(baselines, 1, [2, 4, 6, 8, 4] * 40)
+    assert 5 < baselines.check(1, 1, now + 1, 5) <= 10
+
+
+def run_messages(contents, everyone=False):
+    async def run():
+        clock = clocks.SimulatedClock(1000.0)
+        sink = replay.ReplaySink(clock)
+        cog = replay.build_cog(clock, sink)
+        guild = replay.ReplayGuild(1, sink)
+        author = replay.ReplayMember(2, guild, sink)
+        for i, content in enumerate(contents):
+            clock.advance(10)
+            await cog.on_message(replay.ReplayMessage(i, author, guild, guild.channel(3), content, 0, everyone))
+        await replay.settle(cog)
+        return [action.split("\t")[2] for action in sink.actions]
+    return asyncio.run(run())
+
+
+def test_a_lone_attempted_everyone_is_not_punished():
+    assert run_messages(["please don't @everyone.", "ok @here"]) == []
+
+
+def test_attempted_everyone_with_a_link_still_counts():
+    assert run_messages(["@everyone free nitro https://nitro-gift.example/claim"]) == ["Auto-Mute (Mention Spam)"]
+    assert run_messages(["@everyone hi"], everyone=True) == ["Auto-Mute (Mention Spam)"]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import random
+import string
+
+import pytest
+
+import blocklist
+import config
+from blocklist import Blocklists, Matcher
+
+
+@pytest.fixture(autouse=True)
+def defaults(monkeypatch):
+    monkeypatch.setattr(config, "BAD_WORDS", ["badword1", "badword2"])
+    monkeypatch.setattr(config, "BLOCKLIST_RELOAD_INTERVAL", 0)
+
+
+def naive(terms, content):
+    return any(term in content for term in terms)
+
+
+@pytest.mark.parametrize("size", [3, blocklist.LOOP_MAX_TERMS + 1, 2000])
+def test_matcher_agrees_with_substring_tests(size):
+    rng = random.Random(size)
+    word = lambda: "".join(rng.choice("abcde") for _ in range(rng.randint(2, 7)))  # noqa: E731
+    terms = frozenset(word() for _ in range(size))
+    matcher = Matcher(terms)
+    for _ in range(500):
+        content = "".join(rng.choice("abcde ") for _ in range(rng.randint(0, 60)))
+        found = matcher.search(content)
+        assert (found is not None) == naive(terms, content)
+        assert found is None or found in content and found in terms
+
+
+def test_automaton_prefers_longest_term_ending_first():
+    terms = frozenset(["he", "she", "hers"] + [f"filler{c}{d}" for c in string.ascii_lowercase for d in "wxyz"])
+    matcher = Matcher(terms)
+    assert matcher.goto is not None
+    assert matcher.search("ushers") == "she"
+    assert matcher.search("nothing here") == "he"
+    assert matcher.search("nothing") is None
+
+
+def test_edits_recompile_only_that_guild_and_share_matchers(isolated_config):
+    async def run():
+        lists = Blocklists(None)
+        await lists.cog_load()
+        assert lists.matcher(1) is lists.matcher(2) is lists.default
+
+        assert await lists.add(1, ["Spoiler", "badword1"]) == ["spoiler"]
+        assert lists.matcher(1).search("no spoiler please") == "spoiler"
+        assert lists.matcher(2) is lists.default
+
+        assert await lists.add(2, ["spoiler"]) == ["spoiler"]
+        assert lists.matcher(1) is lists.matcher(2)
+
+        assert await lists.remove(1, ["badword1"]) == ["badword1"]
+        assert lists.matcher(1).search("badword1") is None
+        assert lists.matcher(2).search("badword1") == "badword1"
+        await lists.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_reload_picks_up_changes_made_on_disk(isolated_config):
+    async def run():
+        lists = Blocklists(None)
+        await lists.add(1, ["alpha"])
+        await lists.add(2, ["beta"])
+        untouched = lists.matcher(2)
+
+        with open(config.BLOCKLIST_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        data["1"]["add"] = ["gamma"]
+        with open(config.BLOCKLIST_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.utime(config.BLOCKLIST_FILE, ns=(1, 1))
+
+        assert await lists.reload() == 1
+        assert lists.matcher(1).search("gamma ray") == "gamma"
+        assert lists.matcher(1).search("alpha") is None
+        assert lists.matcher(2) is untouched
+
+    asyncio.run(run())
+
+
+def test_large_lists_are_compiled_before_use(isolated_config, monkeypatch):
+    monkeypatch.setattr(blocklist, "THREAD_BUILD_TERMS", 10)
+
+    async def run():
+        lists = Blocklists(None)
+        words = [f"term{i:03d}x" for i in range(150)]
+        await lists.add(1, words)
+        matcher = lists.matcher(1)
+        assert matcher.goto is not None
+        assert matcher.search("say term042x now") == "term042x"
+
+        # A fresh cog builds every saved list on load, before any message
+        reloaded = Blocklists(None)
+        await reloaded.cog_load()
+        assert reloaded.matcher(1).search("term007x") == "term007x"
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import asyncio
+
+import clocks
+import config
+import joinscore
+import replay
+
+NOW = 1_750_000_000.0
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeMember:
+    def __init__(self, member_id, guild, name, avatar="a_hash"):
+        self.id = member_id
+        self.guild = guild
+        self.name = name
+        self.avatar = avatar
+
+
+def snowflake(created, seq=0):
+    return (int(created * 1000) - joinscore.DISCORD_EPOCH) << 22 | seq
+
+
+def test_account_age_comes_from_the_snowflake():
+    assert abs(joinscore.account_created(snowflake(NOW - 3600)) - (NOW - 3600)) < 0.001
+
+
+def test_digits_are_folded_in_name_trigrams():
+    assert joinscore.name_ngrams("Raider_482") == joinscore.name_ngrams("raider_917")
+    assert "^ra" in joinscore.name_ngrams("raider") and "er$" in joinscore.name_ngrams("raider")
+
+
+def test_templated_fresh_accounts_are_flagged_and_ordinary_joins_are_not():
+    scorer = joinscore.JoinScorer(clocks.SimulatedClock(NOW))
+    guild = FakeGuild(1)
+    ordinary = [FakeMember(snowflake(NOW - 400 * 86400, i), guild, name)
+                for i, name in enumerate(["kalumo", "thavic", "norbri", "samdax"])]
+    assert all(scorer.score(member).total < config.JOIN_SUSPICIOUS_SCORE for member in ordinary)
+
+    raiders = [FakeMember(snowflake(NOW - 600, i), guild, f"freegift_{i * 137}", avatar=None) for i in range(4)]
+    scores = [scorer.score(member) for member in raiders]
+    # Name similarity only counts once enough recent joins share the fragments
+    assert scores[0].name_match == 0 and scores[-1].name_match > 0.8
+    assert scores[-1].total >= config.JOIN_SUSPICIOUS_SCORE
+    assert "default avatar" in scores[-1].reasons()
+    assert scorer.flagged == len([s for s in scores if s.total >= config.JOIN_SUSPICIOUS_SCORE])
+
+
+def test_names_are_compared_within_one_guild_only():
+    scorer = joinscore.JoinScorer(clocks.SimulatedClock(NOW))
+    for i in range(3):
+        scorer.score(FakeMember(snowflake(NOW - 600, i), FakeGuild(1), f"freegift_{i}"))
+    other = scorer.score(FakeMember(snowflake(NOW - 600, 9), FakeGuild(2), "freegift_9"))
+    assert other.name_match == 0
+    scorer.forget(1)
+    assert len(scorer) == 1
+
+
+def test_leaving_a_guild_drops_its_join_history(monkeypatch):
+    monkeypatch.setattr(config, "RAID_ACTION", "verification")
+
+    async def run():
+        clock = clocks.SimulatedClock(NOW)
+        sink = replay.ReplaySink(clock)
+        cog = replay.build_cog(clock, sink)
+        guild = replay.ReplayGuild(1, sink)
+        guild.channel(1)
+        await cog.on_member_join(replay.ReplayMember(snowflake(NOW - 400 * 86400), guild, sink))
+        assert guild.id in cog.recent_joins and len(cog.join_scorer) == 1
+        await cog.on_guild_remove(guild)
+        await cog.quarantine.close()
+        return cog
+
+    cog = asyncio.run(run())
+    assert not cog.recent_joins and len(cog.join_scorer) == 0
@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+from linkscan import LinkScanner
+
+PAYLOAD = b"MZ not really a program"
+
+
+class FakeAttachment:
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.size = len(data)
+        self.data = data
+        self.reads = 0
+
+    async def read(self):
+        self.reads += 1
+        return self.data
+
+
+def scanner():
+    return LinkScanner(["evil.com"], [hashlib.sha256(PAYLOAD).hexdigest()], [".exe"])
+
+
+def test_check_host_matches_parent_domains():
+    links = scanner()
+    assert links.check_content("see https://a.b.evil.com/x") == "evil.com"
+    assert links.check_content("see https://notevil.com/x") is None
+
+
+def test_userinfo_does_not_hide_the_host():
+    links = scanner()
+    assert links.check_content("https://discord.com@evil.com") == "evil.com"
+    assert links.check_content("log in at https://user:pw@evil.com/login") == "evil.com"
+    assert links.check_content("https://evil.com@discord.com/x") is None
+
+
+def test_clean_attachment_is_not_cached_for_a_later_payload():
+    links = scanner()
+    decoy = FakeAttachment("setup.exe", b"x" * len(PAYLOAD))
+    payload = FakeAttachment("setup.exe", PAYLOAD)
+    assert not asyncio.run(links.check_attachment(decoy))
+    assert asyncio.run(links.check_attachment(payload))
+    assert payload.reads == 1
+
+
+def test_known_bad_repost_is_not_downloaded_again():
+    links = scanner()
+    first = FakeAttachment("setup.exe", PAYLOAD)
+    repost = FakeAttachment("SETUP.exe", PAYLOAD)
+    assert asyncio.run(links.check_attachment(first))
+    assert asyncio.run(links.check_attachment(repost))
+    assert repost.reads == 0
+
+
+def test_safe_extensions_are_not_downloaded():
+    links = scanner()
+    image = FakeAttachment("cat.png", PAYLOAD)
+    assert not asyncio.run(links.check_attachment(image))
+    assert image.reads == 0
@@ -0,0 +1,94 @@
+import asyncio
+
+import discord
+
+from lockdown import LockdownManager
+
+
+class ImmediateOutbound:
+    """Runs every submitted call straight away and counts them"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def submit(self, bucket, factory, priority=None, key=None, window=0, delay=0, guild=None):
+        self.calls += 1
+        return asyncio.ensure_future(factory()), True
+
+
+class FakeChannel:
+    def __init__(self, channel_id, send_messages=None):
+        self.id = channel_id
+        self.name = f"channel-{channel_id}"
+        self.overwrite = None
+        if send_messages is not None:
+            self.overwrite = discord.PermissionOverwrite(send_messages=send_messages)
+
+    def overwrites_for(self, target):
+        return discord.PermissionOverwrite(**dict(self.overwrite)) if self.overwrite else discord.PermissionOverwrite()
+
+    async def set_permissions(self, target, overwrite=None, reason=None):
+        self.overwrite = overwrite
+
+    @property
+    def send_messages(self):
+        return self.overwrites_for(None).send_messages
+
+
+class FakeGuild:
+    def __init__(self, channels):
+        self.id = 1
+        self.name = "guild-1"
+        self.default_role = object()
+        self.channels = {channel.id: channel for channel in channels}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+def test_unlock_after_restart_restores_each_channels_original_setting(isolated_config):
+    path = str(isolated_config / "lockdown.json")
+    unset, allowed, read_only = FakeChannel(1), FakeChannel(2, True), FakeChannel(3, False)
+    guild = FakeGuild([unset, allowed, read_only])
+
+    async def run():
+        queue = ImmediateOutbound()
+        manager = LockdownManager(queue, path)
+        locked = await manager.lock(guild, [unset, allowed, read_only])
+        assert locked == [unset, allowed]
+        # Locking again finds nothing left to edit
+        assert await manager.lock(guild, [unset, allowed, read_only]) == []
+        assert queue.calls == 2
+
+        restarted = LockdownManager(queue, path)
+        assert restarted.is_locked(guild.id, unset.id) and not restarted.is_locked(guild.id, read_only.id)
+        assert await restarted.unlock(guild) == [unset, allowed]
+        assert queue.calls == 4
+        return restarted
+
+    restarted = asyncio.run(run())
+    assert unset.overwrite is None  # Emptied overwrites are removed, not left as all-unset
+    assert allowed.send_messages is True
+    assert read_only.send_messages is False
+    assert restarted.locked[guild.id] == {}
+
+
+def test_unlock_keeps_settings_changed_by_hand(isolated_config):
+    first, second = FakeChannel(1), FakeChannel(2)
+    guild = FakeGuild([first, second])
+
+    async def run():
+        manager = LockdownManager(ImmediateOutbound(), str(isolated_config / "lockdown.json"))
+        await manager.lock(guild, [first, second])
+        first.overwrite = discord.PermissionOverwrite(send_messages=True)
+        assert await manager.unlock(guild) == [second]
+        # Channels the bot never locked are only opened by a forced unlock
+        other = FakeChannel(3, False)
+        guild.channels[3] = other
+        assert await manager.unlock(guild, [other]) == []
+        assert await manager.unlock(guild, [other], force=True) == [other]
+        return other
+
+    other = asyncio.run(run())
+    assert first.send_messages is True and second.overwrite is None
+    assert other.overwrite is None
@@ -0,0 +1,50 @@
+import logging
+
+from logs import RepeatSampler
+
+
+def record(msg, created, *args):
+    entry = logging.makeLogRecord({"name": "bot.test", "levelno": logging.WARNING, "msg": msg, "args": args})
+    entry.created = created
+    return entry
+
+
+def test_flood_that_stops_is_summarized_by_the_next_record_of_any_kind():
+    summaries = []
+    sampler = RepeatSampler(window=10, burst=2, sink=summaries.append)
+    passed = [sampler.filter(record("Auto-muted %s", 100 + i * 0.1, f"user{i}")) for i in range(50)]
+    assert passed.count(True) == 2
+    assert not summaries
+
+    # Nothing like it again; an unrelated line after the window reports it
+    assert sampler.filter(record("Joined %s", 115, "guild"))
+    assert [s.getMessage() for s in summaries] == ["Auto-muted user49 (48 similar suppressed)"]
+
+
+def test_pending_counts_are_summarized_on_flush_and_eviction(monkeypatch):
+    summaries = []
+    sampler = RepeatSampler(window=10, burst=1, sink=summaries.append)
+    for i in range(3):
+        sampler.filter(record("Deleted message from %s", 100, i))
+    sampler.flush()
+    assert [s.getMessage() for s in summaries] == ["Deleted message from 2 (2 similar suppressed)"]
+
+    monkeypatch.setattr(RepeatSampler, "MAX_KEYS", 2)
+    summaries.clear()
+    for i in range(2):
+        sampler.filter(record("Muted %s", 200, i))
+    sampler.filter(record("Kicked %s", 200, 0))
+    sampler.filter(record("Banned %s", 200, 0))  # Evicts the Muted and Kicked windows
+    assert [s.getMessage() for s in summaries] == ["Muted 1 (1 similar suppressed)"]
+
+
+def test_a_window_is_reported_exactly_once():
+    summaries = []
+    sampler = RepeatSampler(window=10, burst=1, sink=summaries.append)
+    sampler.filter(record("Muted %s", 100, "a"))
+    assert sampler.filter(record("Muted %s", 101, "b")) is False
+    assert sampler.filter(record("Muted %s", 105, "c")) is False
+    again = record("Muted %s", 111, "d")
+    assert sampler.filter(again)
+    sampler.flush()
+    assert [s.getMessage() for s in summaries] + [again.getMessage()] == ["Muted c (2 similar suppressed)", "Muted d"]
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import clocks
+import config
+import outbound
+import replay
+
+
+def call(log, name):
+    async def factory():
+        log.append(name)
+        return name
+    return factory
+
+
+async def schedule(queue):
+    """Run one scheduling pass and let the dispatched calls finish"""
+    next_try = queue._schedule(time.monotonic())
+    while queue.running:
+        await asyncio.sleep(0)
+    return next_try
+
+
+def test_pending_calls_with_a_key_are_merged():
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        first, is_new = queue.submit(("send", 1), call(log, "a"), key="alert", window=60)
+        assert is_new
+        # Merged callers share the future but are told the call isn't theirs
+        assert queue.submit(("send", 1), call(log, "b"), key="alert", window=60) == (first, False)
+        await schedule(queue)
+        assert await first == "a"
+        # Still inside the window after it ran: merged into the call that went out
+        assert queue.submit(("send", 1), call(log, "c"), key="alert", window=60) == (None, False)
+        await schedule(queue)
+        return log, queue
+
+    log, queue = asyncio.run(run())
+    assert log == ["a"]
+    assert queue.coalesced == 2
+
+
+def test_bucket_budget_holds_calls_back(monkeypatch):
+    monkeypatch.setitem(config.OUTBOUND_BUDGETS, "send", (2, 10))
+
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        for i in range(5):
+            queue.submit(("send", 1), call(log, i), guild=1)
+        queue.submit(("send", 2), call(log, "other channel"), guild=1)
+        next_try = await schedule(queue)
+        return log, queue, next_try
+
+    log, queue, next_try = asyncio.run(run())
+    assert log == [0, 1, "other channel"]
+    assert len(queue) == 3
+    assert 0 < next_try <= 5
+
+
+def test_enforcement_goes_before_notifications():
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        queue.submit(("send", 1), call(log, "notice"), guild=1)
+        queue.submit(("delete", 1), call(log, "delete"), priority=outbound.ENFORCE, guild=1)
+        await schedule(queue)
+        return log
+
+    assert asyncio.run(run()) == ["delete", "notice"]
+
+
+def test_cancelled_call_is_withdrawn():
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        future, _ = queue.submit(("role", 1), call(log, "add"), key=("quarantine", 1, 5), guild=1)
+        future.cancel()
+        await schedule(queue)
+        # The key is free again for a new call
+        again, _ = queue.submit(("role", 1), call(log, "again"), key=("quarantine", 1, 5), guild=1)
+        await schedule(queue)
+        return log, again
+
+    log, again = asyncio.run(run())
+    assert log == ["again"]
+    assert again.result() == "again"
+
+
+def test_a_flooded_guild_does_not_delay_others(monkeypatch):
+    monkeypatch.setattr(config, "OUTBOUND_GUILD_BUDGET", (5, 1))
+
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        for i in range(200):
+            queue.submit(("delete", i), call(log, ("raided", i)), priority=outbound.ENFORCE, guild=1)
+        queue.submit(("delete", 1000), call(log, ("quiet", 0)), priority=outbound.ENFORCE, guild=2)
+        queue.submit(("delete", 1001), call(log, ("quiet", 1)), priority=outbound.ENFORCE, guild=2)
+        await schedule(queue)
+        return log, queue
+
+    log, queue = asyncio.run(run())
+    # Round-robin interleaves the quiet guild, and the raided one stops at its own budget
+    assert ("quiet", 0) in log[:2] and ("quiet", 1) in log[:4]
+    assert len([entry for entry in log if entry[0] == "raided"]) == 5
+    assert queue.queued(1) == 195 and queue.queued(2) == 0
+
+
+def test_a_merged_mute_is_announced_and_logged_once(monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_SPAM", False)
+
+    class Member(replay.ReplayMember):
+        timeouts = 0
+
+        async def timeout(self, duration, reason=None):
+            Member.timeouts += 1
+
+    async def run():
+        clock = clocks.SimulatedClock(1000.0)
+        sink = replay.ReplaySink(clock)
+        cog = replay.build_cog(clock, sink)
+        # A real queue, not started yet, so the first mute is still pending when the second one comes in
+        queue = cog.outbound = cog.notifier.outbound = outbound.OutboundQueue()
+        guild = replay.ReplayGuild(1, sink)
+        author = Member(2, guild, sink)
+        channel = guild.channel(3)
+        for i in range(2 * config.SPAM_THRESHOLD):
+            await cog.on_message(replay.ReplayMessage(i, author, guild, channel, "hi", 0, False))
+        assert queue.coalesced == 1
+
+        await schedule(queue)
+        await asyncio.wait(list(cog.follow_ups))
+        return sink
+
+    sink = asyncio.run(run())
+    assert Member.timeouts == 1
+    assert [action.split("\t")[2] for action in sink.actions] == ["Auto-Mute (Spam)"]
@@ -0,0 +1,110 @@
+import asyncio
+
+import clocks
+import config
+import outbound
+from quarantine import QuarantineManager
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = 99
+        self.name = name
+        self.members = []
+
+
+class FakeMember:
+    def __init__(self, member_id, guild, log, gate=None):
+        self.id = member_id
+        self.guild = guild
+        self.roles = []
+        self.log = log
+        self.gate = gate  # Event add_roles waits on, to hold the call in flight
+
+    async def add_roles(self, role, reason=None):
+        self.log.append(("add", self.id))
+        if self.gate is not None:
+            await self.gate.wait()
+        self.roles.append(role)
+        role.members.append(self)
+
+    async def remove_roles(self, role, reason=None):
+        self.log.append(("remove", self.id))
+        self.roles.remove(role)
+        role.members.remove(self)
+
+
+class FakeChannel:
+    def __init__(self, channel_id, log):
+        self.id = channel_id
+        self.log = log
+
+    async def set_permissions(self, target, overwrite=None, reason=None):
+        await asyncio.sleep(0.01)
+        self.log.append(("overwrite", self.id))
+
+
+class FakeGuild:
+    def __init__(self, log):
+        self.id = 1
+        self.name = "guild-1"
+        self.roles = []
+        self.channels = [FakeChannel(i, log) for i in range(3)]
+
+    async def create_role(self, name=None, **kwargs):
+        role = FakeRole(name)
+        self.roles.append(role)
+        return role
+
+
+async def settle(queue):
+    await asyncio.sleep(0)
+    while len(queue) or queue.running:
+        await asyncio.sleep(0.01)
+
+
+def test_overwrites_land_before_the_first_add():
+    async def run():
+        log = []
+        queue = outbound.OutboundQueue()
+        queue.start()
+        guild = FakeGuild(log)
+        manager = QuarantineManager(None, queue, clock=clocks.SimulatedClock(0))
+        await manager.start(guild, [FakeMember(10, guild, log)], now=0)
+        await settle(queue)
+        await manager.close()
+        await queue.close()
+        return log
+
+    log = asyncio.run(run())
+    assert [kind for kind, _ in log] == ["overwrite"] * 3 + ["add"]
+
+
+def test_release_withdraws_queued_adds_and_undoes_sent_ones(monkeypatch):
+    # One role call per second, so only the first add goes out before release
+    monkeypatch.setitem(config.OUTBOUND_BUDGETS, "role", (1, 1))
+
+    async def run():
+        log = []
+        gate = asyncio.Event()
+        queue = outbound.OutboundQueue()
+        queue.start()
+        guild = FakeGuild(log)
+        manager = QuarantineManager(None, queue, clock=clocks.SimulatedClock(0))
+        members = [FakeMember(10, guild, log, gate)] + [FakeMember(i, guild, log) for i in range(11, 15)]
+        await manager.start(guild, members, now=0)
+        while ("add", 10) not in log:
+            await asyncio.sleep(0.01)
+
+        released = await manager.release(guild)
+        gate.set()  # The in-flight add lands after release
+        await settle(queue)
+        await manager.close()
+        await queue.close()
+        return log, released, members
+
+    log, released, members = asyncio.run(run())
+    calls = [entry for entry in log if entry[0] != "overwrite"]
+    assert calls == [("add", 10), ("remove", 10)]
+    assert released == 1
+    assert all(not member.roles for member in members)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import clocks
+import config
+import state
+from fake_redis import FakeRedis
+
+
+def run_with_server(test, password=None):
+    async def run():
+        server = await FakeRedis(password).start()
+        try:
+            return await test(server)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_flush_pipelines_increments_with_their_expiry():
+    async def test(server):
+        backend = state.RedisStateBackend(server.url, clock=clocks.SimulatedClock(1000.0))
+        for _ in range(3):
+            backend.hit("spam", (1, 42), 1000.0, 10)
+        backend.hit("joins", 1, 1000.0, 10)
+        await backend.flush()
+        await backend.close()
+        return server
+
+    server = run_with_server(test)
+    # One read carried every INCRBY and its EXPIRE, then the refresh of the windows' older slots
+    batch = server.batches[0]
+    assert [command[0] for command in batch] == ["INCRBY", "EXPIRE", "INCRBY", "EXPIRE", "MGET"]
+    counters = {command[1]: int(command[2]) for command in batch if command[0] == "INCRBY"}
+    assert sorted(counters.values()) == [1, 3]
+    assert all(server.ttl[key] == config.STATE_COUNTER_TTL for key in counters)
+
+
+def test_totals_include_other_processes_after_a_flush():
+    async def test(server):
+        clock = clocks.SimulatedClock(1000.0)
+        first = state.RedisStateBackend(server.url, clock=clock)
+        second = state.RedisStateBackend(server.url, clock=clock)
+        first.hit("spam", 7, 1000.0, 10)
+        first.hit("spam", 7, 1000.0, 10)
+        await first.flush()
+        assert second.hit("spam", 7, 1000.0, 10) == 1
+        await second.flush()
+        # The INCRBY reply carries the shared total, and MGET refreshes slots only read
+        assert second.hit("spam", 7, 1000.0, 10) == 4
+        await first.flush()
+        assert first.hit("spam", 7, 1000.0, 10) == 4
+        await first.close()
+        await second.close()
+
+    run_with_server(test)
+
+
+def test_error_replies():
+    async def test(server):
+        backend = state.RedisStateBackend(server.url, clock=clocks.SimulatedClock(1000.0))
+        server.errors["EXPIRE"] = "ERR simulated failure"
+        backend.hit("spam", 7, 1000.0, 10)
+        # A failed EXPIRE doesn't lose the increment it follows
+        await backend.flush()
+        assert backend.hit("spam", 7, 1000.0, 10) == 2
+
+        server.errors["LRANGE"] = "WRONGTYPE Operation against a key holding the wrong kind of value"
+        with pytest.raises(state.RedisError, match="WRONGTYPE"):
+            await backend.get_warnings(1, 42)
+        await backend.close()
+
+    run_with_server(test)
+
+
+def test_wrong_password_is_an_error_every_time():
+    async def test(server):
+        conn = state.RedisConnection(server.url.replace("secret", "guess"))
+        for _ in range(2):
+            with pytest.raises(state.RedisError, match="WRONGPASS"):
+                await conn.execute("INCRBY", "x", 1)
+        await conn.close()
+        assert "x" not in server.data
+
+    run_with_server(test, password="secret")
+
+
+def test_reconnects_and_resends_after_the_connection_drops():
+    async def test(server):
+        backend = state.RedisStateBackend(server.url, clock=clocks.SimulatedClock(1000.0))
+        backend.hit("spam", 7, 1000.0, 10)
+        await backend.flush()
+        server.drop_connections()
+        await asyncio.sleep(0.01)
+
+        backend.hit("spam", 7, 1000.0, 10)
+        with pytest.raises((ConnectionError, OSError)):
+            await backend.flush()
+        # The increment went back to pending and goes out on a new connection
+        await backend.flush()
+        assert server.connections == 2
+        assert backend.hit("spam", 7, 1000.0, 10) == 3
+        await backend.close()
+        return server
+
+    server = run_with_server(test)
+    assert [int(value) for value in server.data.values()] == [3]
@@ -0,0 +1,48 @@
+import asyncio
+
+import clocks
+import commands
+import config
+import recorder
+import replay
+
+START = 1_750_000_000.0
+
+
+def record(path, events):
+    with open(path, "wb") as f:
+        f.write(recorder.MAGIC)
+        for kind, offset, author_id, content in events:
+            data = content.encode()
+            channel_id = 3 if kind == recorder.MESSAGE else 0
+            f.write(recorder.RECORD.pack(kind, 0, 0, START + offset, 1, channel_id, author_id, len(data)))
+            f.write(data)
+
+
+def test_actions_keep_their_event_time_and_order(isolated_config, monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_SPAM", False)
+    monkeypatch.setattr(config, "RAID_ACTION", "lockdown")
+    path = str(isolated_config / "events.bin")
+    spam = [(recorder.MESSAGE, 0.2 * i, 2, "buy now") for i in range(config.SPAM_THRESHOLD)]
+    joins = [(recorder.JOIN, 3.0 + i, 100 + i, "") for i in range(config.RAID_JOIN_THRESHOLD)]
+    record(path, spam + joins)
+
+    sink, events, _ = asyncio.run(replay.replay(path))
+    assert events == len(spam) + len(joins)
+    actions = [(float(a.split("\t")[0]) - START, a.split("\t")[2]) for a in sink.actions]
+    mute_at = 0.2 * (config.SPAM_THRESHOLD - 1)
+    raid_at = 3.0 + config.RAID_JOIN_THRESHOLD - 1
+    assert [name for _, name in actions] == ["Auto-Mute (Spam)", "Auto-Lockdown (Raid)"]
+    assert abs(actions[0][0] - mute_at) < 0.01 and abs(actions[1][0] - raid_at) < 0.01
+
+
+def test_the_cog_uses_the_clock_it_was_given():
+    async def run():
+        clock = clocks.SimulatedClock(START)
+        cog = commands.Moderation(replay.ReplayBot(), clock=clock)
+        await cog.quarantine.close()
+        return clock, cog
+
+    clock, cog = asyncio.run(run())
+    assert cog.state.clock is clock and cog.quarantine.clock is clock and cog.join_scorer.clock is clock
+    assert cog.parse_modlog_filters("days:2")["since"] == START - 2 * 86400
@@ -0,0 +1,68 @@
+import asyncio
+
+from resolver import MemberCache
+
+
+class FakeMember:
+    def __init__(self, member_id, guild, name, nick=None):
+        self.id = member_id
+        self.guild = guild
+        self.name = name
+        self.global_name = None
+        self.nick = nick
+
+    def __str__(self):
+        return self.name
+
+
+class FakeGuild:
+    id = 1
+    chunked = True
+
+    def __init__(self):
+        self.member_map = {}
+
+    @property
+    def members(self):
+        return list(self.member_map.values())
+
+    def get_member(self, member_id):
+        return self.member_map.get(member_id)
+
+    def join(self, member):
+        self.member_map[member.id] = member
+        return member
+
+
+def test_shared_name_still_resolves_after_one_holder_leaves():
+    guild = FakeGuild()
+    first = guild.join(FakeMember(1, guild, "alex"))
+    second = guild.join(FakeMember(2, guild, "sam", nick="Alex"))
+    cache = MemberCache(bot=None)
+
+    async def run():
+        assert await cache.find_member(guild, "alex") is first
+        del guild.member_map[first.id]
+        await cache.on_member_remove(first)
+        return await cache.find_member(guild, "ALEX")
+
+    assert asyncio.run(run()) is second
+
+
+def test_rename_only_drops_the_renamed_members_keys():
+    guild = FakeGuild()
+    first = guild.join(FakeMember(1, guild, "alex"))
+    second = guild.join(FakeMember(2, guild, "sam", nick="alex"))
+    cache = MemberCache(bot=None)
+
+    async def run():
+        await cache.find_member(guild, "alex")
+        renamed = FakeMember(2, guild, "sam", nick="sammy")
+        guild.member_map[2] = renamed
+        await cache.on_member_update(second, renamed)
+        return (await cache.find_member(guild, "alex"), await cache.find_member(guild, "sammy"),
+                await cache.find_member(guild, "nobody"))
+
+    found_alex, found_sammy, nobody = asyncio.run(run())
+    assert found_alex is first and found_sammy.id == 2 and nobody is None
+    assert "alex" in cache._names[guild.id] and 2 not in cache._names[guild.id]["alex"]
@@ -0,0 +1,39 @@
+import automod
+import clocks
+import policy
+import replay
+from blocklist import Matcher
+from shadow import BADWORDS, RULES, ShadowEvaluator
+
+
+def parsed(guild, content, message_id=1):
+    sink = replay.ReplaySink(clocks.SimulatedClock())
+    author = replay.ReplayMember(7, guild, sink)
+    message = replay.ReplayMessage(message_id, author, guild, guild.channel(3), content, 0, False)
+    return automod.ParsedMessage(message, now=0.0, policy=policy.DEFAULT_POLICY)
+
+
+def badword_counts(evaluator, guild_id):
+    rule = RULES.index("badwords")
+    return [counts[rule] for counts in evaluator.guild_stats(guild_id).counts]
+
+
+def test_live_baseline_uses_the_guilds_blocklist():
+    evaluator = ShadowEvaluator({"same": {}, "strict": {"BAD_WORDS": ["heck"]}}, budget=1.0)
+    guild = replay.ReplayGuild(1, replay.ReplaySink(clocks.SimulatedClock()))
+    live_words = Matcher(frozenset(["spoiler"]))  # The guild added "spoiler" and removed the defaults
+
+    evaluator.observe(parsed(guild, "no spoiler please"), live_words)
+    evaluator.observe(parsed(guild, "what the heck", 2), live_words)
+
+    # [live hits, shadow hits, both] per candidate
+    same, strict = badword_counts(evaluator, guild.id)
+    assert same == [1, 1, 1]
+    assert strict == [1, 1, 0]
+
+
+def test_evaluate_reports_bad_words_bit():
+    evaluator = ShadowEvaluator({}, budget=1.0)
+    guild = replay.ReplayGuild(1, replay.ReplaySink(clocks.SimulatedClock()))
+    assert evaluator.baseline.evaluate(parsed(guild, "a spoiler"), Matcher(frozenset(["spoiler"]))) & BADWORDS
+    assert not evaluator.baseline.evaluate(parsed(guild, "a spoiler", 2), Matcher(frozenset(["heck"]))) & BADWORDS
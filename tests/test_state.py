@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import clocks
+import config
+import snapshot
+import state
+from fake_redis import FakeRedis
+
+
+def test_snapshot_round_trip(isolated_config):
+    path = str(isolated_config / "state.snapshot")
+    clock = clocks.SimulatedClock(1000.0)
+    before = state.MemoryStateBackend(clock=clock)
+    for t in (990.0, 995.0, 999.0):
+        before.hit("spam", (1, 42), t, 30)
+    before.hit("joins", 1, 999.0, 10)
+    warning = state.WarningRecord("spamming", 7, 998.0)
+    asyncio.run(before.add_warning(1, 42, warning))
+    assert state.save_snapshot(before, path)
+
+    after = state.MemoryStateBackend(clock=clocks.SimulatedClock(1001.0))
+    assert state.load_snapshot(after, path)
+    # Restored windows keep counting where the old process stopped
+    assert after.hit("spam", (1, 42), 1001.0, 30) == 4
+    assert after.hit("joins", 1, 1001.0, 10) == 2
+    assert after.hit("spam", (1, 43), 1001.0, 30) == 1
+    restored = asyncio.run(after.get_warnings(1, 42))
+    assert [(w.reason, w.mod) for w in restored] == [("spamming", 7)]
+
+
+def test_final_save_waits_for_a_periodic_write(isolated_config, monkeypatch):
+    path = str(isolated_config / "state.snapshot")
+    monkeypatch.setattr(config, "STATE_SNAPSHOT_INTERVAL", 0.01)
+    write = snapshot.write
+    writing = threading.Lock()
+    overlaps = []
+
+    def slow_write(*args, **kwargs):
+        if not writing.acquire(blocking=False):
+            overlaps.append(args)
+            return write(*args, **kwargs)
+        try:
+            time.sleep(0.2)
+            return write(*args, **kwargs)
+        finally:
+            writing.release()
+
+    monkeypatch.setattr(snapshot, "write", slow_write)
+
+    async def run():
+        backend = state.MemoryStateBackend(snapshot_path=path, clock=clocks.SimulatedClock(1000.0))
+        backend.hit("spam", (1, 42), 999.0, 30)
+        await backend.start()
+        while not writing.locked():
+            await asyncio.sleep(0.01)
+        backend.hit("spam", (1, 42), 1000.0, 30)
+        await backend.stop_snapshots()
+        state.save_snapshot(backend, path)
+        await backend.close()
+
+    asyncio.run(run())
+    assert not overlaps
+    # The final save is the one left on disk
+    after = state.MemoryStateBackend(clock=clocks.SimulatedClock(1000.0))
+    assert state.load_snapshot(after, path)
+    assert after.hit("spam", (1, 42), 1000.5, 30) == 3
+
+
+def test_redis_reset_survives_a_hit_before_the_flush():
+    async def run():
+        server = await FakeRedis().start()
+        try:
+            backend = state.RedisStateBackend(server.url, clock=clocks.SimulatedClock(1000.0))
+            for _ in range(5):
+                backend.hit("spam", 7, 1000.0, 10)
+            await backend.flush()
+            backend.reset("spam", 7)
+            assert backend.hit("spam", 7, 1000.0, 10) == 1
+            await backend.flush()
+            count = backend.hit("spam", 7, 1000.0, 10)
+            await backend.close()
+            return count
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == 2